@@ -1,8 +1,15 @@
 from django.contrib import admin
-from core.models import Newsletter, Testimonial, SiteStats
+from core.models import Newsletter, Testimonial, SiteStats, QueuedEmail
 
 # Register your models here.
 
 admin.site.register(Newsletter)
 admin.site.register(Testimonial)
-admin.site.register(SiteStats)
\ No newline at end of file
+admin.site.register(SiteStats)
+
+
+@admin.register(QueuedEmail)
+class QueuedEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('subject', 'last_error')
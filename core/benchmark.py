@@ -0,0 +1,125 @@
+import json
+import math
+import os
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core.seed import seed
+
+
+BENCHMARK_SCALE = int(os.environ.get('BENCHMARK_SCALE', 1))
+BENCHMARK_RUNS = int(os.environ.get('BENCHMARK_RUNS', 5))
+# Set to a file path to collect the timings as JSON, e.g. to diff two branches
+BENCHMARK_OUTPUT = os.environ.get('BENCHMARK_OUTPUT')
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def write_results(results, section='views'):
+    if not BENCHMARK_OUTPUT or not results:
+        return
+    try:
+        with open(BENCHMARK_OUTPUT) as f:
+            data = json.load(f)
+    except (FileNotFoundError, ValueError):
+        data = {}
+    data.setdefault(section, {}).update(results)
+    data['scale'] = BENCHMARK_SCALE
+    data['runs'] = BENCHMARK_RUNS
+    with open(BENCHMARK_OUTPUT, 'w') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+
+def _fetch(url):
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=30) as response:
+            response.read()
+            ok = response.status == 200
+    except (urllib.error.URLError, OSError):
+        ok = False
+    return (time.perf_counter() - start) * 1000, ok
+
+
+def measure_throughput(url, requests, concurrency):
+    """GET ``url`` ``requests`` times from ``concurrency`` client threads against a running server."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(_fetch, [url] * requests))
+    elapsed = time.perf_counter() - start
+
+    timings = [ms for ms, ok in results if ok]
+    return {
+        'requests': requests,
+        'concurrency': concurrency,
+        'errors': requests - len(timings),
+        'rps': round(len(timings) / elapsed, 1),
+        'p50_ms': round(percentile(timings, 50), 3) if timings else None,
+        'p99_ms': round(percentile(timings, 99), 3) if timings else None,
+    }
+
+
+class ViewBenchmarkMixin:
+    """TestCase mixin: seeds data once per class and times views against a query budget.
+
+    The budget is checked on a cold cache, so a view that only looks cheap
+    because of caching still fails when it starts issuing N+1 queries. Warm
+    runs are timed afterwards.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.benchmark_results = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.seeded = seed(scale=BENCHMARK_SCALE)
+
+    @classmethod
+    def tearDownClass(cls):
+        write_results(cls.benchmark_results)
+        super().tearDownClass()
+
+    def benchmark(self, name, url, max_queries, client=None):
+        client = client or self.client
+        cache.clear()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200, f"{name} returned {response.status_code}")
+        self.assertLessEqual(
+            len(queries), max_queries,
+            f"{name} ran {len(queries)} queries, budget is {max_queries}:\n"
+            + '\n'.join(query['sql'] for query in queries.captured_queries)
+        )
+
+        timings = []
+        with CaptureQueriesContext(connection) as warm_queries:
+            for _ in range(BENCHMARK_RUNS):
+                start = time.perf_counter()
+                client.get(url)
+                timings.append((time.perf_counter() - start) * 1000)
+
+        self.benchmark_results[name] = {
+            'url': url,
+            'queries_cold': len(queries),
+            'queries_warm': len(warm_queries) / BENCHMARK_RUNS,
+            'query_budget': max_queries,
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p90_ms': round(percentile(timings, 90), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+            'max_ms': round(max(timings), 3),
+        }
+        return response
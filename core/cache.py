@@ -0,0 +1,88 @@
+import asyncio
+import time
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+
+SECTION_TIMEOUT = 60 * 15
+LOCK_TIMEOUT = 30
+LOCK_WAIT = 2.0
+LOCK_POLL = 0.05
+
+
+def cache_is_shared(alias='default'):
+    """Whether every process sees the same cache; locmem and dummy caches live in one process only."""
+    return not isinstance(caches[alias], (LocMemCache, DummyCache))
+
+
+def section_key(name):
+    return f'home:section:{name}'
+
+
+def cached_section(name, builder, timeout=SECTION_TIMEOUT):
+    """Return the cached value of a home page section, building it if needed.
+
+    Only the worker that wins ``cache.add`` on the lock key rebuilds an
+    expired section. Everyone else waits briefly for that result instead of
+    running the same queries at the same time, and only builds it themselves
+    if the lock holder is too slow.
+    """
+    key = section_key(name)
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    lock_key = key + ':lock'
+    if not cache.add(lock_key, 1, LOCK_TIMEOUT):
+        deadline = time.monotonic() + LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL)
+            value = cache.get(key)
+            if value is not None:
+                return value
+        return builder()
+
+    try:
+        value = builder()
+        cache.set(key, value, timeout)
+    finally:
+        cache.delete(lock_key)
+    return value
+
+
+async def acached_section(name, builder, timeout=SECTION_TIMEOUT):
+    """``cached_section`` for async views; ``builder`` is a coroutine function."""
+    key = section_key(name)
+    value = await cache.aget(key)
+    if value is not None:
+        return value
+
+    lock_key = key + ':lock'
+    if not await cache.aadd(lock_key, 1, LOCK_TIMEOUT):
+        deadline = time.monotonic() + LOCK_WAIT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LOCK_POLL)
+            value = await cache.aget(key)
+            if value is not None:
+                return value
+        return await builder()
+
+    try:
+        value = await builder()
+        await cache.aset(key, value, timeout)
+    finally:
+        await cache.adelete(lock_key)
+    return value
+
+
+def invalidate_sections(*names):
+    """Drop the sections once the current transaction commits.
+
+    Dropped earlier, a request could rebuild them from the rows as they were
+    before the commit and cache that for ``SECTION_TIMEOUT``.
+    """
+    keys = [section_key(name) for name in names]
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,17 @@
+from django.core.checks import Tags, Warning, register
+
+from core.cache import cache_is_shared
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    if cache_is_shared():
+        return []
+    return [Warning(
+        "The default cache is local to each process.",
+        hint=(
+            "Section locks and invalidation, event page versions and unread counters only work across "
+            "workers and management commands with a shared cache; set REDIS_URL."
+        ),
+        id='core.W001',
+    )]
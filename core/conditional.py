@@ -0,0 +1,84 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+
+# How long a reverse proxy or browser may reuse an anonymous listing page without revalidating
+PAGE_MAX_AGE = getattr(settings, 'PAGE_MAX_AGE', 60)
+
+
+def make_etag(*parts):
+    raw = ':'.join(str(part) for part in parts)
+    return quote_etag(hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest())
+
+
+def viewer_key(request, user, shared=True):
+    """What a page's HTML depends on besides its content: the nav bar, and any CSRF token it embeds.
+
+    Anonymous visitors of ``shared`` pages (no CSRF token in the HTML) all get
+    the same page.
+    """
+    csrf_cookie = request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')
+    if not user.is_authenticated:
+        return 'anonymous' if shared else f'anonymous:{csrf_cookie}'
+    return f'{user.pk}:{user.profile_image.name}:{csrf_cookie}'
+
+
+def not_modified(request, etag, last_modified=None):
+    """A 304 response if the client's copy is current, else None."""
+    return get_conditional_response(
+        request, etag=etag, last_modified=last_modified and int(last_modified.timestamp())
+    )
+
+
+def finish(response, etag, last_modified=None, public=False):
+    """Attach the validators and the caching policy to a 200 or 304 response.
+
+    Public pages may be kept by shared caches for ``PAGE_MAX_AGE`` seconds;
+    anything else is private and revalidated on every use.
+    """
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(int(last_modified.timestamp()))
+    if public:
+        patch_cache_control(response, public=True, max_age=PAGE_MAX_AGE)
+    else:
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def conditional_page(validators):
+    """Answer GET/HEAD with 304 before running an async view whose content hasn't changed.
+
+    ``validators(request, *args, **kwargs)`` is awaited first and returns
+    ``(version, last_modified)`` for the page's content, from queries much
+    cheaper than the view's own, or ``(None, None)`` to leave the request to
+    the view (e.g. for a 404). Last-Modified is only sent with pages that are
+    the same for every anonymous visitor.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return await view(request, *args, **kwargs)
+            version, last_modified = await validators(request, *args, **kwargs)
+            if version is None:
+                return await view(request, *args, **kwargs)
+
+            user = await request.auser()
+            public = not user.is_authenticated
+            etag = make_etag(request.get_full_path(), version, viewer_key(request, user))
+            if not public:
+                last_modified = None
+
+            response = not_modified(request, etag, last_modified)
+            if response is None:
+                response = await view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            return finish(response, etag, last_modified, public)
+        return wrapper
+    return decorator
@@ -0,0 +1,52 @@
+import re
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+# Plan lines that read a whole table instead of walking an index
+SEQUENTIAL_SCAN = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'\bSCAN (\w+)(?! USING (?:COVERING )?INDEX)(?: AS \w+)?$'),
+}
+
+
+def sql_plan(sql):
+    """The EXPLAIN output of SQL captured from a running view (parameters inlined), as a list of lines.
+
+    On PostgreSQL sequential scans are disabled for the duration, so the plan
+    shows whether an index *can* serve the query rather than what the planner
+    prefers for a small test table.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}')
+        return [' '.join(str(column) for column in row) for row in cursor.fetchall()]
+
+
+def sequential_scans(plan):
+    """Tables the plan reads row by row."""
+    pattern = SEQUENTIAL_SCAN.get(connection.vendor)
+    if pattern is None:
+        return []
+    return [match.group(1) for line in plan if (match := pattern.search(line.strip()))]
+
+
+class QueryPlanMixin:
+    """TestCase mixin: ``with self.assertQueriesUseIndexes(name):`` fails on any sequential scan
+    in the plans of the SELECTs run inside the block, so a test checks the queries a view really sends.
+    """
+
+    @contextmanager
+    def assertQueriesUseIndexes(self, name, allow=()):
+        """Explain the SELECTs run in the block; tables in ``allow`` may be scanned (e.g. small lookups)."""
+        with CaptureQueriesContext(connection) as captured:
+            yield captured
+        selects = [query['sql'] for query in captured if query['sql'].lstrip().upper().startswith('SELECT')]
+        self.assertTrue(selects, f"{name} ran no queries")
+        for sql in selects:
+            plan = sql_plan(sql)
+            scans = [table for table in sequential_scans(plan) if table not in allow]
+            self.assertFalse(scans, f"{name} scans {', '.join(scans)}:\n" + '\n'.join(plan) + f"\n\n{sql}")
@@ -0,0 +1,86 @@
+import logging
+import posixpath
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+
+VARIANT_WIDTHS = (320, 640, 1280)
+VARIANT_DIR = 'variants'
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def image_fields():
+    """Every (model, image field) that gets variants; each has a ``<field>_variants`` JSONField."""
+    from core.models import Testimonial
+    from events.models import Event, Speaker
+    from users.models import CustomUser
+
+    return [
+        (Event, 'image'),
+        (Speaker, 'avatar'),
+        (CustomUser, 'profile_image'),
+        (CustomUser, 'cover_image'),
+        (Testimonial, 'image'),
+    ]
+
+
+def _variant_name(name, width, ext):
+    stem = posixpath.splitext(name)[0]
+    return posixpath.join(VARIANT_DIR, f'{stem}_{width}.{ext}')
+
+
+def generate_variants(name, storage=default_storage):
+    """Write fixed-width WebP and JPEG copies of the stored image ``name``.
+
+    Returns ``{'source': name, 'widths': {width: {'webp': path, 'jpeg': path}}}``.
+    Only widths smaller than the original are made; an image narrower than
+    every width gets a single variant at its own width.
+    """
+    with storage.open(name, 'rb') as f:
+        original = ImageOps.exif_transpose(Image.open(f))
+        original.load()
+
+    if original.mode not in ('RGB', 'L'):
+        original = original.convert('RGB')
+
+    widths = [w for w in VARIANT_WIDTHS if w < original.width] or [original.width]
+    variants = {}
+    for width in widths:
+        height = round(original.height * width / original.width)
+        resized = original.resize((width, height), Image.LANCZOS)
+        variants[str(width)] = {}
+        for ext, (fmt, options) in FORMATS.items():
+            buffer = BytesIO()
+            resized.save(buffer, fmt, **options)
+            path = _variant_name(name, width, ext)
+            if storage.exists(path):
+                storage.delete(path)
+            variants[str(width)][ext] = storage.save(path, ContentFile(buffer.getvalue()))
+
+    return {'source': name, 'widths': variants}
+
+
+def refresh_variants(instance, field):
+    """Regenerate ``field``'s variants if its file changed; saves only the variants column."""
+    file = getattr(instance, field)
+    variants_field = f'{field}_variants'
+    current = getattr(instance, variants_field) or {}
+    if not file or current.get('source') == file.name:
+        return
+
+    try:
+        variants = generate_variants(file.name, file.storage)
+    except (OSError, ValueError) as e:
+        logger.warning("Could not make variants of %s: %s", file.name, e)
+        return
+
+    setattr(instance, variants_field, variants)
+    type(instance).objects.filter(pk=instance.pk).update(**{variants_field: variants})
@@ -0,0 +1,92 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import QueuedEmail
+
+logger = logging.getLogger(__name__)
+
+
+MAX_ATTEMPTS = 6
+BACKOFF_BASE = 60  # seconds, doubled after every failed attempt
+
+BACKENDS = {
+    'smtp': 'django.core.mail.backends.smtp.EmailBackend',
+    'console': 'django.core.mail.backends.console.EmailBackend',
+    'file': 'django.core.mail.backends.filebased.EmailBackend',
+}
+
+
+def queue_mail(subject, message, from_email, recipient_list, html_message=None):
+    """Drop-in for ``send_mail`` that stores the message for the ``send_queued_mail`` worker."""
+    return QueuedEmail.objects.create(
+        subject=subject,
+        body=message,
+        html_body=html_message or '',
+        from_email=from_email or '',
+        to=list(recipient_list),
+    )
+
+
+def _backoff(attempts):
+    return timedelta(seconds=BACKOFF_BASE * 2 ** (attempts - 1))
+
+
+def send_queued_batch(batch_size=50, backend=None):
+    """Send up to ``batch_size`` due messages over one connection.
+
+    Returns ``(sent, failed)``. A failed message is retried with exponential
+    backoff and marked dead after ``MAX_ATTEMPTS``.
+    """
+    with transaction.atomic():
+        # skip_locked lets several workers drain the outbox without sending twice
+        batch = list(
+            QueuedEmail.objects.select_for_update(skip_locked=True)
+            .filter(status='pending', next_attempt_at__lte=timezone.now())
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if not batch:
+            return 0, 0
+
+        sent = failed = 0
+        connection = get_connection(backend=BACKENDS.get(backend, backend))
+        try:
+            connection.open()
+            for email in batch:
+                message = EmailMultiAlternatives(
+                    email.subject,
+                    email.body,
+                    email.from_email or settings.DEFAULT_FROM_EMAIL,
+                    email.to,
+                    connection=connection,
+                )
+                if email.html_body:
+                    message.attach_alternative(email.html_body, 'text/html')
+
+                email.attempts += 1
+                try:
+                    message.send()
+                except Exception as e:
+                    logger.warning("Sending email %s failed: %s", email.id, e)
+                    failed += 1
+                    email.last_error = str(e)
+                    if email.attempts >= MAX_ATTEMPTS:
+                        email.status = 'dead'
+                    else:
+                        email.next_attempt_at = timezone.now() + _backoff(email.attempts)
+                else:
+                    sent += 1
+                    email.status = 'sent'
+                    email.sent_at = timezone.now()
+                    email.last_error = ''
+        finally:
+            connection.close()
+
+        QueuedEmail.objects.bulk_update(
+            batch, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at']
+        )
+    return sent, failed
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from core.benchmark import measure_throughput, write_results
+from events.models import Category, Event
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare request throughput of running deployments on the public read pages, e.g.\n"
+        "  gunicorn -w 2 even_management.wsgi -b :8000\n"
+        "  uvicorn --workers 2 even_management.asgi:application --port 8001\n"
+        "  manage.py benchmark_throughput --target wsgi=http://127.0.0.1:8000 --target asgi=http://127.0.0.1:8001"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', action='append', metavar='NAME=URL',
+                            help="Deployment to measure (default: wsgi on :8000, asgi on :8001)")
+        parser.add_argument('--path', action='append', help="Path to request (default: the public read pages)")
+        parser.add_argument('--requests', type=int, default=500, help="Requests per path")
+        parser.add_argument('--concurrency', type=int, default=32, help="Concurrent client connections")
+
+    def default_paths(self):
+        paths = [reverse('home'), reverse('events'), reverse('categories')]
+        event = Event.objects.order_by('id').first()
+        if event:
+            paths.append(reverse('event_detail', args=[event.id]))
+        category = Category.objects.order_by('id').first()
+        if category:
+            paths.append(reverse('category_detail', args=[category.id]))
+        return paths
+
+    def handle(self, *args, **options):
+        targets = options['target'] or ['wsgi=http://127.0.0.1:8000', 'asgi=http://127.0.0.1:8001']
+        try:
+            targets = dict(target.split('=', 1) for target in targets)
+        except ValueError:
+            raise CommandError("--target must look like NAME=URL")
+        paths = options['path'] or self.default_paths()
+
+        results = {}
+        self.stdout.write(f"{'target':<8} {'path':<32} {'req/s':>8} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+        for path in paths:
+            for name, base in targets.items():
+                result = measure_throughput(base.rstrip('/') + path, options['requests'], options['concurrency'])
+                results[f'{name} {path}'] = result
+                self.stdout.write(
+                    f"{name:<8} {path:<32} {result['rps']:>8} {result['p50_ms'] or '-':>9} "
+                    f"{result['p99_ms'] or '-':>9} {result['errors']:>7}"
+                )
+
+        write_results(results, section='throughput')
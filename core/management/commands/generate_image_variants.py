@@ -0,0 +1,53 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.images import generate_variants, image_fields
+
+
+def _generate(name):
+    try:
+        return name, generate_variants(name), None
+    except (OSError, ValueError) as e:
+        return name, None, str(e)
+
+
+class Command(BaseCommand):
+    help = "Backfill responsive image variants for every uploaded image"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: one per CPU)")
+        parser.add_argument('--all', action='store_true', help="Regenerate images that already have variants")
+
+    def handle(self, *args, **options):
+        # One job per distinct file: many rows share the default images
+        jobs = {}
+        for model, field in image_fields():
+            rows = model.objects.exclude(**{field: ''}).values_list(field, f'{field}_variants')
+            for name, variants in rows.iterator():
+                if options['all'] or (variants or {}).get('source') != name:
+                    jobs.setdefault(name, []).append((model, field))
+
+        if not jobs:
+            self.stdout.write("All images already have variants")
+            return
+
+        # Forked workers must not share the parent's database connection; close_old_connections()
+        # would keep a healthy one open
+        connections.close_all()
+        done = failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=django.setup) as pool:
+            futures = [pool.submit(_generate, name) for name in jobs]
+            for future in as_completed(futures):
+                name, variants, error = future.result()
+                if error:
+                    failed += 1
+                    self.stderr.write(f"{name}: {error}")
+                    continue
+                for model, field in set(jobs[name]):
+                    model.objects.filter(**{field: name}).update(**{f'{field}_variants': variants})
+                done += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Generated variants for {done} images, {failed} failed"))
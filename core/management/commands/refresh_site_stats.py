@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from core.stats import refresh_site_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute the SiteStats rollup shown on the home page"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Recompute every figure even if nothing changed")
+
+    def handle(self, *args, **options):
+        stats, dirty = refresh_site_stats(force=options['force'])
+        if dirty:
+            self.stdout.write(self.style.SUCCESS(f"Recomputed {', '.join(dirty)}"))
+        else:
+            self.stdout.write("Site stats already up to date")
+        self.stdout.write(
+            f"events={stats.events_count} users={stats.users_count} cities={stats.cities_count}"
+        )
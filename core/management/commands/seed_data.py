@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.seed import seed
+
+
+class Command(BaseCommand):
+    help = "Fill the database with a deterministic, scalable set of fake users, events and activity"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, default=1, help="Multiplier for the number of rows (1 = 50 events, 1000 RSVPs)")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed; different seeds can be loaded side by side")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            created = seed(scale=options['scale'], seed=options['seed'])
+        for model, count in created.items():
+            self.stdout.write(f"{model}: {count}")
@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.utils import timezone
+
+from core.mail import BACKENDS, send_queued_batch
+from core.models import QueuedEmail
+
+
+class Command(BaseCommand):
+    help = "Send the emails waiting in the outbox"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument(
+            '--backend',
+            help=f"Email backend to use: {', '.join(BACKENDS)} or a dotted path (default: EMAIL_BACKEND)",
+        )
+        parser.add_argument('--loop', action='store_true', help="Keep polling the outbox instead of exiting when it is empty")
+        parser.add_argument('--interval', type=float, default=5.0, help="Seconds to sleep between polls with --loop")
+        parser.add_argument('--requeue-dead', action='store_true', help="Give dead messages another round of attempts first")
+
+    def handle(self, *args, **options):
+        if options['requeue_dead']:
+            requeued = QueuedEmail.objects.filter(status='dead').update(
+                status='pending', attempts=0, next_attempt_at=timezone.now()
+            )
+            self.stdout.write(f"Requeued {requeued} dead messages")
+
+        while True:
+            try:
+                sent, failed = send_queued_batch(options['batch_size'], options['backend'])
+            except Exception as e:
+                # Usually the mail server being unreachable; nothing was marked, try again later
+                if not options['loop']:
+                    raise CommandError(f"Could not send batch: {e}")
+                self.stderr.write(f"Could not send batch: {e}")
+                sent = failed = 0
+            finally:
+                close_old_connections()
+
+            if sent or failed:
+                self.stdout.write(f"Sent {sent}, failed {failed}")
+            elif not options['loop']:
+                break
+            else:
+                time.sleep(options['interval'])
@@ -0,0 +1,165 @@
+import contextvars
+import math
+import threading
+import time
+from collections import defaultdict, deque
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.backends.django import Template as DjangoTemplate
+
+
+# Timings of the request being handled in this context, None outside requests
+_current = contextvars.ContextVar('request_timing', default=None)
+
+WINDOW = 500  # most recent requests kept per URL name
+_samples = defaultdict(lambda: deque(maxlen=WINDOW))
+_samples_lock = threading.Lock()
+
+
+class RequestTimings:
+    __slots__ = ('queries', 'db_time', 'template_time')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+
+
+def _record_query(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.db_time += time.perf_counter() - start
+        timings.queries += 1
+
+
+def _install_query_wrapper(sender, connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+connection_created.connect(_install_query_wrapper)
+
+
+_original_render = DjangoTemplate.render
+
+
+def _timed_render(self, context=None, request=None):
+    timings = _current.get()
+    if timings is None:
+        return _original_render(self, context, request)
+    start = time.perf_counter()
+    try:
+        return _original_render(self, context, request)
+    finally:
+        timings.template_time += time.perf_counter() - start
+
+
+# Only top-level renders go through the backend Template, so includes aren't counted twice
+DjangoTemplate.render = _timed_render
+
+
+def _percentile(ordered, pct):
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def timing_summary():
+    """p50/p90/p99 of total time (ms) and average query count per URL name, over the last WINDOW requests."""
+    with _samples_lock:
+        snapshot = {name: list(samples) for name, samples in _samples.items()}
+
+    summary = {}
+    for name, samples in snapshot.items():
+        totals = sorted(total for total, _, _ in samples)
+        summary[name] = {
+            'count': len(samples),
+            'p50_ms': round(_percentile(totals, 50), 2),
+            'p90_ms': round(_percentile(totals, 90), 2),
+            'p99_ms': round(_percentile(totals, 99), 2),
+            'avg_db_ms': round(sum(db for _, db, _ in samples) / len(samples), 2),
+            'avg_queries': round(sum(queries for _, _, queries in samples) / len(samples), 2),
+        }
+    return summary
+
+
+def _is_staff(user):
+    # Query counts and durations say too much about the backend to hand to anyone
+    return user is not None and user.is_staff
+
+
+class RequestTimingMiddleware:
+    """Adds a Server-Timing header (db, template, total) and keeps rolling per-view timings.
+
+    Queries are timed by an execute wrapper installed on every new database
+    connection, and templates by wrapping the template backend's render. Both
+    are no-ops outside a request, so the cost is a few clock reads per query.
+    The header only goes to staff, or to everyone with DEBUG on; it is merged
+    with any Server-Timing set further in (e.g. by the debug toolbar), so this
+    middleware goes first in MIDDLEWARE.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        # Connections opened before this module was imported missed connection_created
+        for connection in connections.all(initialized_only=True):
+            _install_query_wrapper(None, connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        show = settings.DEBUG or _is_staff(getattr(request, 'user', None))
+        return self.finish(request, response, timings, start, show)
+
+    async def __acall__(self, request):
+        # sync_to_async copies the context, so queries run in worker threads still land in ``timings``
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        # request.auser is set by AuthenticationMiddleware, unless a middleware before it answered
+        auser = getattr(request, 'auser', None)
+        show = settings.DEBUG or _is_staff(await auser() if auser else None)
+        return self.finish(request, response, timings, start, show)
+
+    def finish(self, request, response, timings, start, show):
+        total = (time.perf_counter() - start) * 1000
+        db = timings.db_time * 1000
+        template = timings.template_time * 1000
+
+        if show:
+            server_timing = (
+                f'db;dur={db:.1f};desc="{timings.queries} queries", '
+                f'tpl;dur={template:.1f}, '
+                f'app;dur={total:.1f}'
+            )
+            if response.has_header('Server-Timing'):
+                server_timing = f"{response['Server-Timing']}, {server_timing}"
+            response['Server-Timing'] = server_timing
+
+        match = getattr(request, 'resolver_match', None)
+        if match is not None and match.view_name:
+            with _samples_lock:
+                _samples[match.view_name].append((total, db, timings.queries))
+        return response
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='sitestats',
+            options={'verbose_name_plural': 'Site stats'},
+        ),
+        migrations.AddField(
+            model_name='sitestats',
+            name='cities_computed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='sitestats',
+            name='events_computed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='sitestats',
+            name='participants_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='sitestats',
+            name='users_computed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
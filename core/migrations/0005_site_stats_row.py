@@ -0,0 +1,34 @@
+from django.db import migrations
+
+
+def seed_site_stats(apps, schema_editor):
+    """Keep a single SiteStats row at pk 1, filled in, so the home page never shows a blank one."""
+    SiteStats = apps.get_model('core', 'SiteStats')
+    Event = apps.get_model('events', 'Event')
+    EventParticipant = apps.get_model('events', 'EventParticipant')
+
+    # Refresher threads racing on an empty table could each insert a row
+    stats = SiteStats.objects.order_by('pk').first()
+    SiteStats.objects.exclude(pk=1).delete()
+    if stats is None:
+        stats = SiteStats(
+            satisfaction_rate=98,
+            events_count=Event.objects.count(),
+            cities_count=Event.objects.values('location').distinct().count(),
+            participants_count=EventParticipant.objects.count(),
+            users_count=EventParticipant.objects.values('user').distinct().count(),
+        )
+    stats.pk = 1
+    stats.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_testimonial_image_variants'),
+        ('events', '0016_event_tags'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_site_stats, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 # Create your models here.
 
@@ -15,6 +16,7 @@ class Testimonial(models.Model):
     company = models.CharField(max_length=100)
 
     image = models.ImageField(upload_to='testimonials/')
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)  # filled by core.images
     content = models.TextField()
     rating = models.IntegerField(default=5)
 
@@ -25,4 +27,43 @@ class SiteStats(models.Model):
     events_count = models.IntegerField(default=0)
     users_count = models.IntegerField(default=0)
     cities_count = models.IntegerField(default=0)
-    satisfaction_rate = models.IntegerField(default=0)
\ No newline at end of file
+    satisfaction_rate = models.IntegerField(default=0)
+
+    # Bookkeeping for core.stats.refresh_site_stats
+    participants_count = models.IntegerField(default=0)
+    events_computed_at = models.DateTimeField(blank=True, null=True)
+    users_computed_at = models.DateTimeField(blank=True, null=True)
+    cities_computed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        verbose_name_plural = "Site stats"
+
+class QueuedEmail(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('dead', 'Dead'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=255, blank=True)
+    to = models.JSONField(default=list)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='core_email_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
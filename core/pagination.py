@@ -0,0 +1,236 @@
+import base64
+import binascii
+import datetime
+import decimal
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from django.shortcuts import render
+
+
+def encode_cursor(values):
+    data = []
+    for value in values:
+        if isinstance(value, (datetime.date, datetime.datetime, datetime.time)):
+            value = value.isoformat()
+        elif isinstance(value, decimal.Decimal):
+            value = str(value)
+        data.append(value)
+    raw = json.dumps(data, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    """Return the list of seek values in ``cursor``, or None if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, binascii.Error):
+        return None
+    if not isinstance(values, list) or len(values) != size:
+        return None
+    return values
+
+
+def _ordering_field(queryset, name):
+    """The model field (or annotation output field) an ordering key like ``event__date`` or ``rank`` sorts on."""
+    annotation = queryset.query.annotations.get(name)
+    if annotation is not None:
+        return annotation.output_field
+    model, field = queryset.model, None
+    for part in name.split('__'):
+        field = model._meta.get_field(part)
+        model = field.related_model
+    return field
+
+
+def _cursor_values(queryset, ordering, cursor):
+    """The seek values of ``cursor`` converted to the ordering fields' types, or None if any doesn't fit."""
+    values = decode_cursor(cursor, len(ordering)) if cursor else None
+    if values is None:
+        return None
+    try:
+        cleaned = [
+            _ordering_field(queryset, field.lstrip('-')).to_python(value)
+            for field, value in zip(ordering, values)
+        ]
+    except (FieldDoesNotExist, ValidationError, TypeError, ValueError):
+        return None
+    # The seek filter can't compare with NULL, and no row's key contains one
+    return None if None in cleaned else cleaned
+
+
+class CursorPage:
+    def __init__(self, object_list, ordering, request, has_next, has_previous):
+        self.object_list = object_list
+        self.ordering = ordering
+        self.request = request
+        self.has_next = has_next
+        self.has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def _key(self, obj):
+        values = []
+        for field in self.ordering:
+            if isinstance(obj, dict):  # rows of a values() queryset
+                values.append(obj[field.lstrip('-')])
+                continue
+            value = obj
+            for part in field.lstrip('-').split('__'):
+                value = getattr(value, part)
+            values.append(value)
+        return values
+
+    @property
+    def next_cursor(self):
+        if self.has_next and self.object_list:
+            return encode_cursor(self._key(self.object_list[-1]))
+        return None
+
+    @property
+    def prev_cursor(self):
+        if self.has_previous and self.object_list:
+            return encode_cursor(self._key(self.object_list[0]))
+        return None
+
+    def _url(self, **params):
+        query = self.request.GET.copy()
+        for key in ('after', 'before', 'partial'):
+            query.pop(key, None)
+        query.update(params)
+        return '?' + query.urlencode()
+
+    @property
+    def next_url(self):
+        cursor = self.next_cursor
+        return self._url(after=cursor) if cursor else None
+
+    @property
+    def prev_url(self):
+        cursor = self.prev_cursor
+        return self._url(before=cursor) if cursor else None
+
+    @property
+    def load_more_url(self):
+        cursor = self.next_cursor
+        return self._url(after=cursor, partial='1') if cursor else None
+
+
+def _seek_filter(ordering, values, forward):
+    """Build ``(a, b, c) > (x, y, z)`` as nested Q objects, honouring per-key direction."""
+    condition = Q()
+    for i, field in enumerate(ordering):
+        name = field.lstrip('-')
+        descending = field.startswith('-')
+        lookup = 'lt' if descending == forward else 'gt'
+        term = Q(**{f'{name}__{lookup}': values[i]})
+        for prev_field, prev_value in zip(ordering[:i], values[:i]):
+            term &= Q(**{prev_field.lstrip('-'): prev_value})
+        condition |= term
+    return condition
+
+
+def _reverse(field):
+    return field[1:] if field.startswith('-') else '-' + field
+
+
+def _page_query(request, queryset, ordering, per_page):
+    """The single query behind a page, and a function turning its rows into the ``CursorPage``."""
+    after = request.GET.get('after')
+    before = request.GET.get('before')
+
+    if before:
+        values = _cursor_values(queryset, ordering, before)
+        if values is not None:
+            query = (
+                queryset.filter(_seek_filter(ordering, values, forward=False))
+                .order_by(*[_reverse(f) for f in ordering])[:per_page + 1]
+            )
+
+            def backward_page(rows):
+                has_previous = len(rows) > per_page
+                rows = rows[:per_page][::-1]
+                return CursorPage(rows, ordering, request, has_next=True, has_previous=has_previous)
+            return query, backward_page
+
+    values = _cursor_values(queryset, ordering, after)
+    if values is not None:
+        queryset = queryset.filter(_seek_filter(ordering, values, forward=True))
+
+    def forward_page(rows):
+        has_next = len(rows) > per_page
+        return CursorPage(rows[:per_page], ordering, request, has_next=has_next, has_previous=values is not None)
+    return queryset.order_by(*ordering)[:per_page + 1], forward_page
+
+
+def paginate(request, queryset, ordering, per_page=12):
+    """Keyset-paginate ``queryset`` using the ``after``/``before`` cursors in the request.
+
+    ``ordering`` must end with a unique field (normally ``id``) so every row
+    has a distinct seek key. Each page is a single indexed range scan of
+    ``per_page + 1`` rows, however deep the user goes.
+    """
+    query, make_page = _page_query(request, queryset, list(ordering), per_page)
+    return make_page(list(query))
+
+
+async def apaginate(request, queryset, ordering, per_page=12):
+    """``paginate`` for async views."""
+    query, make_page = _page_query(request, queryset, list(ordering), per_page)
+    return make_page([row async for row in query])
+
+
+def is_partial(request):
+    return request.GET.get('partial') == '1'
+
+
+def render_page(request, template_name, partial_template_name, context):
+    """Render the full page, or only the rows when "load more" asks for them.
+
+    The URL of the following fragment travels in the ``X-Load-More`` header so
+    the rows template doesn't need to know about pagination at all.
+    """
+    if is_partial(request):
+        response = render(request, partial_template_name, context)
+        response['X-Load-More'] = context['page'].load_more_url or ''
+        return response
+    return render(request, template_name, context)
+
+
+# Rendered in the request's sync thread, like core.shortcuts.arender
+arender_page = sync_to_async(render_page)
+
+
+class CursorPaginationMixin:
+    """Keyset pagination for ListViews.
+
+    Renders ``partial_template_name`` instead of the full page when the
+    request asks for a "load more" fragment.
+    """
+    cursor_ordering = ('-id',)
+    cursor_per_page = 20
+    partial_template_name = None
+
+    def get_context_data(self, **kwargs):
+        page = paginate(self.request, self.object_list, self.cursor_ordering, self.cursor_per_page)
+        context = super().get_context_data(object_list=page.object_list, **kwargs)
+        context['page'] = page
+        return context
+
+    def get_template_names(self):
+        if self.partial_template_name and is_partial(self.request):
+            return [self.partial_template_name]
+        return super().get_template_names()
+
+    def render_to_response(self, context, **response_kwargs):
+        response = super().render_to_response(context, **response_kwargs)
+        if is_partial(self.request):
+            response['X-Load-More'] = context['page'].load_more_url or ''
+        return response
@@ -0,0 +1,177 @@
+import datetime
+import random
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.utils import timezone
+
+from core.models import SiteStats, Testimonial
+from core.stats import DEFAULT_SATISFACTION_RATE, SITE_STATS_PK
+from events.counters import reconcile
+from events.tags import sync_event_tags
+from events.models import (
+    Category, Event, EventParticipant, Notification, SavedEvent, Schedule, Speaker, UserActivity,
+)
+
+User = get_user_model()
+
+
+CATEGORIES = ['Technology', 'Business', 'Design', 'Entertainment', 'Wellness', 'Education', 'Sports', 'Food & Drink']
+CITIES = ['Dhaka', 'Chittagong', 'Sylhet', 'Khulna', 'Rajshahi', 'Barisal', 'Rangpur', 'Online']
+WORDS = [
+    'summit', 'workshop', 'meetup', 'conference', 'festival', 'bootcamp', 'hackathon', 'expo',
+    'python', 'design', 'startup', 'music', 'yoga', 'cloud', 'data', 'marketing', 'food', 'cricket',
+]
+
+# Rows per unit of scale
+PER_SCALE = {
+    'users': 200,
+    'events': 50,
+    'participants': 1000,
+    'saved': 400,
+    'notifications': 2000,
+    'activities': 2000,
+}
+SPEAKERS_PER_EVENT = 3
+SCHEDULES_PER_EVENT = 4
+BATCH_SIZE = 1000
+
+
+def _title(rng):
+    return ' '.join(rng.choice(WORDS).title() for _ in range(3))
+
+
+def _pairs(rng, users, events, count):
+    """``count`` distinct (user, event) pairs, for the unique_together tables."""
+    count = min(count, len(users) * len(events))
+    pairs = set()
+    while len(pairs) < count:
+        pairs.add((rng.randrange(len(users)), rng.randrange(len(events))))
+    return sorted(pairs)
+
+
+def seed(scale=1, seed=0):
+    """Bulk-create a deterministic data set: the same ``scale`` and ``seed`` always give the same rows.
+
+    Returns the number of rows created per model. Users get the password
+    ``password`` and belong to the "User" group; the first one is an Admin.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    today = now.date()
+    sizes = {name: count * scale for name, count in PER_SCALE.items()}
+
+    password = make_password('password')
+    users = User.objects.bulk_create([
+        User(
+            username=f'seed-user-{seed}-{i}',
+            email=f'seed-user-{seed}-{i}@example.com',
+            first_name=rng.choice(WORDS).title(),
+            password=password,
+            date_joined=now - datetime.timedelta(days=rng.randrange(1000)),
+        )
+        for i in range(sizes['users'])
+    ], batch_size=BATCH_SIZE)
+    user_group, _ = Group.objects.get_or_create(name='User')
+    admin_group, _ = Group.objects.get_or_create(name='Admin')
+    User.groups.through.objects.bulk_create([
+        User.groups.through(customuser_id=user.id, group_id=user_group.id) for user in users
+    ] + [User.groups.through(customuser_id=users[0].id, group_id=admin_group.id)], batch_size=BATCH_SIZE)
+
+    categories = []
+    for name in CATEGORIES:
+        slug = name.lower().replace(' & ', '-').replace(' ', '-')
+        category, _ = Category.objects.get_or_create(slug=slug, defaults={'name': name})
+        categories.append(category)
+
+    events = []
+    for i in range(sizes['events']):
+        city = rng.choice(CITIES)
+        events.append(Event(
+            title=_title(rng),
+            slug=f'seed-event-{seed}-{i}',
+            category=rng.choice(categories),
+            organizer=rng.choice(users),
+            description=' '.join(rng.choice(WORDS) for _ in range(30)),
+            about=' '.join(rng.choice(WORDS) for _ in range(60)),
+            date=today + datetime.timedelta(days=rng.randrange(-180, 365)),
+            time=datetime.time(rng.randrange(8, 21), rng.choice([0, 30])),
+            location=city,
+            is_virtual=city == 'Online',
+            tags=rng.sample(WORDS, 3),
+            capacity=rng.choice([50, 100, 250, 1000]),
+            price=Decimal(rng.choice([0, 0, 10, 25, 99])),
+            is_featured=rng.random() < 0.1,
+        ))
+    events = Event.objects.bulk_create(events, batch_size=BATCH_SIZE)
+    sync_event_tags(events)
+
+    speakers = Speaker.objects.bulk_create([
+        Speaker(event=event, name=rng.choice(WORDS).title(), role='Speaker', order=order)
+        for event in events for order in range(SPEAKERS_PER_EVENT)
+    ], batch_size=BATCH_SIZE)
+    schedules = Schedule.objects.bulk_create([
+        Schedule(event=event, time=f'{9 + order}:00', title=_title(rng), day=1, order=order)
+        for event in events for order in range(SCHEDULES_PER_EVENT)
+    ], batch_size=BATCH_SIZE)
+
+    participants = [
+        EventParticipant(
+            user=users[u],
+            event=events[e],
+            status=rng.choice(['going', 'going', 'going', 'interested', 'attended']),
+        )
+        for u, e in _pairs(rng, users, events, sizes['participants'])
+    ]
+    participants = EventParticipant.objects.bulk_create(participants, batch_size=BATCH_SIZE)
+
+    # bulk_create skips the signals that keep the counters, so count everything at once
+    reconcile()
+
+    saved = SavedEvent.objects.bulk_create([
+        SavedEvent(user=users[u], event=events[e])
+        for u, e in _pairs(rng, users, events, sizes['saved'])
+    ], batch_size=BATCH_SIZE)
+
+    notifications = Notification.objects.bulk_create([
+        Notification(
+            user=rng.choice(users),
+            event=rng.choice(events),
+            notification_type=rng.choice(['event_reminder', 'rsvp_confirmation', 'event_update']),
+            title=_title(rng),
+            message=' '.join(rng.choice(WORDS) for _ in range(12)),
+            is_read=rng.random() < 0.7,
+        )
+        for _ in range(sizes['notifications'])
+    ], batch_size=BATCH_SIZE)
+
+    activities = UserActivity.objects.bulk_create([
+        UserActivity(
+            user=rng.choice(users),
+            event=rng.choice(events),
+            activity_type=rng.choice(['rsvp', 'save', 'attend', 'cancel']),
+        )
+        for _ in range(sizes['activities'])
+    ], batch_size=BATCH_SIZE)
+
+    testimonials = Testimonial.objects.bulk_create([
+        Testimonial(name=rng.choice(WORDS).title(), role='Attendee', company='Eventify',
+                    image='testimonials/default.jpg', content=_title(rng))
+        for _ in range(3)
+    ])
+    SiteStats.objects.get_or_create(pk=SITE_STATS_PK, defaults={'satisfaction_rate': DEFAULT_SATISFACTION_RATE})
+
+    return {
+        'users': len(users),
+        'categories': len(categories),
+        'events': len(events),
+        'speakers': len(speakers),
+        'schedules': len(schedules),
+        'participants': len(participants),
+        'saved_events': len(saved),
+        'notifications': len(notifications),
+        'activities': len(activities),
+        'testimonials': len(testimonials),
+    }
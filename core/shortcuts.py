@@ -0,0 +1,22 @@
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.shortcuts import render
+from django.template.loader import render_to_string
+
+
+# Templates may still touch lazy relations and context processors query the
+# database, so async views render in the request's sync thread
+arender = sync_to_async(render)
+arender_to_string = sync_to_async(render_to_string)
+
+
+def streaming_response(request, content, acontent, **kwargs):
+    """A ``StreamingHttpResponse`` that really streams under both WSGI and ASGI.
+
+    ``content`` and ``acontent`` are the same body as a sync and an async
+    iterator. Django reads a sync iterator into memory before sending it over
+    ASGI (and an async one under WSGI), so only the one that fits the server
+    is used.
+    """
+    return StreamingHttpResponse(acontent if isinstance(request, ASGIRequest) else content, **kwargs)
@@ -0,0 +1,47 @@
+from django.db.models.signals import post_save, post_delete, pre_save
+from events.models import Event, Category, EventParticipant
+from core.models import Testimonial, SiteStats
+from core.cache import invalidate_sections
+from core.images import image_fields, refresh_variants
+
+
+# Which cached home page sections each model feeds
+SECTION_DEPENDENCIES = {
+    Event: ('featured', 'categories', 'stats', 'related_events', 'tags'),
+    Category: ('featured', 'categories'),
+    EventParticipant: ('featured', 'stats'),
+    Testimonial: ('testimonials',),
+    SiteStats: ('stats',),
+}
+
+
+def invalidate_home_sections(sender, **kwargs):
+    invalidate_sections(*SECTION_DEPENDENCIES[sender])
+
+
+for model in SECTION_DEPENDENCIES:
+    post_save.connect(invalidate_home_sections, sender=model)
+    post_delete.connect(invalidate_home_sections, sender=model)
+
+
+IMAGE_FIELDS = {}
+for model, field in image_fields():
+    IMAGE_FIELDS.setdefault(model, []).append(field)
+
+
+def note_uploaded_images(sender, instance, **kwargs):
+    # An uncommitted file is a fresh upload; defaults and untouched images are left to generate_image_variants
+    instance._uploaded_image_fields = [
+        field for field in IMAGE_FIELDS[sender]
+        if getattr(instance, field) and not getattr(instance, field)._committed
+    ]
+
+
+def make_image_variants(sender, instance, **kwargs):
+    for field in getattr(instance, '_uploaded_image_fields', ()):
+        refresh_variants(instance, field)
+
+
+for model in IMAGE_FIELDS:
+    pre_save.connect(note_uploaded_images, sender=model)
+    post_save.connect(make_image_variants, sender=model)
@@ -0,0 +1,103 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.utils import timezone
+
+from events.models import Event, EventParticipant
+from core.models import SiteStats
+
+logger = logging.getLogger(__name__)
+
+# The one SiteStats row, created by core's 0005 migration
+SITE_STATS_PK = 1
+DEFAULT_SATISFACTION_RATE = 98
+
+REFRESH_LOCK_KEY = 'site-stats:refresh'
+
+
+def _changed_since(queryset, computed_at):
+    return computed_at is None or queryset.filter(updated_at__gte=computed_at).exists()
+
+
+def refresh_site_stats(force=False):
+    """Bring the SiteStats rollup row up to date.
+
+    A figure is only recomputed when its source rows were updated after it was
+    last computed (an indexed ``updated_at`` lookup), or when the row count
+    moved (which catches deletes). The expensive distinct counts therefore run
+    only when something changed, and then in full.
+
+    Returns ``(stats, dirty)``, ``dirty`` listing the figures recomputed.
+    """
+    # get_or_create, so refreshers in several workers never insert a row each
+    stats, _ = SiteStats.objects.get_or_create(
+        pk=SITE_STATS_PK, defaults={'satisfaction_rate': DEFAULT_SATISFACTION_RATE}
+    )
+    started = timezone.now()
+    dirty = []
+
+    event_total = Event.objects.count()
+    events_changed = force or event_total != stats.events_count or _changed_since(Event.objects, stats.events_computed_at)
+    if events_changed:
+        stats.events_count = event_total
+        stats.events_computed_at = started
+        stats.cities_count = Event.objects.values('location').distinct().count()
+        stats.cities_computed_at = started
+        dirty += ['events', 'cities']
+
+    participant_total = EventParticipant.objects.count()
+    if (
+        force
+        or participant_total != stats.participants_count
+        or _changed_since(EventParticipant.objects, stats.users_computed_at)
+    ):
+        stats.participants_count = participant_total
+        stats.users_count = EventParticipant.objects.values('user').distinct().count()
+        stats.users_computed_at = started
+        dirty.append('users')
+
+    if dirty:
+        stats.save()
+    return stats, dirty
+
+
+def refresh_if_due(interval):
+    """``refresh_site_stats`` unless another worker already did within ``interval`` seconds.
+
+    Every worker process runs a refresher; the lock lets one of them do the
+    recount per interval. A per-process cache can't share the lock, so then
+    each worker refreshes on its own (core.W001 warns about that cache).
+    """
+    if not cache.add(REFRESH_LOCK_KEY, 1, interval):
+        return False
+    refresh_site_stats()
+    return True
+
+
+def _refresh_forever(interval):
+    # Refresh at startup too, so a fresh deployment doesn't wait a whole interval
+    while True:
+        try:
+            refresh_if_due(interval)
+        except Exception:
+            logger.exception("Site stats refresh failed")
+        finally:
+            close_old_connections()
+        time.sleep(interval)
+
+
+_refresher = None
+
+
+def start_stats_refresher():
+    """Refresh SiteStats every SITE_STATS_REFRESH_INTERVAL seconds in a daemon thread."""
+    global _refresher
+    interval = getattr(settings, 'SITE_STATS_REFRESH_INTERVAL', 0)
+    if interval <= 0 or _refresher is not None:
+        return
+    _refresher = threading.Thread(target=_refresh_forever, args=(interval,), name='site-stats-refresher', daemon=True)
+    _refresher.start()
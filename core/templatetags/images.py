@@ -0,0 +1,35 @@
+from django import template
+from django.utils.html import format_html
+
+register = template.Library()
+
+
+def _srcset(image, variants, ext):
+    return ', '.join(
+        f'{image.storage.url(paths[ext])} {width}w'
+        for width, paths in sorted(variants.items(), key=lambda item: int(item[0]))
+    )
+
+
+@register.simple_tag
+def responsive_image(image, variants, sizes='100vw', css_class='', alt=''):
+    """``<picture>`` with WebP and JPEG srcsets from core.images variants.
+
+    Falls back to a plain ``<img>`` of the original when no variants exist yet.
+    """
+    if not image:
+        return ''
+    widths = (variants or {}).get('widths')
+    if not widths or (variants or {}).get('source') != image.name:
+        return format_html('<img src="{}" class="{}" alt="{}" loading="lazy">', image.url, css_class, alt)
+
+    largest = max(widths, key=int)
+    return format_html(
+        '<picture style="display: contents">'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" class="{}" alt="{}" loading="lazy">'
+        '</picture>',
+        _srcset(image, widths, 'webp'), sizes,
+        image.storage.url(widths[largest]['jpeg']), _srcset(image, widths, 'jpeg'), sizes,
+        css_class, alt,
+    )
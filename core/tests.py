@@ -1,3 +1,410 @@
-from django.test import TestCase
+import datetime
+import io
+import shutil
+import smtplib
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import CommandError, call_command
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.template.loader import render_to_string
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from core import middleware
+from core.benchmark import ViewBenchmarkMixin
+from core.cache import acached_section, cached_section, section_key
+from core.checks import check_shared_cache
+from core.explain import QueryPlanMixin
+from core.images import generate_variants
+from core.mail import BACKOFF_BASE, MAX_ATTEMPTS, queue_mail, send_queued_batch
+from core.middleware import RequestTimingMiddleware, timing_summary
+from core.models import QueuedEmail, SiteStats, Testimonial
+from core.pagination import encode_cursor
+from core.stats import REFRESH_LOCK_KEY, SITE_STATS_PK, _changed_since, refresh_if_due, refresh_site_stats
+from events.models import Category, Event, EventParticipant
+
+User = get_user_model()
+
+
+class HomeBenchmarkTest(ViewBenchmarkMixin, TestCase):
+    def test_home(self):
+        self.benchmark('home', reverse('home'), max_queries=4)
+
+
+class SiteStatsTest(QueryPlanMixin, TestCase):
+    def test_home_shows_the_migrated_row_before_any_refresh(self):
+        stats = self.client.get(reverse('home')).context['stats']
+        self.assertEqual((stats.pk, stats.satisfaction_rate), (SITE_STATS_PK, 98))
+
+    def test_refreshes_keep_a_single_row(self):
+        Event.objects.create(
+            title='Launch', slug='launch', category=Category.objects.create(name='Tech', slug='tech'),
+            organizer=User.objects.create(username='organizer'), description='Launch',
+            date=datetime.date(2030, 1, 1), time=datetime.time(18, 0), location='Dhaka',
+        )
+        self.assertEqual(refresh_site_stats()[1], ['events', 'cities', 'users'])  # never computed before
+        self.assertEqual(refresh_site_stats()[1], [])
+
+        SiteStats.objects.all().delete()
+        refresh_site_stats()
+        refresh_site_stats(force=True)
+        self.assertEqual(list(SiteStats.objects.values_list('pk', 'events_count', 'satisfaction_rate')), [
+            (SITE_STATS_PK, 1, 98),
+        ])
+
+
+    def test_one_worker_refreshes_per_interval(self):
+        cache.delete(REFRESH_LOCK_KEY)
+        with mock.patch('core.stats.refresh_site_stats') as refresh:
+            self.assertTrue(refresh_if_due(300))
+            self.assertFalse(refresh_if_due(300))  # another worker, same interval
+            cache.delete(REFRESH_LOCK_KEY)  # the interval is over
+            self.assertTrue(refresh_if_due(300))
+        self.assertEqual(refresh.call_count, 2)
+
+    def test_change_checks_use_indexes(self):
+        for model in (Event, EventParticipant):
+            with self.assertQueriesUseIndexes(f'{model.__name__} changes'):
+                _changed_since(model.objects, timezone.now())
+
+
+class CachedSectionTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.builds = []
+
+    def build(self, value='fresh'):
+        self.builds.append(value)
+        return value
+
+    async def abuild(self):
+        return self.build()
+
+    def test_builds_once_then_serves_the_cache(self):
+        self.assertEqual(cached_section('featured', self.build), 'fresh')
+        self.assertEqual(cached_section('featured', lambda: self.build('again')), 'fresh')
+        self.assertEqual(self.builds, ['fresh'])
+        self.assertIsNone(cache.get(section_key('featured') + ':lock'))
+
+    def test_waits_for_the_worker_holding_the_lock(self):
+        cache.add(section_key('featured') + ':lock', 1)
+
+        def finish(seconds):
+            # The lock holder finishes while we poll
+            cache.set(section_key('featured'), 'built elsewhere')
+
+        async def afinish(seconds):
+            finish(seconds)
+
+        with mock.patch('core.cache.time.sleep', side_effect=finish):
+            self.assertEqual(cached_section('featured', self.build), 'built elsewhere')
+        cache.delete(section_key('featured'))
+        with mock.patch('core.cache.asyncio.sleep', side_effect=afinish):
+            self.assertEqual(async_to_sync(acached_section)('featured', self.abuild), 'built elsewhere')
+        self.assertEqual(self.builds, [])
+
+    def test_builds_without_caching_when_the_lock_holder_is_too_slow(self):
+        cache.add(section_key('featured') + ':lock', 1)
+        with mock.patch('core.cache.LOCK_WAIT', 0.01):
+            self.assertEqual(cached_section('featured', self.build), 'fresh')
+            self.assertEqual(async_to_sync(acached_section)('featured', self.abuild), 'fresh')
+        self.assertEqual(self.builds, ['fresh', 'fresh'])
+        self.assertIsNone(cache.get(section_key('featured')))
+
+    def test_lock_is_released_when_the_build_fails(self):
+        def fail():
+            raise RuntimeError('database down')
+        with self.assertRaises(RuntimeError):
+            cached_section('featured', fail)
+        self.assertEqual(cached_section('featured', self.build), 'fresh')
+
+    def test_writes_drop_their_sections_when_they_commit(self):
+        for name in ('featured', 'categories', 'testimonials'):
+            cached_section(name, self.build)
+        with self.captureOnCommitCallbacks() as callbacks:
+            Category.objects.create(name='Tech', slug='tech')
+            # Still in the writer's transaction: rebuilding now would cache uncommitted rows
+            self.assertEqual(cache.get(section_key('categories')), 'fresh')
+        for callback in callbacks:
+            callback()
+        self.assertEqual(cache.get_many([section_key('featured'), section_key('categories')]), {})
+        self.assertEqual(cache.get(section_key('testimonials')), 'fresh')
+
+
+class RequestTimingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(middleware, '_samples', middleware.defaultdict(middleware.deque))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_header_goes_to_staff_only(self):
+        self.assertNotIn('Server-Timing', self.client.get(reverse('home')))
+
+        self.client.force_login(User.objects.create(username='staff', is_staff=True))
+        header = self.client.get(reverse('home'))['Server-Timing']
+        self.assertRegex(header, r'^db;dur=[\d.]+;desc="\d+ queries", tpl;dur=[\d.]+, app;dur=[\d.]+$')
+
+    async def test_asgi_requests_check_the_user_too(self):
+        self.assertNotIn('Server-Timing', await self.async_client.get(reverse('home')))
+
+        await self.async_client.aforce_login(await User.objects.acreate(username='staff', is_staff=True))
+        self.assertIn('Server-Timing', await self.async_client.get(reverse('home')))
+
+    @override_settings(DEBUG=True)
+    def test_header_goes_to_everyone_with_debug_on(self):
+        # From outside INTERNAL_IPS, so the debug toolbar stays out of it
+        self.assertIn('Server-Timing', self.client.get(reverse('home'), REMOTE_ADDR='10.0.0.1'))
+
+    @override_settings(DEBUG=True)
+    def test_counts_queries_and_templates_and_keeps_the_header_set_inside(self):
+        def view(request):
+            list(Category.objects.all())
+            list(Category.objects.all())
+            response = HttpResponse(render_to_string('home/stats.html'))
+            response['Server-Timing'] = 'cache;dur=1'
+            timings = middleware._current.get()
+            self.assertEqual(timings.queries, 2)
+            self.assertGreater(timings.template_time, 0)
+            return response
+
+        response = RequestTimingMiddleware(view)(RequestFactory().get('/'))
+        self.assertRegex(response['Server-Timing'], r'^cache;dur=1, db;dur=[\d.]+;desc="2 queries", tpl;dur=')
+        # Outside a request the patched render just renders
+        self.assertIsNone(middleware._current.get())
+        self.assertIn('Events Hosted', render_to_string('home/stats.html'))
+
+    def test_summary_per_view(self):
+        for _ in range(3):
+            self.client.get(reverse('home'))
+        self.client.get(reverse('categories'))
+
+        summary = timing_summary()
+        self.assertEqual({name: row['count'] for name, row in summary.items()}, {'home': 3, 'categories': 1})
+        home = summary['home']
+        self.assertLessEqual(home['p50_ms'], home['p90_ms'])
+        self.assertLessEqual(home['p90_ms'], home['p99_ms'])
+        self.assertGreater(home['avg_queries'], 0)
+
+    def test_timings_page_is_for_admins(self):
+        self.client.force_login(User.objects.create(username='member'))
+        self.assertEqual(self.client.get(reverse('request-timings')).status_code, 302)
+
+        self.client.force_login(User.objects.create(username='boss', is_superuser=True))
+        self.client.get(reverse('home'))
+        self.assertIn('home', self.client.get(reverse('request-timings')).json())
+
+
+class SharedCacheCheckTest(SimpleTestCase):
+    def test_process_local_cache_is_reported(self):
+        self.assertEqual([warning.id for warning in check_shared_cache(None)], ['core.W001'])
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://localhost:6379/0',
+    }})
+    def test_shared_cache_passes(self):
+        self.assertEqual(check_shared_cache(None), [])
+
+
+class CursorPaginationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        organizer = User.objects.create(username='organizer')
+        cls.category = Category.objects.create(name='Tech', slug='tech')
+        cls.events = [
+            Event.objects.create(
+                title=f'Event {i}', slug=f'event-{i}', category=cls.category, organizer=organizer,
+                description='Event', date=datetime.date(2030, 1, 1 + i), time=datetime.time(18, 0), location='Dhaka',
+            )
+            for i in range(3)
+        ]
+
+    def api_slugs(self, url):
+        return [row['slug'] for row in self.client.get(url).json()['data']]
+
+    def test_cursors_walk_the_pages(self):
+        url = reverse('api_events') + '?fields=slug&limit=2'
+        data = self.client.get(url).json()
+        self.assertEqual([row['slug'] for row in data['data']], ['event-0', 'event-1'])
+        self.assertEqual(self.api_slugs(data['next']), ['event-2'])
+
+    def test_cursors_of_the_wrong_type_are_ignored(self):
+        for cursor in [encode_cursor(['abc', 1]), encode_cursor(['2030-01-02', 'x']), encode_cursor([None, 1])]:
+            for url in [
+                reverse('events'), reverse('category_detail', args=[self.category.id]), reverse('api_events'),
+            ]:
+                for param in ('after', 'before'):
+                    response = self.client.get(f'{url}?{param}={cursor}')
+                    self.assertEqual(response.status_code, 200, f'{url}?{param}={cursor}')
+            self.assertEqual(self.api_slugs(f"{reverse('api_events')}?fields=slug&after={cursor}"), [
+                'event-0', 'event-1', 'event-2',
+            ])
+
+
+class BouncingBackend(BaseEmailBackend):
+    """Refuses messages to bounce.example.com and delivers the rest to the locmem outbox."""
+
+    def send_messages(self, messages):
+        for message in messages:
+            if any(address.endswith('@bounce.example.com') for address in message.to):
+                raise smtplib.SMTPRecipientsRefused({message.to[0]: (550, b'No such user')})
+            mail.outbox.append(message)
+        return len(messages)
+
+
+class UnreachableBackend(BaseEmailBackend):
+    def open(self):
+        raise ConnectionRefusedError('Connection refused')
+
+
+class QueuedMailTest(TestCase):
+    def queue(self, to):
+        return queue_mail('Hello', 'Hi there', None, [to], html_message='<p>Hi there</p>')
+
+    def send(self):
+        return send_queued_batch(backend='core.tests.BouncingBackend')
+
+    def make_due(self):
+        QueuedEmail.objects.update(next_attempt_at=timezone.now())
+
+    def test_sends_due_messages_over_one_connection(self):
+        email = self.queue('alice@example.com')
+        self.queue('bob@example.com')
+        self.assertEqual(send_queued_batch(), (2, 0))  # the test runner's locmem backend
+
+        self.assertEqual([message.to for message in mail.outbox], [['alice@example.com'], ['bob@example.com']])
+        self.assertEqual(mail.outbox[0].alternatives[0].content, '<p>Hi there</p>')
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('sent', 1))
+        self.assertIsNotNone(email.sent_at)
+        self.assertEqual(send_queued_batch(), (0, 0))
+
+    def test_failures_back_off_then_go_dead(self):
+        email = self.queue('carol@bounce.example.com')
+        self.queue('dave@example.com')
+        with self.assertLogs('core.mail', 'WARNING') as logs:
+            self.assertEqual(self.send(), (1, 1))
+
+            for attempt in range(1, MAX_ATTEMPTS):
+                email.refresh_from_db()
+                self.assertEqual((email.status, email.attempts), ('pending', attempt))
+                self.assertIn('No such user', email.last_error)
+                delay = (email.next_attempt_at - timezone.now()).total_seconds()
+                self.assertAlmostEqual(delay, BACKOFF_BASE * 2 ** (attempt - 1), delta=5)
+
+                self.assertEqual(self.send(), (0, 0))  # not due yet
+                self.make_due()
+                self.assertEqual(self.send(), (0, 1))
+
+        self.assertEqual(len(logs.records), MAX_ATTEMPTS)
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('dead', MAX_ATTEMPTS))
+        self.make_due()
+        self.assertEqual(self.send(), (0, 0))
+
+    def test_requeue_dead(self):
+        email = self.queue('erin@example.com')
+        QueuedEmail.objects.update(status='dead', attempts=MAX_ATTEMPTS)
+
+        out = io.StringIO()
+        call_command('send_queued_mail', '--requeue-dead', stdout=out)
+        self.assertEqual(out.getvalue().splitlines(), ['Requeued 1 dead messages', 'Sent 1, failed 0'])
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('sent', 1))
+
+    def test_unreachable_server_marks_nothing(self):
+        email = self.queue('frank@example.com')
+        with self.assertRaisesMessage(CommandError, 'Connection refused'):
+            call_command('send_queued_mail', '--backend', 'core.tests.UnreachableBackend', stdout=io.StringIO())
+
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('pending', 0))
+        self.assertEqual(mail.outbox, [])
+
+
+def image_file(name, mode, size):
+    buffer = io.BytesIO()
+    Image.new(mode, size).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class ImageVariantTest(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        settings = override_settings(MEDIA_ROOT=media)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def make_testimonial(self, image):
+        return Testimonial.objects.create(name='Ada', role='Host', company='Eventify', image=image, content='Great')
+
+    def test_transparent_and_palette_images_get_every_smaller_width(self):
+        for mode in ('RGBA', 'P'):
+            name = default_storage.save(f'testimonials/{mode}.png', image_file('x.png', mode, (800, 400)))
+            variants = generate_variants(name)
+
+            self.assertEqual(variants['source'], name)
+            self.assertEqual(list(variants['widths']), ['320', '640'])
+            with default_storage.open(variants['widths']['320']['jpeg']) as f:
+                jpeg = Image.open(f)
+                self.assertEqual((jpeg.format, jpeg.mode, jpeg.size), ('JPEG', 'RGB', (320, 160)))
+            with default_storage.open(variants['widths']['640']['webp']) as f:
+                self.assertEqual(Image.open(f).format, 'WEBP')
+
+    def test_small_images_get_one_variant_at_their_own_width(self):
+        name = default_storage.save('testimonials/small.png', image_file('x.png', 'RGB', (100, 50)))
+        self.assertEqual(list(generate_variants(name)['widths']), ['100'])
+
+    def test_uploads_render_as_picture_with_srcsets(self):
+        testimonial = self.make_testimonial(image_file('ada.png', 'RGB', (700, 700)))
+        template = Template(
+            '{% load images %}{% responsive_image t.image t.image_variants sizes="50vw" css_class="round" alt=t.name %}'
+        )
+        html = template.render(Context({'t': testimonial}))
+        self.assertHTMLEqual(html, (
+            '<picture style="display: contents">'
+            '<source type="image/webp" srcset="/media/variants/testimonials/ada_320.webp 320w, '
+            '/media/variants/testimonials/ada_640.webp 640w" sizes="50vw">'
+            '<img src="/media/variants/testimonials/ada_640.jpeg" srcset="/media/variants/testimonials/ada_320.jpeg 320w, '
+            '/media/variants/testimonials/ada_640.jpeg 640w" sizes="50vw" class="round" alt="Ada" loading="lazy">'
+            '</picture>'
+        ))
+
+        # Variants of an older file are ignored until they are regenerated
+        testimonial.image_variants['source'] = 'testimonials/old.png'
+        self.assertHTMLEqual(
+            template.render(Context({'t': testimonial})),
+            '<img src="/media/testimonials/ada.png" class="round" alt="Ada" loading="lazy">',
+        )
+
+    def test_backfill_command_is_idempotent(self):
+        testimonial = self.make_testimonial(image_file('ada.png', 'RGB', (700, 700)))
+        Testimonial.objects.update(image_variants={})
+
+        def run(*args):
+            out = io.StringIO()
+            call_command('generate_image_variants', '--workers', '1', *args, stdout=out, stderr=io.StringIO())
+            return out.getvalue().strip()
+
+        self.assertEqual(run(), 'Generated variants for 1 images, 0 failed')
+        testimonial.refresh_from_db()
+        variants = testimonial.image_variants
+        self.assertEqual(variants['widths']['640']['webp'], 'variants/testimonials/ada_640.webp')
+
+        self.assertEqual(run(), 'All images already have variants')
+        self.assertEqual(run('--all'), 'Generated variants for 1 images, 0 failed')
+        testimonial.refresh_from_db()
+        self.assertEqual(testimonial.image_variants, variants)  # same paths, the old files were replaced
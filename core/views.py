@@ -1,35 +1,47 @@
-from django.shortcuts import render, redirect
-from django.db.models import Count
+import asyncio
+
+from django.shortcuts import redirect
+from django.http import JsonResponse
+from django.contrib.auth.decorators import login_required
 from django.utils import timezone
 
 from events.models import Event, Category
 from core.models import Testimonial, SiteStats, Newsletter
+from core.cache import acached_section
+from core.shortcuts import arender
+from core.middleware import timing_summary
+from core.stats import DEFAULT_SATISFACTION_RATE, SITE_STATS_PK
 
 
-def home(request):
-    # Featured Events
-    featured_events = Event.objects.filter(is_featured=True).annotate(
-        participant_count=Count('participants')
-    )[:5]
+async def _featured_events():
+    return [
+        event async for event in Event.objects.filter(is_featured=True).select_related('category')[:5]
+    ]
+
+
+async def _categories():
+    return [category async for category in Category.objects.all()]
 
-    # Categories
-    categories = Category.objects.annotate(
-        event_count=Count('events')
-    )
 
-    stats = SiteStats.objects.first()
+async def _stats():
+    # Kept up to date by core.stats.refresh_site_stats, never computed here
+    stats = await SiteStats.objects.filter(pk=SITE_STATS_PK).afirst()
+    return stats or SiteStats(satisfaction_rate=DEFAULT_SATISFACTION_RATE)
 
-    if not stats:
-        stats = {
-            "events_count": Event.objects.count(),
-            "users_count": Event.objects.values('participants__user').distinct().count(),
-            "cities_count": Event.objects.values('location').distinct().count(),
-            "satisfaction_rate": 98,
-        }
 
-    # Testimonials
-    testimonials = Testimonial.objects.all()[:3]
+async def _testimonials():
+    return [testimonial async for testimonial in Testimonial.objects.all()[:3]]
 
+
+async def home(request):
+    # Each section is cached on its own and dropped by core.signals when its data changes;
+    # missing sections are rebuilt concurrently
+    featured_events, categories, stats, testimonials = await asyncio.gather(
+        acached_section('featured', _featured_events),
+        acached_section('categories', _categories),
+        acached_section('stats', _stats),
+        acached_section('testimonials', _testimonials),
+    )
     context = {
         "featured_events": featured_events,
         "categories": categories,
@@ -37,7 +49,7 @@ def home(request):
         "testimonials": testimonials,
     }
 
-    return render(request, "home.html", context)
+    return await arender(request, "home.html", context)
 
 def subscribe(request):
     if request.method == "POST":
@@ -46,4 +58,12 @@ def subscribe(request):
         if email:
             Newsletter.objects.get_or_create(email=email)
 
-    return redirect("home")
\ No newline at end of file
+    return redirect("home")
+
+
+@login_required
+def request_timings(request):
+    """Rolling per-view timings collected by RequestTimingMiddleware in this process"""
+    if not (request.user.is_superuser or request.user.groups.filter(name='Admin').exists()):
+        return redirect('no-permission')
+    return JsonResponse(timing_summary())
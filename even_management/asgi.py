@@ -14,3 +14,6 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'even_management.settings')
 
 application = get_asgi_application()
+
+from core.stats import start_stats_refresher  # noqa: E402  (needs the app registry)
+start_stats_refresher()
@@ -37,6 +37,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its Server-Timing is merged with the toolbar's instead of overwritten by it
+    'core.middleware.RequestTimingMiddleware',
     "debug_toolbar.middleware.DebugToolbarMiddleware",
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -66,6 +68,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'users.context_processors.notifications',
             ],
         },
     },
@@ -149,13 +152,44 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# Cached sections, detail page versions and notification counters are shared by every web worker and
+# management command, so production needs a shared cache. Without REDIS_URL each process has its own
+# (fine for a single runserver); `check --deploy` warns about that.
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.smtp.EmailBackend')
+EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'  # used by the file backend, e.g. send_queued_mail --backend file
 EMAIL_HOST = config('EMAIL_HOST')
 EMAIL_PORT = config('EMAIL_PORT')
 EMAIL_USE_TLS = config('EMAIL_USE_TLS')
 EMAIL_HOST_USER = config('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD')
+DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default=EMAIL_HOST_USER)
 
 FRONTEND_URL = config('FRONTEND_URL')
 
-LOGIN_URL = 'sign-in'
\ No newline at end of file
+LOGIN_URL = 'sign-in'
+
+# Seconds between in-process SiteStats refreshes, 0 disables (use the refresh_site_stats command instead)
+SITE_STATS_REFRESH_INTERVAL = config('SITE_STATS_REFRESH_INTERVAL', default=300, cast=int)
+
+# UserActivity rows are buffered in process (events.activity) and written in batches
+ACTIVITY_BUFFER_SIZE = config('ACTIVITY_BUFFER_SIZE', default=100, cast=int)
+ACTIVITY_BUFFER_MAX_AGE = config('ACTIVITY_BUFFER_MAX_AGE', default=5.0, cast=float)
+ACTIVITY_SPOOL_PATH = BASE_DIR / 'activity_spool.jsonl'  # rows that couldn't be written at shutdown
+
+# Seconds shared caches may serve anonymous listing pages before revalidating (core.conditional)
+PAGE_MAX_AGE = config('PAGE_MAX_AGE', default=60, cast=int)
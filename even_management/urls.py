@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.urls import path, include
 from debug_toolbar.toolbar import debug_toolbar_urls
-from core.views import home, subscribe
+from core.views import home, subscribe, request_timings
 from django.conf.urls.static import static
 from django.conf import settings
 
@@ -10,8 +10,10 @@ urlpatterns = [
     path('', home, name='home'),
     path('no-permission/', home, name='no-permission'),
     path("subscribe/", subscribe, name="subscribe"),
+    path("timings/", request_timings, name="request-timings"),
     path('event/', include('events.urls')),
     path('user/', include('users.urls')),
+    path('api/v1/', include('events.api_urls')),
 ] + debug_toolbar_urls()
 
 urlpatterns += static(settings.MEDIA_URL, document_root = settings.MEDIA_ROOT)
@@ -0,0 +1,213 @@
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from functools import partial
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, OperationalError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from events.models import UserActivity
+
+logger = logging.getLogger(__name__)
+
+# How often a process looks for spool files claimed by processes that died before writing them
+ORPHAN_SCAN_INTERVAL = 60
+
+
+class ActivityBuffer:
+    """Collects ``UserActivity`` rows in process and writes them with one ``bulk_create``.
+
+    A flush happens when ``max_size`` rows are waiting, when the oldest has
+    waited ``max_age`` seconds, and at the end of every request, after the
+    response has gone out. Rows are written in the order they were logged. A
+    flush that fails on a transient error (``OperationalError``) puts them
+    back in front of anything logged since; rows that can never be written,
+    e.g. for an event deleted after they were logged, are dropped and logged.
+    Rows that still can't be written at interpreter exit are appended to
+    ``spool_path`` and written by the next flush, in any process. A flush
+    claims the spool by renaming it and deletes the claimed file only once
+    its rows are committed; files left by a process that died in between are
+    taken over by the others.
+    """
+
+    def __init__(self, max_size=100, max_age=5.0, spool_path=None):
+        self.max_size = max_size
+        self.max_age = max_age
+        self.spool_path = spool_path
+        self._rows = []
+        self._oldest = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._claimed = []  # spool files this process claimed but hasn't written yet
+        self._orphans_scanned = None
+
+    def __len__(self):
+        return len(self._rows)
+
+    def add(self, user_id, event_id, activity_type, created_at=None):
+        row = UserActivity(
+            user_id=user_id,
+            event_id=event_id,
+            activity_type=activity_type,
+            created_at=created_at or timezone.now(),
+        )
+        with self._lock:
+            if not self._rows:
+                self._oldest = time.monotonic()
+            self._rows.append(row)
+            due = len(self._rows) >= self.max_size or time.monotonic() - self._oldest >= self.max_age
+        if due:
+            self.flush()
+
+    def _take(self):
+        with self._lock:
+            rows, self._rows = self._rows, []
+            return rows
+
+    def _put_back(self, rows):
+        with self._lock:
+            self._rows[:0] = rows
+            self._oldest = time.monotonic()
+
+    def flush(self):
+        """Write every waiting row; returns how many were written."""
+        # One flush at a time, so concurrent flushes can't reorder batches
+        with self._flush_lock:
+            spooled, spool_files = self._claim_spool()
+            rows = self._take()
+            if not spooled and not rows:
+                return 0
+            try:
+                written = self._write(spooled + rows)
+            except OperationalError:
+                logger.exception("Could not write %d buffered activities", len(spooled) + len(rows))
+                # The spooled rows stay in their claimed files for the next flush
+                self._put_back(rows)
+                return 0
+            except DatabaseError:
+                # Retrying can't help, and would hold up every row logged after these
+                logger.exception("Dropped %d buffered activities that can't be written", len(spooled) + len(rows))
+                written = []
+            self._release(spool_files)
+        return len(written)
+
+    def _write(self, rows):
+        """Write ``rows`` with one query, or one at a time if some of them are invalid; returns the written ones."""
+        try:
+            UserActivity.objects.bulk_create(rows)
+            return rows
+        except IntegrityError:
+            pass
+        # Usually a user or event deleted since the row was logged; keep everything else
+        written = []
+        for row in rows:
+            try:
+                with transaction.atomic():
+                    UserActivity.objects.bulk_create([row])
+            except IntegrityError as e:
+                logger.warning(
+                    "Dropped activity %r of user %s on event %s: %s", row.activity_type, row.user_id, row.event_id, e
+                )
+            else:
+                written.append(row)
+        return written
+
+    def flush_at_exit(self):
+        if not self.flush() and len(self) and self.spool_path:
+            self._spool(self._take())
+
+    def _spool(self, rows):
+        with open(self.spool_path, 'a') as f:
+            for row in rows:
+                f.write(json.dumps({
+                    'user_id': row.user_id,
+                    'event_id': row.event_id,
+                    'activity_type': row.activity_type,
+                    'created_at': row.created_at.isoformat(),
+                }) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        logger.warning("Spooled %d activities to %s", len(rows), self.spool_path)
+
+    def _claimed_path(self, pid, stamp):
+        return f'{self.spool_path}.claimed-{pid}-{stamp}'
+
+    def _claim_spool(self):
+        """Rows of every spool file this process holds, oldest first, and those files."""
+        if not self.spool_path:
+            return [], []
+        # Renaming claims the file, so two processes never replay the same rows
+        claimed = self._claimed_path(os.getpid(), time.time_ns())
+        try:
+            os.replace(self.spool_path, claimed)
+        except FileNotFoundError:
+            pass
+        else:
+            self._claimed.append(claimed)
+        self._adopt_orphans()
+
+        rows = []
+        for path in self._claimed:
+            with open(path) as f:
+                rows.extend(
+                    UserActivity(**{**record, 'created_at': parse_datetime(record['created_at'])})
+                    for record in map(json.loads, f)
+                )
+        return rows, list(self._claimed)
+
+    def _adopt_orphans(self):
+        """Take over spool files claimed by processes that exited before writing them."""
+        now = time.time()
+        if self._orphans_scanned is not None and now - self._orphans_scanned < ORPHAN_SCAN_INTERVAL:
+            return
+        self._orphans_scanned = now
+        prefix = f'{self.spool_path}.claimed-'
+        for path in glob.glob(glob.escape(prefix) + '*'):
+            pid, _, stamp = path[len(prefix):].partition('-')
+            if not pid.isdigit() or int(pid) == os.getpid() or _is_running(int(pid)):
+                continue
+            adopted = self._claimed_path(os.getpid(), stamp)
+            try:
+                os.replace(path, adopted)
+            except FileNotFoundError:
+                continue  # another process adopted it first
+            self._claimed.append(adopted)
+        self._claimed.sort(key=lambda path: int(path.rsplit('-', 1)[1]))
+
+    def _release(self, paths):
+        """Forget the claimed files whose rows were handled, and delete them once that commits."""
+        self._claimed = [path for path in self._claimed if path not in paths]
+
+        def remove():
+            for path in paths:
+                os.remove(path)
+        transaction.on_commit(remove)
+
+
+def _is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # running, as another user
+    return True
+
+
+activity_buffer = ActivityBuffer(
+    max_size=getattr(settings, 'ACTIVITY_BUFFER_SIZE', 100),
+    max_age=getattr(settings, 'ACTIVITY_BUFFER_MAX_AGE', 5.0),
+    spool_path=getattr(settings, 'ACTIVITY_SPOOL_PATH', None),
+)
+
+
+def log_activity(user, event, activity_type):
+    """Record a UserActivity once the surrounding transaction commits, without a query of its own."""
+    transaction.on_commit(partial(
+        activity_buffer.add, user.pk, event.pk, activity_type, timezone.now()
+    ))
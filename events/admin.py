@@ -1,5 +1,5 @@
 from django.contrib import admin
-from events.models import Event, Category, EventParticipant, Schedule, Speaker
+from events.models import Event, Category, EventParticipant, Schedule, Speaker, EventUpdateFanout, WaitlistEntry
 
 # Register your models here.
 
@@ -8,3 +8,5 @@ admin.site.register(Category)
 admin.site.register(Speaker)
 admin.site.register(Schedule)
 admin.site.register(EventParticipant)
+admin.site.register(EventUpdateFanout)
+admin.site.register(WaitlistEntry)
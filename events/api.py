@@ -0,0 +1,181 @@
+from functools import wraps
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from core.conditional import conditional_page
+from core.pagination import apaginate
+from events.forms import EventSearchForm
+from events.models import Category, Event, Schedule, Speaker
+from events.page_cache import adetail_body_key, catalog_validators
+from events.search import filter_events
+from events.tags import tag_cloud
+
+
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
+
+# API field name -> values() lookup. Only these can be asked for with ?fields=
+EVENT_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'slug': 'slug',
+    'category': 'category__slug',
+    'description': 'description',
+    'about': 'about',
+    'date': 'date',
+    'time': 'time',
+    'location': 'location',
+    'address': 'address',
+    'is_virtual': 'is_virtual',
+    'tags': 'tags',
+    'image': 'image',
+    'capacity': 'capacity',
+    'registered': 'registered',
+    'price': 'price',
+    'is_featured': 'is_featured',
+    'updated_at': 'updated_at',
+}
+EVENT_LIST_FIELDS = ['id', 'title', 'slug', 'category', 'date', 'time', 'location', 'is_virtual', 'price', 'image']
+CATEGORY_FIELDS = {name: name for name in ['id', 'name', 'slug', 'description', 'icon', 'event_count']}
+SPEAKER_FIELDS = {name: name for name in ['id', 'name', 'role', 'bio', 'avatar', 'order']}
+SCHEDULE_FIELDS = {name: name for name in ['id', 'day', 'time', 'title', 'description', 'location', 'order']}
+FILE_FIELDS = {'image', 'avatar'}
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _json(data, status=200):
+    return JsonResponse(
+        data, status=status, encoder=DjangoJSONEncoder, json_dumps_params={'separators': (',', ':')}
+    )
+
+
+def _error(message, status):
+    return _json({'error': message}, status=status)
+
+
+def _requested_fields(request, available, default=None):
+    """The API field names asked for with ``?fields=a,b``, in order; all of ``default`` otherwise."""
+    raw = request.GET.get('fields')
+    if not raw:
+        return list(default or available)
+    names = list(dict.fromkeys(name.strip() for name in raw.split(',') if name.strip()))
+    unknown = [name for name in names if name not in available]
+    if unknown or not names:
+        raise BadRequest(f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(available)}")
+    return names
+
+
+def _page_size(request):
+    try:
+        size = int(request.GET.get('limit', API_PAGE_SIZE))
+    except ValueError:
+        raise BadRequest("limit must be a number")
+    return max(1, min(size, API_MAX_PAGE_SIZE))
+
+
+def _select(queryset, fields, lookups, extra=()):
+    """``values()`` of the requested fields plus ``extra`` (e.g. the ordering keys) the response leaves out."""
+    return queryset.values(*dict.fromkeys([lookups[name] for name in fields] + list(extra)))
+
+
+def _serialize(request, row, fields, lookups):
+    data = {name: row[lookups[name]] for name in fields}
+    for name in FILE_FIELDS.intersection(data):
+        if data[name]:
+            data[name] = request.build_absolute_uri(settings.MEDIA_URL + data[name])
+    return data
+
+
+async def _paged(request, queryset, fields, lookups, ordering):
+    page = await apaginate(
+        request, _select(queryset, fields, lookups, extra=[o.lstrip('-') for o in ordering]),
+        ordering, per_page=_page_size(request),
+    )
+    return _json({
+        'data': [_serialize(request, row, fields, lookups) for row in page],
+        'next': page.next_url and request.build_absolute_uri(page.next_url),
+        'previous': page.prev_url and request.build_absolute_uri(page.prev_url),
+    })
+
+
+def api_view(view):
+    """Turn ``BadRequest`` into a JSON 400."""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            return await view(request, *args, **kwargs)
+        except BadRequest as e:
+            return _error(str(e), 400)
+    return wrapper
+
+
+async def _event_validators(request, id):
+    # Bumped by anything that changes the event, its speakers or its schedule (see events.signals)
+    return await adetail_body_key(id), None
+
+
+@require_GET
+@conditional_page(catalog_validators)
+@api_view
+async def api_events(request):
+    """Events in date order; takes the same filters as the events page."""
+    form = EventSearchForm(request.GET)
+    if not form.is_valid():
+        raise BadRequest('; '.join(f"{field}: {' '.join(errors)}" for field, errors in form.errors.items()))
+    fields = _requested_fields(request, EVENT_FIELDS, EVENT_LIST_FIELDS)
+    return await _paged(request, filter_events(form.cleaned_data), fields, EVENT_FIELDS, ('date', 'id'))
+
+
+@require_GET
+@conditional_page(_event_validators)
+@api_view
+async def api_event(request, id):
+    fields = _requested_fields(request, EVENT_FIELDS)
+    row = await _select(Event.objects.filter(id=id), fields, EVENT_FIELDS).afirst()
+    if row is None:
+        return _error("Event not found", 404)
+    return _json({'data': _serialize(request, row, fields, EVENT_FIELDS)})
+
+
+async def _event_children(request, id, queryset, lookups):
+    fields = _requested_fields(request, lookups)
+    if not await Event.objects.filter(id=id).aexists():
+        return _error("Event not found", 404)
+    rows = _select(queryset.filter(event_id=id), fields, lookups)
+    return _json({'data': [_serialize(request, row, fields, lookups) async for row in rows]})
+
+
+@require_GET
+@conditional_page(_event_validators)
+@api_view
+async def api_event_speakers(request, id):
+    return await _event_children(request, id, Speaker.objects.order_by('order', 'name'), SPEAKER_FIELDS)
+
+
+@require_GET
+@conditional_page(_event_validators)
+@api_view
+async def api_event_schedules(request, id):
+    return await _event_children(request, id, Schedule.objects.order_by('day', 'order', 'time'), SCHEDULE_FIELDS)
+
+
+@require_GET
+@conditional_page(catalog_validators)
+@api_view
+async def api_categories(request):
+    fields = _requested_fields(request, CATEGORY_FIELDS)
+    return await _paged(request, Category.objects.all(), fields, CATEGORY_FIELDS, ('name', 'id'))
+
+
+@require_GET
+@conditional_page(catalog_validators)
+@api_view
+async def api_tags(request):
+    """The most used tags with their event counts; filter events by them with ``/events/?tags=a,b``."""
+    return _json({'data': [row async for row in tag_cloud(limit=_page_size(request))]})
@@ -0,0 +1,12 @@
+from django.urls import path
+from events.api import api_categories, api_event, api_event_schedules, api_event_speakers, api_events, api_tags
+
+# Mounted at api/v1/; a breaking change gets a new version prefix rather than editing these
+urlpatterns = [
+    path('events/', api_events, name='api_events'),
+    path('events/<int:id>/', api_event, name='api_event'),
+    path('events/<int:id>/speakers/', api_event_speakers, name='api_event_speakers'),
+    path('events/<int:id>/schedules/', api_event_schedules, name='api_event_schedules'),
+    path('categories/', api_categories, name='api_categories'),
+    path('tags/', api_tags, name='api_tags'),
+]
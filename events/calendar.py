@@ -0,0 +1,179 @@
+import datetime
+import hashlib
+import secrets
+
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.db.models import Count, Max, Q, Sum
+from django.urls import reverse
+from django.utils import timezone
+
+from events.models import Category, Event
+
+
+FEED_PAST_DAYS = 30  # feeds carry events from this many days ago onwards
+FEED_CHUNK_SIZE = 200
+EVENT_DURATION = datetime.timedelta(hours=2)  # events have no end time of their own
+FEED_FIELDS = ('id', 'title', 'description', 'location', 'address', 'is_virtual', 'date', 'time', 'updated_at')
+
+TOKEN_SALT = 'events.calendar.rsvp-feed'
+
+User = get_user_model()
+
+
+def _set_feed_key(user, only_if_missing=False):
+    users = User.objects.filter(pk=user.pk)
+    if only_if_missing:
+        users = users.filter(calendar_feed_key='')  # another request may have given the user one first
+    key = secrets.token_urlsafe(16)
+    if users.update(calendar_feed_key=key):
+        user.calendar_feed_key = key
+    else:
+        user.refresh_from_db(fields=['calendar_feed_key'])
+
+
+def make_feed_token(user):
+    """Signed token naming ``user``'s RSVP feed, so calendar apps need no session.
+
+    It carries the user's feed key, so ``reset_feed_token`` revokes every
+    token handed out before it.
+    """
+    if not user.calendar_feed_key:
+        _set_feed_key(user, only_if_missing=True)
+    return signing.dumps([user.pk, user.calendar_feed_key], salt=TOKEN_SALT, compress=True)
+
+
+def reset_feed_token(user):
+    """Give ``user`` a new feed token, revoking the old ones."""
+    _set_feed_key(user)
+    return make_feed_token(user)
+
+
+def read_feed_token(token):
+    """The user id in ``token``, or None if it was tampered with or revoked."""
+    try:
+        user_id, key = signing.loads(token, salt=TOKEN_SALT)
+    except (signing.BadSignature, TypeError, ValueError):
+        return None
+    if not key or not User.objects.filter(pk=user_id, calendar_feed_key=key).exists():
+        return None
+    return user_id
+
+
+def feed_window_start():
+    return timezone.now().date() - datetime.timedelta(days=FEED_PAST_DAYS)
+
+
+def rsvp_feed_events(user_id):
+    return Event.objects.filter(
+        participants__user_id=user_id, participants__status='going', date__gte=feed_window_start(),
+    )
+
+
+def category_feed_events(category_id):
+    return Event.objects.filter(category_id=category_id, date__gte=feed_window_start())
+
+
+def _validators(key, last_modified, count, id_sum):
+    # The count and id sum change when an event joins or leaves the feed without being edited
+    raw = f'{key}:{feed_window_start()}:{last_modified and last_modified.isoformat()}:{count}:{id_sum}'
+    return hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest(), last_modified
+
+
+def rsvp_feed_validators(user_id):
+    """(etag, last_modified) of a user's RSVP feed, from one aggregate query."""
+    totals = rsvp_feed_events(user_id).aggregate(last=Max('updated_at'), count=Count('id'), ids=Sum('id'))
+    return _validators(f'rsvps:{user_id}', totals['last'], totals['count'], totals['ids'])
+
+
+def category_feed(category_id):
+    """The category with its feed's (etag, last_modified), from one query; None if it doesn't exist."""
+    in_window = Q(events__date__gte=feed_window_start())
+    category = Category.objects.filter(id=category_id).annotate(
+        feed_last=Max('events__updated_at', filter=in_window),
+        feed_count=Count('events', filter=in_window),
+        feed_ids=Sum('events__id', filter=in_window),
+    ).first()
+    if category is None:
+        return None, None
+    return category, _validators(
+        f'category:{category_id}', category.feed_last, category.feed_count, category.feed_ids
+    )
+
+
+def _escape(text):
+    return (
+        str(text or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def _fold(line):
+    """Split a content line into 75-octet pieces as RFC 5545 requires."""
+    data = line.encode()
+    if len(data) <= 75:
+        return line + '\r\n'
+    pieces, start, limit = [], 0, 75
+    while start < len(data):
+        end = min(start + limit, len(data))
+        while end < len(data) and (data[end] & 0xC0) == 0x80:
+            end -= 1  # don't cut a UTF-8 sequence in half
+        pieces.append(data[start:end].decode())
+        start, limit = end, 74  # continuation lines start with a space
+    return '\r\n '.join(pieces) + '\r\n'
+
+
+def _utc(value):
+    return value.astimezone(datetime.timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _vevent(event, domain, url):
+    start = timezone.make_aware(datetime.datetime.combine(event.date, event.time))
+    location = 'Online' if event.is_virtual else ', '.join(filter(None, [event.location, event.address]))
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:event-{event.id}@{domain}',
+        f'DTSTAMP:{_utc(event.updated_at)}',
+        f'LAST-MODIFIED:{_utc(event.updated_at)}',
+        f'DTSTART:{_utc(start)}',
+        f'DTEND:{_utc(start + EVENT_DURATION)}',
+        f'SUMMARY:{_escape(event.title)}',
+        f'DESCRIPTION:{_escape(event.description)}',
+        f'LOCATION:{_escape(location)}',
+        f'URL:{url}',
+        'END:VEVENT',
+    ]
+    return ''.join(_fold(line) for line in lines)
+
+
+def _head(name, domain):
+    return ''.join(_fold(line) for line in [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:-//{domain}//Events//EN',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{_escape(name)}',
+    ])
+
+
+def _feed_events(events):
+    return events.only(*FEED_FIELDS).order_by('date', 'id')
+
+
+def stream_calendar(name, events, request):
+    """Yield an iCalendar document for ``events`` a chunk at a time, never holding the whole feed."""
+    domain = request.get_host().split(':')[0]
+    yield _head(name, domain)
+    for event in _feed_events(events).iterator(chunk_size=FEED_CHUNK_SIZE):
+        yield _vevent(event, domain, request.build_absolute_uri(reverse('event_detail', args=[event.id])))
+    yield _fold('END:VCALENDAR')
+
+
+async def astream_calendar(name, events, request):
+    """``stream_calendar`` for ASGI responses, reading the events with ``aiterator``."""
+    domain = request.get_host().split(':')[0]
+    yield _head(name, domain)
+    async for event in _feed_events(events).aiterator(chunk_size=FEED_CHUNK_SIZE):
+        yield _vevent(event, domain, request.build_absolute_uri(reverse('event_detail', args=[event.id])))
+    yield _fold('END:VCALENDAR')
@@ -0,0 +1,87 @@
+from collections import Counter
+
+from django.db.models import Case, Count, F, IntegerField, Q, When
+from django.db.models.functions import Greatest
+
+from events.models import Category, Event, EventParticipant
+
+
+# The Event column counting participants of each status
+STATUS_COUNTERS = {
+    'going': 'registered',
+    'interested': 'interested_count',
+    'attended': 'attended_count',
+    'cancelled': 'cancelled_count',
+}
+RECONCILE_BATCH_SIZE = 1000
+
+
+def _shift(field, delta):
+    # Floored at 0, so a row counted twice by mistake can't make the column invalid
+    return F(field) + delta if delta > 0 else Greatest(F(field) + delta, 0, output_field=IntegerField())
+
+
+def count_participant(event_id, old_status=None, new_status=None):
+    """Move one participant between status counters (None = not counted) with a single UPDATE."""
+    old, new = STATUS_COUNTERS.get(old_status), STATUS_COUNTERS.get(new_status)
+    if old == new:
+        return
+    changes = {}
+    if old:
+        changes[old] = _shift(old, -1)
+    if new:
+        changes[new] = _shift(new, 1)
+    Event.objects.filter(id=event_id).update(**changes)
+
+
+def count_events(deltas):
+    """Apply ``{category_id: delta}`` to ``Category.event_count`` with a single UPDATE."""
+    deltas = {category_id: delta for category_id, delta in deltas.items() if category_id and delta}
+    if not deltas:
+        return
+    Category.objects.filter(id__in=deltas).update(event_count=Case(
+        *[When(id=category_id, then=_shift('event_count', delta)) for category_id, delta in deltas.items()],
+        default=F('event_count'),
+        output_field=IntegerField(),
+    ))
+
+
+def has_free_seat(event_id):
+    """Whether the going counter is within capacity (a capacity of 0 means no limit)."""
+    return Event.objects.filter(id=event_id).filter(Q(capacity=0) | Q(registered__lte=F('capacity'))).exists()
+
+
+def _repair(model, fields, actual, batch_size):
+    """Write ``actual`` ({pk: {field: count}}, missing pks count 0) over the rows where it differs."""
+    drifted = []
+    rows = model.objects.values_list('pk', *fields).order_by('pk').iterator(chunk_size=batch_size)
+    for pk, *stored in rows:
+        counts = actual.get(pk, {})
+        if any(counts.get(field, 0) != value for field, value in zip(fields, stored)):
+            drifted.append(model(pk=pk, **{field: counts.get(field, 0) for field in fields}))
+    model.objects.bulk_update(drifted, fields, batch_size=batch_size)
+    return len(drifted)
+
+
+def reconcile(batch_size=RECONCILE_BATCH_SIZE):
+    """Recount every counter from one grouped aggregate per table and fix the rows that drifted.
+
+    Returns ``{'events': n, 'categories': n}``, the number of rows repaired.
+    """
+    participants = EventParticipant.objects.order_by().values('event_id').annotate(**{
+        field: Count('id', filter=Q(status=status)) for status, field in STATUS_COUNTERS.items()
+    })
+    by_event = {row.pop('event_id'): row for row in participants}
+
+    events = Event.objects.order_by().values('category_id').annotate(event_count=Count('id'))
+    by_category = {row['category_id']: {'event_count': row['event_count']} for row in events}
+
+    return {
+        'events': _repair(Event, list(STATUS_COUNTERS.values()), by_event, batch_size),
+        'categories': _repair(Category, ['event_count'], by_category, batch_size),
+    }
+
+
+def events_created(events):
+    """Count events written without signals, e.g. by ``bulk_create``."""
+    count_events(Counter(event.category_id for event in events))
@@ -0,0 +1,97 @@
+from django.db import transaction
+from django.utils import timezone
+
+from events.models import EventParticipant, EventUpdateFanout, Notification, SavedEvent
+from users.notifications import notifications_bulk_created
+
+
+# Changes to these fields are worth telling attendees about
+MATERIAL_FIELDS = ['date', 'time', 'location', 'is_virtual']
+
+
+def snapshot(event):
+    return {field: getattr(event, field) for field in MATERIAL_FIELDS}
+
+
+def _describe(field, value):
+    if field == 'is_virtual':
+        return 'virtual' if value else 'in person'
+    return str(value)
+
+
+def queue_event_update(event, before):
+    """Queue an ``event_update`` fan-out if a material field changed since ``before``."""
+    changes = []
+    for field in MATERIAL_FIELDS:
+        old, new = before[field], getattr(event, field)
+        if old != new:
+            label = 'format' if field == 'is_virtual' else field
+            changes.append(f"{label} changed from {_describe(field, old)} to {_describe(field, new)}")
+
+    if not changes:
+        return None
+    message = '; '.join(changes)
+    return EventUpdateFanout.objects.create(
+        event=event,
+        title=f'{event.title} has been updated',
+        message=message[0].upper() + message[1:] + '.',
+    )
+
+
+def _next_user_ids(fanout, chunk_size):
+    # Take the smallest ids from each source; the first chunk_size of their union is the next chunk
+    participants = EventParticipant.objects.filter(
+        event_id=fanout.event_id, user_id__gt=fanout.last_user_id
+    ).order_by('user_id').values_list('user_id', flat=True)[:chunk_size]
+    savers = SavedEvent.objects.filter(
+        event_id=fanout.event_id, user_id__gt=fanout.last_user_id
+    ).order_by('user_id').values_list('user_id', flat=True)[:chunk_size]
+    return sorted(set(participants) | set(savers))[:chunk_size]
+
+
+def run_fanout_chunk(fanout_id, chunk_size=1000):
+    """Notify the next chunk of users for one fan-out. Returns False once it is finished."""
+    with transaction.atomic():
+        fanout = (
+            EventUpdateFanout.objects.select_for_update(skip_locked=True)
+            .filter(id=fanout_id, status='pending')
+            .first()
+        )
+        if fanout is None:
+            return False
+
+        user_ids = _next_user_ids(fanout, chunk_size)
+        if not user_ids:
+            fanout.status = 'done'
+            fanout.finished_at = timezone.now()
+            fanout.save(update_fields=['status', 'finished_at'])
+            return False
+
+        Notification.objects.bulk_create([
+            Notification(
+                user_id=user_id,
+                event_id=fanout.event_id,
+                notification_type='event_update',
+                title=fanout.title,
+                message=fanout.message,
+            )
+            for user_id in user_ids
+        ])
+        fanout.last_user_id = user_ids[-1]
+        fanout.notified += len(user_ids)
+        fanout.save(update_fields=['last_user_id', 'notified'])
+
+    # This runs in the fanout_event_updates process, so it reaches the web workers' counters through the
+    # shared cache (REDIS_URL); with a per-process cache they catch up when their counters expire
+    notifications_bulk_created(user_ids)
+    return True
+
+
+def run_pending_fanouts(chunk_size=1000):
+    """Work through every pending fan-out, oldest first. Returns how many were worked on."""
+    finished = 0
+    for fanout_id in EventUpdateFanout.objects.filter(status='pending').values_list('id', flat=True):
+        while run_fanout_chunk(fanout_id, chunk_size):
+            pass
+        finished += 1
+    return finished
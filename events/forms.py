@@ -1,5 +1,6 @@
 from django import forms
-from events.models import Event, Category
+from events.models import Event, Category, EventParticipant, Speaker, Schedule
+from events.tags import normalize_tags
 from django.contrib.auth.models import Group, Permission
 
 
@@ -17,7 +18,7 @@ class CategoryForm(forms.ModelForm):
 class EventForm(forms.ModelForm):
     class Meta:
         model = Event
-        exclude = ['organizer', 'registered', 'attendees'] 
+        exclude = ['organizer'] 
         widgets = {
             'title': forms.TextInput(attrs={'class': 'w-full bg-black border border-zinc-800 text-white rounded-lg p-2.5'}),
             'slug': forms.TextInput(attrs={'class': 'w-full bg-black border border-zinc-800 text-white rounded-lg p-2.5'}),
@@ -64,4 +65,72 @@ class CreateGroupForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.fields['permissions'].queryset = Permission.objects.select_related('content_type').all().order_by('content_type__app_label', 'codename')
\ No newline at end of file
+        self.fields['permissions'].queryset = Permission.objects.select_related('content_type').all().order_by('content_type__app_label', 'codename')
+
+class EventSearchForm(forms.Form):
+    VIRTUAL_CHOICES = [
+        ('', 'Any Format'),
+        ('1', 'Virtual'),
+        ('0', 'In Person'),
+    ]
+
+    q = forms.CharField(required=False, max_length=200)
+    category = forms.SlugField(required=False)
+    date_from = forms.DateField(required=False)
+    date_to = forms.DateField(required=False)
+    min_price = forms.DecimalField(required=False, min_value=0, max_digits=8, decimal_places=2)
+    max_price = forms.DecimalField(required=False, min_value=0, max_digits=8, decimal_places=2)
+    is_virtual = forms.ChoiceField(required=False, choices=VIRTUAL_CHOICES)
+    tags = forms.CharField(required=False, max_length=200)  # comma separated; events must have all of them
+
+    def clean_tags(self):
+        return normalize_tags(self.cleaned_data['tags'])
+
+
+class EventImportForm(forms.ModelForm):
+    """Validates one imported event row; ``category`` is a slug resolved by events.importer."""
+    category = forms.SlugField()
+
+    class Meta:
+        model = Event
+        fields = [
+            'title', 'slug', 'description', 'about', 'date', 'time', 'location', 'address',
+            'is_virtual', 'tags', 'capacity', 'price', 'is_featured',
+        ]
+
+    def validate_unique(self):
+        # Slugs are checked for a whole batch at once by events.importer
+        pass
+
+
+class SpeakerImportForm(forms.ModelForm):
+    class Meta:
+        model = Speaker
+        fields = ['name', 'role', 'bio', 'order']
+
+
+class ScheduleImportForm(forms.ModelForm):
+    class Meta:
+        model = Schedule
+        fields = ['time', 'title', 'description', 'day', 'location', 'order']
+
+
+class EventImportUploadForm(forms.Form):
+    file = forms.FileField(
+        help_text="CSV, JSON array or JSON Lines",
+        widget=forms.FileInput(attrs={'class': 'w-full text-gray-400', 'accept': '.csv,.json,.jsonl,.ndjson'}),
+    )
+
+    def clean_file(self):
+        file = self.cleaned_data['file']
+        if not file.name.lower().endswith(('.csv', '.json', '.jsonl', '.ndjson')):
+            raise forms.ValidationError("Upload a .csv, .json or .jsonl file.")
+        return file
+
+
+class AttendeeExportForm(forms.Form):
+    STATUS_CHOICES = [('', 'Any Status')] + EventParticipant.STATUS_CHOICES
+
+    status = forms.ChoiceField(required=False, choices=STATUS_CHOICES)
+    joined_from = forms.DateField(required=False)
+    joined_to = forms.DateField(required=False)
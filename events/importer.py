@@ -0,0 +1,204 @@
+import csv
+import json
+from itertools import islice
+
+from django.db import DatabaseError, transaction
+
+from core.cache import invalidate_sections
+from events.counters import events_created
+from events.forms import EventImportForm, ScheduleImportForm, SpeakerImportForm
+from events.models import Category, Event, Schedule, Speaker
+from events.page_cache import bump_all_event_versions, bump_catalog_version
+from events.tags import sync_event_tags
+
+
+BATCH_SIZE = 500
+READ_SIZE = 64 * 1024
+NESTED = {'speakers': SpeakerImportForm, 'schedules': ScheduleImportForm}
+
+
+class ImportReport:
+    def __init__(self):
+        self.created = 0
+        self.errors = []  # (row number, message)
+
+    def add_error(self, row, message):
+        self.errors.append((row, message))
+
+
+def detect_format(filename):
+    name = filename.lower()
+    if name.endswith('.csv'):
+        return 'csv'
+    if name.endswith(('.json', '.jsonl', '.ndjson')):
+        return 'json'
+    raise ValueError(f"Can't tell the format of {filename}; use .csv, .json or .jsonl")
+
+
+def _csv_rows(f):
+    """Rows of a CSV file; ``speakers``/``schedules`` cells hold JSON lists, ``tags`` is comma separated."""
+    for row in csv.DictReader(f):
+        row = {key: value for key, value in row.items() if key and value not in (None, '')}
+        for key in NESTED:
+            if key in row:
+                try:
+                    row[key] = json.loads(row[key])
+                except ValueError:
+                    pass  # reported as an invalid list by _check_row
+        if 'tags' in row and not row['tags'].lstrip().startswith('['):
+            row['tags'] = [tag.strip() for tag in row['tags'].split(',') if tag.strip()]
+        yield row
+
+
+def _json_rows(f):
+    """Objects of a JSON array or a JSON Lines file, decoded one at a time without loading the file."""
+    decoder = json.JSONDecoder()
+    buffer = f.read(READ_SIZE).lstrip()
+    in_array = buffer.startswith('[')
+    if in_array:
+        buffer = buffer[1:]
+    eof = False
+    while True:
+        buffer = buffer.lstrip()
+        if in_array and buffer.startswith(','):
+            buffer = buffer[1:].lstrip()
+        if in_array and buffer.startswith(']'):
+            return
+        if not buffer and eof:
+            if in_array:
+                raise ValueError("The JSON array is not closed")
+            return
+        try:
+            item, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError as e:
+            if eof:
+                raise ValueError(f"Invalid JSON: {e}")
+            chunk = f.read(READ_SIZE)
+            eof = not chunk
+            buffer += chunk
+            continue
+        # A value that ends exactly at the buffer's edge may continue in the next chunk
+        if end == len(buffer) and not eof and not isinstance(item, (dict, list)):
+            chunk = f.read(READ_SIZE)
+            eof = not chunk
+            buffer += chunk
+            continue
+        yield item
+        buffer = buffer[end:]
+
+
+def read_rows(f, fmt):
+    """Stream row dicts out of the text file ``f``."""
+    return _csv_rows(f) if fmt == 'csv' else _json_rows(f)
+
+
+def _errors(form, prefix=''):
+    return '; '.join(
+        f"{prefix}{'' if field == '__all__' else field + ': '}{' '.join(messages)}"
+        for field, messages in form.errors.items()
+    )
+
+
+def _check_row(row):
+    """Validated (event form, speaker forms, schedule forms), or an error message."""
+    if not isinstance(row, dict):
+        return "not an object"
+    form = EventImportForm(row)
+    problems = [] if form.is_valid() else [_errors(form)]
+    nested = {}
+    for key, form_class in NESTED.items():
+        items = row.get(key) or []
+        if not isinstance(items, list):
+            problems.append(f"{key}: must be a list")
+            continue
+        nested[key] = []
+        for i, item in enumerate(items, start=1):
+            item_form = form_class(item if isinstance(item, dict) else {})
+            if item_form.is_valid():
+                nested[key].append(item_form)
+            else:
+                problems.append(_errors(item_form, f"{key}[{i}] "))
+    if problems:
+        return '; '.join(problems)
+    return form, nested['speakers'], nested['schedules']
+
+
+def _import_batch(batch, organizer, categories, seen_slugs, report):
+    checked = []
+    for number, row in batch:
+        result = _check_row(row)
+        if isinstance(result, str):
+            report.add_error(number, result)
+        else:
+            checked.append((number, *result))
+
+    # One query each for the batch's unknown category slugs and its slugs already taken
+    wanted = {form.cleaned_data['category'] for _, form, _, _ in checked} - categories.keys()
+    if wanted:
+        found = Category.objects.filter(slug__in=wanted).in_bulk(field_name='slug')
+        categories.update({slug: found.get(slug) for slug in wanted})
+    taken = set(Event.objects.filter(
+        slug__in=[form.cleaned_data['slug'] for _, form, _, _ in checked]
+    ).values_list('slug', flat=True))
+
+    rows = []
+    for number, form, speakers, schedules in checked:
+        slug = form.cleaned_data['slug']
+        category = categories[form.cleaned_data['category']]
+        if category is None:
+            report.add_error(number, f"category: no category with slug '{form.cleaned_data['category']}'")
+        elif slug in taken or slug in seen_slugs:
+            report.add_error(number, f"slug: an event with slug '{slug}' already exists")
+        else:
+            seen_slugs.add(slug)
+            event = form.save(commit=False)
+            event.category = category
+            event.organizer = organizer
+            rows.append((number, event, speakers, schedules))
+    if not rows:
+        return
+
+    try:
+        with transaction.atomic():
+            events = Event.objects.bulk_create([event for _, event, _, _ in rows])
+            speakers, schedules = [], []
+            for event, (_, _, speaker_forms, schedule_forms) in zip(events, rows):
+                for form in speaker_forms:
+                    form.instance.event = event
+                    speakers.append(form.instance)
+                for form in schedule_forms:
+                    form.instance.event = event
+                    schedules.append(form.instance)
+            Speaker.objects.bulk_create(speakers)
+            Schedule.objects.bulk_create(schedules)
+            events_created(events)
+            sync_event_tags(events)
+    except DatabaseError as e:
+        for number, event, _, _ in rows:
+            seen_slugs.discard(event.slug)
+            report.add_error(number, f"not saved, the batch failed: {e}")
+        return
+    report.created += len(events)
+
+
+def import_events(rows, organizer, batch_size=BATCH_SIZE):
+    """Create events (with nested speakers and schedules) from row dicts, ``batch_size`` at a time.
+
+    Each batch is validated together and written with ``bulk_create`` in its
+    own transaction. Invalid rows are reported in the returned
+    ``ImportReport`` and skipped; the rest of their batch is still saved.
+    """
+    report = ImportReport()
+    categories = {}
+    seen_slugs = set()
+    numbered = enumerate(rows, start=1)
+    while batch := list(islice(numbered, batch_size)):
+        _import_batch(batch, organizer, categories, seen_slugs, report)
+    report.errors.sort(key=lambda error: error[0])
+
+    if report.created:
+        # bulk_create sends no post_save, so drop what core.signals and events.signals would have
+        invalidate_sections('featured', 'categories', 'stats', 'related_events', 'tags')
+        bump_all_event_versions()
+        bump_catalog_version()
+    return report
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from events.export import attendees_of_category, attendees_of_event, filter_attendees, stream_attendees_csv
+from events.forms import AttendeeExportForm
+
+
+class Command(BaseCommand):
+    help = "Write the attendees of an event or category as CSV, streaming rows from the database"
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument('--event', type=int, help="Event id")
+        target.add_argument('--category', type=int, help="Category id")
+        parser.add_argument('--status', default='')
+        parser.add_argument('--joined-from', default='', help="YYYY-MM-DD")
+        parser.add_argument('--joined-to', default='', help="YYYY-MM-DD")
+        parser.add_argument('--output', help="File to write; defaults to stdout")
+
+    def handle(self, *args, **options):
+        form = AttendeeExportForm({
+            'status': options['status'],
+            'joined_from': options['joined_from'],
+            'joined_to': options['joined_to'],
+        })
+        if not form.is_valid():
+            raise CommandError('; '.join(f"{field}: {' '.join(errors)}" for field, errors in form.errors.items()))
+
+        if options['event']:
+            participants = attendees_of_event(options['event'])
+        else:
+            participants = attendees_of_category(options['category'])
+        lines = stream_attendees_csv(filter_attendees(participants, form.cleaned_data))
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as f:
+                f.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from events.fanout import run_pending_fanouts
+
+
+class Command(BaseCommand):
+    help = "Send queued event_update notifications to participants and savers"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--loop', action='store_true', help="Keep polling for new fan-outs instead of exiting")
+        parser.add_argument('--interval', type=float, default=5.0, help="Seconds to sleep between polls with --loop")
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                finished = run_pending_fanouts(options['chunk_size'])
+            finally:
+                close_old_connections()
+
+            if finished:
+                self.stdout.write(f"Processed {finished} event update fan-outs")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
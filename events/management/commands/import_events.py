@@ -0,0 +1,32 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from events.importer import BATCH_SIZE, detect_format, import_events, read_rows
+
+
+class Command(BaseCommand):
+    help = "Import events with nested speakers and schedules from a CSV, JSON array or JSON Lines file"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'json'], help="Defaults to the file's extension")
+        parser.add_argument('--organizer', required=True, help="Username set as the organizer of every imported event")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            organizer = User.objects.get(username=options['organizer'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['organizer']}")
+
+        try:
+            fmt = options['format'] or detect_format(options['path'])
+            with open(options['path'], encoding='utf-8-sig', newline='') as f:
+                report = import_events(read_rows(f, fmt), organizer, options['batch_size'])
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        for row, message in report.errors:
+            self.stderr.write(f"Row {row}: {message}")
+        self.stdout.write(f"Imported {report.created} events, skipped {len(report.errors)} rows")
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from events.counters import RECONCILE_BATCH_SIZE, reconcile
+from events.page_cache import bump_catalog_version
+
+
+class Command(BaseCommand):
+    help = "Recount the denormalized participant and event counters and repair any that drifted"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=RECONCILE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        repaired = reconcile(batch_size=options['batch_size'])
+        if any(repaired.values()):
+            bump_catalog_version()  # bulk_update sends no signals
+        self.stdout.write(self.style.SUCCESS(
+            f"Repaired {repaired['events']} events and {repaired['categories']} categories"
+        ))
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:37
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+STATUS_COUNTERS = {
+    'going': 'registered',
+    'interested': 'interested_count',
+    'attended': 'attended_count',
+    'cancelled': 'cancelled_count',
+}
+
+
+def _count(queryset, outer_field):
+    # COUNT(*) of the rows pointing at the outer row, as a correlated subquery
+    counted = queryset.filter(**{outer_field: OuterRef('pk')}).order_by().values(outer_field)
+    return Coalesce(
+        Subquery(counted.annotate(n=Count('pk')).values('n'), output_field=IntegerField()), Value(0)
+    )
+
+
+def count_existing_rows(apps, schema_editor):
+    Category = apps.get_model('events', 'Category')
+    Event = apps.get_model('events', 'Event')
+    EventParticipant = apps.get_model('events', 'EventParticipant')
+    Category.objects.update(event_count=_count(Event.objects.all(), 'category'))
+    Event.objects.update(**{
+        field: _count(EventParticipant.objects.filter(status=status), 'event')
+        for status, field in STATUS_COUNTERS.items()
+    })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0014_waitlist'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='event',
+            name='attendees',
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='event_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='attended_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='cancelled_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='interested_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_existing_rows, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='event',
+            name='registered',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
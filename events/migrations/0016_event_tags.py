@@ -0,0 +1,52 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Copied from events.tags as they were when this migration was written; migrations don't import app code
+BATCH_SIZE = 1000
+TAG_MAX_LENGTH = 50
+
+
+def normalize_tags(tags):
+    if isinstance(tags, str):
+        tags = tags.split(',')
+    if not isinstance(tags, (list, tuple)):
+        return []
+    names = (str(tag).strip().lower()[:TAG_MAX_LENGTH] for tag in tags if tag is not None)
+    return sorted({name for name in names if name})
+
+
+def index_existing_tags(apps, schema_editor):
+    Event = apps.get_model('events', 'Event')
+    EventTag = apps.get_model('events', 'EventTag')
+    rows = []
+    for event_id, tags in Event.objects.exclude(tags=None).values_list('id', 'tags').iterator(chunk_size=BATCH_SIZE):
+        rows.extend(EventTag(event_id=event_id, name=name) for name in normalize_tags(tags))
+        if len(rows) >= BATCH_SIZE:
+            EventTag.objects.bulk_create(rows)
+            rows = []
+    EventTag.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0015_denormalized_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_rows', to='events.event')),
+            ],
+            options={
+                'unique_together': {('name', 'event')},
+            },
+        ),
+        migrations.RunPython(index_existing_tags, migrations.RunPython.noop),
+    ]
@@ -1,16 +1,36 @@
 from django.db import models
+from django.db.models import Q
 from django.conf import settings
 from django.utils import timezone
 
+# Event columns only ever changed by events.counters, with UPDATE ... SET n = n + 1
+COUNTER_FIELDS = ['registered', 'interested_count', 'attended_count', 'cancelled_count', 'waitlist_tail']
+
+
+def _skip_counters(instance, kwargs, counters):
+    """Leave ``counters`` out of a full save of an existing row, so a stale instance can't overwrite them."""
+    if not instance._state.adding and kwargs.get('update_fields') is None:
+        skipped = set(counters) | instance.get_deferred_fields()
+        kwargs['update_fields'] = [
+            field.name for field in instance._meta.concrete_fields
+            if not field.primary_key and field.attname not in skipped and field.name not in skipped
+        ]
+
+
 class Category(models.Model):
     name = models.CharField(max_length=100)
     slug = models.SlugField(unique=True)
     description = models.TextField(blank=True)
     icon = models.CharField(max_length=50, blank=True)  # frontend icon mapping
+    event_count = models.PositiveIntegerField(default=0, editable=False)  # kept by events.counters
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        _skip_counters(self, kwargs, ['event_count'])
+        super().save(*args, **kwargs)
+
 
 class Event(models.Model):
     title = models.CharField(max_length=255)
@@ -32,32 +52,59 @@ class Event(models.Model):
     tags = models.JSONField(blank=True, null=True)
 
     image = models.ImageField(upload_to='event_asset', default='event_asset/default_img.jpg')
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)  # filled by core.images
 
     capacity = models.PositiveIntegerField(default=0)
-    attendees = models.PositiveIntegerField(default=0, blank=True, null=True)
-    registered = models.PositiveIntegerField(default=0, blank=True, null=True)
     price = models.DecimalField(max_digits=8, decimal_places=2, default=0.00, blank=True, null=True)
     is_featured = models.BooleanField(default=False)
 
+    # Participants per status, kept by events.counters; ``registered`` is the "going" count seats are checked against
+    registered = models.PositiveIntegerField(default=0, editable=False)
+    interested_count = models.PositiveIntegerField(default=0, editable=False)
+    attended_count = models.PositiveIntegerField(default=0, editable=False)
+    cancelled_count = models.PositiveIntegerField(default=0, editable=False)
+    waitlist_tail = models.PositiveBigIntegerField(default=0, editable=False)  # last position handed out, see events.rsvp
+
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # core.stats looks for recent changes
+
+    class Meta:
+        # Listings page through (date, id); see core.pagination
+        indexes = [
+            models.Index(fields=['date', 'id'], name='event_date_idx'),
+            models.Index(fields=['category', 'date', 'id'], name='event_category_date_idx'),
+            models.Index(fields=['date'], condition=Q(is_featured=True), name='event_featured_idx'),
+        ]
 
     def __str__(self):
         return self.title
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'category_id' in instance.__dict__:
+            # The category events.counters has this event counted under
+            instance._counted_category_id = instance.category_id
+        if 'tags' in instance.__dict__:
+            # What the EventTag rows were written from, see events.tags
+            instance._indexed_tags = instance.tags
+        return instance
+
+    def save(self, *args, **kwargs):
+        _skip_counters(self, kwargs, COUNTER_FIELDS)
+        super().save(*args, **kwargs)
     
     @property
     def spots_left(self):
         """Calculate remaining spots"""
-        registered_count = self.registered if self.registered else 0
-        return max(0, self.capacity - registered_count)
+        return max(0, self.capacity - self.registered)
     
     @property
     def percent_filled(self):
         """Calculate percentage filled"""
         if self.capacity == 0:
             return 0
-        registered_count = self.registered if self.registered else 0
-        return (registered_count / self.capacity) * 100
+        return (self.registered / self.capacity) * 100
     
     @property
     def is_upcoming(self):
@@ -77,6 +124,7 @@ class Speaker(models.Model):
     name = models.CharField(max_length=255)
     role = models.CharField(max_length=255)
     avatar = models.ImageField(upload_to='avatars', default='event_asset/default_img.jpg')
+    avatar_variants = models.JSONField(default=dict, blank=True, editable=False)  # filled by core.images
     bio = models.TextField(blank=True, null=True)
     order = models.IntegerField(default=0)  # For ordering speakers
 
@@ -127,16 +175,48 @@ class EventParticipant(models.Model):
     )
     
     joined_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # core.stats looks for recent changes
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'status' in instance.__dict__:
+            # The status events.counters has this participant counted under
+            instance._counted_status = instance.status
+        return instance
 
     class Meta:
         unique_together = ('user', 'event')
         ordering = ['-joined_at']
+        indexes = [
+            models.Index(fields=['user', 'status'], name='participant_user_status_idx'),
+            # Attendee exports walk one event's participants in join order
+            models.Index(fields=['event', 'joined_at', 'id'], name='participant_event_joined_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.event.title} ({self.status})"
 
 
+class WaitlistEntry(models.Model):
+    """A user queued for a seat at a full event; the lowest ``position`` is promoted first.
+
+    Positions only grow and are never renumbered, so joining, leaving and
+    promoting each touch a single row however long the queue is.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='waitlist_entries')
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='waitlist')
+    position = models.PositiveBigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = [('user', 'event'), ('event', 'position')]
+        ordering = ['event', 'position']
+
+    def __str__(self):
+        return f"{self.user.username} waiting for {self.event.title} (#{self.position})"
+
+
 class SavedEvent(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='saved_events')
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='saved_by_users')
@@ -145,6 +225,9 @@ class SavedEvent(models.Model):
     class Meta:
         unique_together = ('user', 'event')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='saved_user_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} saved {self.event.title}"
@@ -156,6 +239,7 @@ class Notification(models.Model):
         ('rsvp_confirmation', 'RSVP Confirmation'),
         ('event_update', 'Event Update'),
         ('new_follower', 'New Follower'),
+        ('waitlist_promoted', 'Waitlist Promotion'),
     ]
     
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='notifications')
@@ -168,6 +252,11 @@ class Notification(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='notification_user_created_idx'),
+            # The unread badge and "unread" filter only ever look at a small slice
+            models.Index(fields=['user', '-created_at'], condition=Q(is_read=False), name='notification_unread_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username}: {self.title}"
@@ -184,11 +273,57 @@ class UserActivity(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='activities')
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='activities')
     activity_type = models.CharField(max_length=20, choices=ACTIVITY_TYPES)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add: rows written later by events.activity keep the time they were logged
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     
     class Meta:
         ordering = ['-created_at']
         verbose_name_plural = "User activities"
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='activity_user_created_idx'),
+        ]
     
     def __str__(self):
-        return f"{self.user.username} {self.activity_type} {self.event.title}"
\ No newline at end of file
+        return f"{self.user.username} {self.activity_type} {self.event.title}"
+
+class EventUpdateFanout(models.Model):
+    """An ``event_update`` notification waiting to be copied to everyone following an event.
+
+    ``last_user_id`` is the resume point: users are notified in ascending id
+    order and the cursor moves in the same transaction as each chunk.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+    ]
+
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='update_fanouts')
+    title = models.CharField(max_length=255)
+    message = models.TextField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    last_user_id = models.BigIntegerField(default=0)
+    notified = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.event.title}: {self.title} ({self.status})"
+
+
+class EventTag(models.Model):
+    """One normalized tag of an event, mirroring ``Event.tags`` so tag lookups and counts use an index.
+
+    Written by events.tags whenever an event's tags change; never edit these directly.
+    """
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='tag_rows')
+    name = models.CharField(max_length=50)
+
+    class Meta:
+        # Leading with the name serves both "events tagged x" and the counts of the tag cloud
+        unique_together = ('name', 'event')
+
+    def __str__(self):
+        return f"{self.name} ({self.event_id})"
@@ -0,0 +1,87 @@
+import datetime
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from core.cache import cache_is_shared
+
+
+DETAIL_BODY_TIMEOUT = 60 * 60
+# With a per-process cache (no REDIS_URL) the other workers never see a bump, so versions, and the
+# bodies and ETags they name, expire this soon instead of living until the next bump
+LOCAL_VERSION_TIMEOUT = 60
+
+# Swapped for the per-user RSVP/save buttons after the shared body comes out of the cache
+ACTIONS_SLOT = '<!--event-actions-->'
+
+# Bumped by any Event or Category change, since every body lists the related events
+ALL_EVENTS_VERSION_KEY = 'event:detail:version'
+
+# Bumped by any Event, Category or EventParticipant change (seat counts show in the listings)
+CATALOG_VERSION_KEY = 'catalog:version'
+
+
+def event_version_key(event_id):
+    return f'event:{event_id}:detail:version'
+
+
+def version_timeout():
+    # Versions must outlive the bodies they name
+    return None if cache_is_shared() else LOCAL_VERSION_TIMEOUT
+
+
+def detail_body_timeout():
+    return DETAIL_BODY_TIMEOUT if cache_is_shared() else LOCAL_VERSION_TIMEOUT
+
+
+def _new_version():
+    # Time based, so a version key that was evicted never comes back as a number an old body used
+    return time.time_ns()
+
+
+def _bump_on_commit(key):
+    # A version bumped before the writer commits could be read by a request that still sees the
+    # old rows, which would then cache them under the new version
+    transaction.on_commit(lambda: cache.set(key, _new_version(), version_timeout()))
+
+
+def bump_event_version(event_id):
+    """Retire the cached detail body of one event once the current transaction commits."""
+    _bump_on_commit(event_version_key(event_id))
+
+
+def bump_all_event_versions():
+    _bump_on_commit(ALL_EVENTS_VERSION_KEY)
+
+
+def bump_catalog_version():
+    """Retire the ETags of the listing pages and API (see ``catalog_validators``)."""
+    _bump_on_commit(CATALOG_VERSION_KEY)
+
+
+async def adetail_body_key(event_id):
+    """Cache key of the event's current detail body, starting its versions if needed."""
+    keys = [event_version_key(event_id), ALL_EVENTS_VERSION_KEY]
+    versions = await cache.aget_many(keys)
+    for key in keys:
+        if key not in versions:
+            await cache.aadd(key, _new_version(), version_timeout())
+            versions[key] = await cache.aget(key)
+    return f'event:{event_id}:detail:{versions[keys[0]]}:{versions[keys[1]]}'
+
+
+async def catalog_validators(request, category_id=None):
+    """Version and last change of the catalog, from the version key alone.
+
+    One version covers every listing, so a category page is revalidated
+    after changes elsewhere too. A missing category needs no check of its
+    own: its 404 never carries an ETag to match.
+    """
+    version = await cache.aget(CATALOG_VERSION_KEY)
+    if version is None:
+        # A version started now is no older than the last change, whenever that was
+        await cache.aadd(CATALOG_VERSION_KEY, _new_version(), version_timeout())
+        version = await cache.aget(CATALOG_VERSION_KEY)
+    # The version is the time of the bump, which doubles as Last-Modified
+    return str(version), datetime.datetime.fromtimestamp(version / 1e9, tz=datetime.timezone.utc)
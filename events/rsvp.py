@@ -0,0 +1,140 @@
+from django.db import IntegrityError, transaction
+
+from events.activity import log_activity
+from events.counters import has_free_seat
+from events.models import Event, EventParticipant, Notification, WaitlistEntry
+
+
+class EventFull(Exception):
+    pass
+
+
+class AlreadyRegistered(Exception):
+    pass
+
+
+class SeatsAvailable(Exception):
+    pass
+
+
+def _take_seat(user, event):
+    """Add ``user`` as going, or raise ``EventFull`` / ``AlreadyRegistered`` leaving nothing behind."""
+    try:
+        with transaction.atomic():
+            participant = EventParticipant.objects.create(user=user, event=event, status='going')
+            # Saving the row bumped the going counter (events.counters) under the event's row lock;
+            # if that went past capacity the savepoint takes both back
+            if not has_free_seat(event.id):
+                raise EventFull(event.title)
+    except IntegrityError:
+        raise AlreadyRegistered(event.title)
+    return participant
+
+
+@transaction.atomic
+def join_event(user, event):
+    """RSVP ``user`` to ``event`` or raise ``EventFull`` / ``AlreadyRegistered``.
+
+    The seat is counted with a single UPDATE and checked against the capacity
+    afterwards, so two concurrent requests can never both take the last seat,
+    and the participant and notification rows are written in the same
+    transaction. The activity is logged once it commits. A capacity of 0
+    means the event has no limit.
+    """
+    participant = _take_seat(user, event)
+
+    log_activity(user, event, 'rsvp')
+    Notification.objects.create(
+        user=user,
+        event=event,
+        notification_type='rsvp_confirmation',
+        title='RSVP Confirmed',
+        message=f'Your RSVP for {event.title} has been confirmed.'
+    )
+    return participant
+
+
+@transaction.atomic
+def cancel_rsvp(user, event):
+    """Remove ``user``'s RSVP and give the seat back. Returns False if there was none."""
+    participant = EventParticipant.objects.select_for_update().filter(user=user, event=event).first()
+    if participant is None:
+        return False
+
+    participant.delete()  # events.counters gives the seat back
+    if participant.status == 'going':
+        promote_from_waitlist(event)
+
+    log_activity(user, event, 'cancel')
+    return True
+
+
+@transaction.atomic
+def join_waitlist(user, event):
+    """Queue ``user`` for the next free seat at a full event and return their ``WaitlistEntry``.
+
+    Raises ``SeatsAvailable`` if the event isn't full and ``AlreadyRegistered``
+    if the user already has a seat. Joining twice returns the existing entry.
+    """
+    # Holding the event row orders this against cancel_rsvp, so nobody queues behind a seat that was just freed
+    locked = Event.objects.select_for_update().only('capacity', 'registered', 'waitlist_tail').get(id=event.id)
+    if locked.capacity == 0 or locked.registered < locked.capacity:
+        raise SeatsAvailable(event.title)
+    if EventParticipant.objects.filter(user=user, event=event, status='going').exists():
+        raise AlreadyRegistered(event.title)
+
+    entry = WaitlistEntry.objects.filter(user=user, event=event).first()
+    if entry is None:
+        position = locked.waitlist_tail + 1
+        Event.objects.filter(id=event.id).update(waitlist_tail=position)
+        entry = WaitlistEntry.objects.create(user=user, event=event, position=position)
+    return entry
+
+
+def leave_waitlist(user, event):
+    """Take ``user`` off the event's waitlist. Returns False if they weren't on it."""
+    deleted, _ = WaitlistEntry.objects.filter(user=user, event=event).delete()
+    return bool(deleted)
+
+
+def promote_from_waitlist(event):
+    """Give a free seat to whoever has waited longest and return their new participant.
+
+    Call it inside the transaction that freed the seat. Returns None when
+    nobody is waiting or there's no seat left. The head of the queue is found
+    through the (event, position) index, so a promotion costs the same with
+    ten people waiting or ten thousand.
+    """
+    while True:
+        entry = WaitlistEntry.objects.select_for_update().select_related('user').filter(event=event).first()
+        if entry is None:
+            return None
+        try:
+            participant = _take_seat(entry.user, event)
+        except EventFull:
+            return None
+        except AlreadyRegistered:
+            # They hold some other RSVP row for this event already; the seat goes to the next in line
+            entry.delete()
+            continue
+        entry.delete()
+        break
+
+    log_activity(entry.user, event, 'rsvp')
+    Notification.objects.create(
+        user=entry.user,
+        event=event,
+        notification_type='waitlist_promoted',
+        title='You\'re off the Waitlist',
+        message=f'A seat opened up for {event.title} and your RSVP is confirmed.'
+    )
+    return participant
+
+
+def fill_from_waitlist(event):
+    """Promote waiting users into every free seat, e.g. after the capacity was raised. Returns how many."""
+    promoted = 0
+    with transaction.atomic():
+        while promote_from_waitlist(event):
+            promoted += 1
+    return promoted
@@ -0,0 +1,161 @@
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from events.models import Event
+from events.tags import filter_by_tags
+
+
+# Weights used for ranking: title, description, about, location, tags
+PG_WEIGHTS = [
+    ("title", "A"),
+    ("description", "B"),
+    ("about", "C"),
+    ("location", "B"),
+    ("tags", "D"),
+]
+FTS_WEIGHTS = "10.0, 4.0, 2.0, 4.0, 1.0"
+FTS_TABLE = "events_event_fts"
+
+SEARCH_FIELDS = ["title", "description", "about", "location", "tags"]
+
+
+def _pg_vector_sql():
+    parts = []
+    for column, weight in PG_WEIGHTS:
+        value = "tags::text" if column == "tags" else column
+        parts.append(f"setweight(to_tsvector('english', coalesce({value}, '')), '{weight}')")
+    return " || ".join(parts)
+
+
+def install_search_index(connection):
+    """Create the search vector (PostgreSQL) or FTS5 shadow table (SQLite).
+
+    Safe to call repeatedly. On SQLite the triggers are dropped whenever Django
+    rebuilds ``events_event`` during a migration, so this also runs after
+    every ``migrate`` and re-syncs the shadow table when that happens.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                "ALTER TABLE events_event ADD COLUMN IF NOT EXISTS search_vector tsvector "
+                f"GENERATED ALWAYS AS ({_pg_vector_sql()}) STORED"
+            )
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS events_event_search_vector_gin "
+                "ON events_event USING GIN (search_vector)"
+            )
+
+        elif connection.vendor == "sqlite":
+            cursor.execute(
+                "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s",
+                [FTS_TABLE + "_%"],
+            )
+            triggers_present = cursor.fetchone()[0] == 3
+
+            columns = ", ".join(SEARCH_FIELDS)
+            new_values = ", ".join(f"new.{c}" for c in SEARCH_FIELDS)
+            old_values = ", ".join(f"old.{c}" for c in SEARCH_FIELDS)
+
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                f"{columns}, content='events_event', content_rowid='id', "
+                "tokenize='porter unicode61')"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON events_event BEGIN "
+                f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values}); END"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON events_event BEGIN "
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) "
+                f"VALUES ('delete', old.id, {old_values}); END"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON events_event BEGIN "
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) "
+                f"VALUES ('delete', old.id, {old_values}); "
+                f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values}); END"
+            )
+
+            if not triggers_present:
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def _fts_query(q):
+    """Turn free text into a safe FTS5 query: every word must match, as a prefix."""
+    words = re.findall(r"\w+", q)
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def search_events(queryset, q):
+    """Filter ``queryset`` to events matching ``q`` and order them by relevance."""
+    q = (q or "").strip()
+    if not q:
+        return queryset
+
+    if connection.vendor == "postgresql":
+        tsquery = "websearch_to_tsquery('english', %s)"
+        return queryset.annotate(
+            matched=RawSQL(f"events_event.search_vector @@ {tsquery}", (q,), output_field=BooleanField()),
+            rank=RawSQL(f"ts_rank(events_event.search_vector, {tsquery})", (q,), output_field=FloatField()),
+        ).filter(matched=True).order_by("-rank", "date", "id")
+
+    if connection.vendor == "sqlite":
+        match = _fts_query(q)
+        if not match:
+            return queryset.none()
+        # Drive the query from the FTS index: the IN subquery runs MATCH once and
+        # the events are then fetched by primary key.  bm25() only works inside
+        # a MATCH query, so the rank is looked up per matched row by rowid.
+        # bm25() is lower-is-better, so negate it to keep "-rank" meaning "best first".
+        return queryset.filter(
+            id__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (match,)),
+        ).annotate(
+            rank=RawSQL(
+                f"SELECT -bm25({FTS_TABLE}, {FTS_WEIGHTS}) FROM {FTS_TABLE} "
+                f"WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = events_event.id",
+                (match,),
+                output_field=FloatField(),
+            ),
+        ).order_by("-rank", "date", "id")
+
+    # Other backends: plain substring matching.  Every match ranks the same, but
+    # the annotation keeps the "-rank" ordering used by the listing valid.
+    condition = Q()
+    for word in q.split():
+        word_match = Q()
+        for field in SEARCH_FIELDS:
+            word_match |= Q(**{f"{field}__icontains": word})
+        condition &= word_match
+    return queryset.filter(condition).annotate(
+        rank=Value(0.0, output_field=FloatField()),
+    ).order_by("-rank", "date", "id")
+
+
+def filter_events(data):
+    """Build the event listing queryset from cleaned ``EventSearchForm`` data."""
+    events = Event.objects.select_related("category")
+
+    if data.get("category"):
+        events = events.filter(category__slug=data["category"])
+    if data.get("date_from"):
+        events = events.filter(date__gte=data["date_from"])
+    if data.get("date_to"):
+        events = events.filter(date__lte=data["date_to"])
+    if data.get("min_price") is not None:
+        events = events.filter(price__gte=data["min_price"])
+    if data.get("max_price") is not None:
+        events = events.filter(price__lte=data["max_price"])
+    if data.get("is_virtual") == "1":
+        events = events.filter(is_virtual=True)
+    elif data.get("is_virtual") == "0":
+        events = events.filter(is_virtual=False)
+    if data.get("tags"):
+        events = filter_by_tags(events, data["tags"])
+
+    if data.get("q"):
+        return search_events(events, data["q"])
+    return events.order_by("date", "id")
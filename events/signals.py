@@ -0,0 +1,97 @@
+import atexit
+
+from django.core.signals import request_finished
+from django.db import connections
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+from events.activity import activity_buffer
+from events.counters import count_events, count_participant
+from events.models import Category, Event, EventParticipant, Schedule, Speaker
+from events.page_cache import bump_all_event_versions, bump_catalog_version, bump_event_version
+from events.search import install_search_index
+from events.tags import normalize_tags, sync_event_tags
+
+
+@receiver(post_migrate)
+def ensure_search_index(sender, using, **kwargs):
+    # Table rebuilds during SQLite migrations drop the FTS triggers, put them back
+    if sender.name == 'events':
+        install_search_index(connections[using])
+
+
+def retire_event_page(sender, instance, **kwargs):
+    bump_event_version(instance.pk if sender is Event else instance.event_id)
+
+
+def retire_all_event_pages(sender, **kwargs):
+    # Every detail page shows the related events and its category's name
+    bump_all_event_versions()
+
+
+for model in (Event, Speaker, Schedule, EventParticipant):
+    post_save.connect(retire_event_page, sender=model)
+    post_delete.connect(retire_event_page, sender=model)
+
+
+def retire_catalog(sender, **kwargs):
+    bump_catalog_version()
+
+
+for model in (Event, Category):
+    post_save.connect(retire_all_event_pages, sender=model)
+    post_delete.connect(retire_all_event_pages, sender=model)
+
+for model in (Event, Category, EventParticipant):
+    post_save.connect(retire_catalog, sender=model)
+    post_delete.connect(retire_catalog, sender=model)
+
+
+@receiver(post_save, sender=EventParticipant)
+def count_saved_participant(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Fixtures carry their counters already
+    if raw or update_fields is not None and 'status' not in update_fields:
+        return
+    # _counted_status is the status the counters hold for this row (set by from_db)
+    count_participant(instance.event_id, getattr(instance, '_counted_status', None), instance.status)
+    instance._counted_status = instance.status
+
+
+@receiver(post_delete, sender=EventParticipant)
+def count_deleted_participant(sender, instance, origin=None, **kwargs):
+    # Nothing to count when the event itself is being deleted
+    if not (isinstance(origin, Event) and origin.pk == instance.event_id):
+        count_participant(instance.event_id, getattr(instance, '_counted_status', instance.status), None)
+
+
+@receiver(post_save, sender=Event)
+def count_saved_event(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or update_fields is not None and 'category' not in update_fields:
+        return
+    old = getattr(instance, '_counted_category_id', None)
+    if old != instance.category_id:
+        count_events({old: -1, instance.category_id: 1})
+    instance._counted_category_id = instance.category_id
+
+
+@receiver(post_delete, sender=Event)
+def count_deleted_event(sender, instance, origin=None, **kwargs):
+    if not (isinstance(origin, Category) and origin.pk == instance.category_id):
+        count_events({getattr(instance, '_counted_category_id', instance.category_id): -1})
+
+
+@receiver(post_save, sender=Event)
+def index_event_tags(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'tags' not in update_fields:
+        return
+    if normalize_tags(instance.tags) != normalize_tags(getattr(instance, '_indexed_tags', None)):
+        sync_event_tags([instance])
+
+
+@receiver(request_finished)
+def flush_activity_buffer(sender, **kwargs):
+    # Runs after the response is sent, so buffered activity never delays the user
+    if len(activity_buffer):
+        activity_buffer.flush()
+
+
+atexit.register(activity_buffer.flush_at_exit)
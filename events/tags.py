@@ -0,0 +1,47 @@
+from django.db.models import Count
+
+from events.models import EventTag
+
+
+TAG_MAX_LENGTH = 50
+TAG_CLOUD_SIZE = 30
+SYNC_BATCH_SIZE = 1000
+
+
+def normalize_tags(tags):
+    """The distinct tag names of an ``Event.tags`` value, lowercased and trimmed, in a stable order."""
+    if isinstance(tags, str):
+        tags = tags.split(',')
+    if not isinstance(tags, (list, tuple)):
+        return []
+    names = (str(tag).strip().lower()[:TAG_MAX_LENGTH] for tag in tags if tag is not None)
+    return sorted({name for name in names if name})
+
+
+def sync_event_tags(events):
+    """Rewrite the EventTag rows of ``events`` from their ``tags``, two queries per batch.
+
+    Needed after ``bulk_create``/``update()``, which skip the post_save handler
+    in events.signals that keeps single saves in sync.
+    """
+    events = list(events)
+    for start in range(0, len(events), SYNC_BATCH_SIZE):
+        batch = events[start:start + SYNC_BATCH_SIZE]
+        EventTag.objects.filter(event__in=[event.pk for event in batch]).delete()
+        EventTag.objects.bulk_create([
+            EventTag(event_id=event.pk, name=name) for event in batch for name in normalize_tags(event.tags)
+        ])
+        for event in batch:
+            event._indexed_tags = event.tags
+
+
+def filter_by_tags(queryset, tags):
+    """Events of ``queryset`` carrying every one of ``tags``; each tag is an index lookup on EventTag."""
+    for name in normalize_tags(tags):
+        queryset = queryset.filter(id__in=EventTag.objects.filter(name=name).values('event_id'))
+    return queryset
+
+
+def tag_cloud(limit=TAG_CLOUD_SIZE):
+    """The ``limit`` most used tags as ``{'name', 'count'}`` rows, most used first."""
+    return EventTag.objects.values('name').annotate(count=Count('id')).order_by('-count', 'name')[:limit]
@@ -1,3 +1,1050 @@
-from django.test import TestCase
+import datetime
+import io
+import json
+import os
+import tempfile
+import threading
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.signals import request_finished
+from django.db import DatabaseError, OperationalError, connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.benchmark import ViewBenchmarkMixin
+from core.explain import QueryPlanMixin
+from core.seed import seed
+
+from events.activity import ActivityBuffer, activity_buffer
+from events.calendar import make_feed_token, reset_feed_token
+from events.counters import reconcile
+from events.forms import EventSearchForm
+from events.fanout import queue_event_update, run_fanout_chunk, run_pending_fanouts, snapshot
+from events import importer
+from events.importer import import_events, read_rows
+from events.models import (
+    Category, Event, EventParticipant, EventTag, EventUpdateFanout, Notification, SavedEvent, Schedule, Speaker,
+    UserActivity, WaitlistEntry,
+)
+from events.page_cache import (
+    DETAIL_BODY_TIMEOUT, LOCAL_VERSION_TIMEOUT, detail_body_timeout, event_version_key, version_timeout,
+)
+from events.rsvp import (
+    AlreadyRegistered, EventFull, SeatsAvailable, cancel_rsvp, fill_from_waitlist, join_event, join_waitlist,
+    leave_waitlist,
+)
+from events.search import filter_events
+from events.tags import filter_by_tags, tag_cloud
+from users.notifications import get_unread_count
+
+User = get_user_model()
+
+
+def make_event(capacity, **kwargs):
+    organizer = User.objects.create(username=f'organizer-{capacity}', email='organizer@example.com')
+    category = Category.objects.create(name='Tech', slug=f'tech-{capacity}')
+    return Event.objects.create(
+        title='Launch Party',
+        slug=f'launch-party-{capacity}',
+        category=category,
+        organizer=organizer,
+        description='Launch',
+        date=datetime.date(2030, 1, 1),
+        time=datetime.time(18, 0),
+        location='Dhaka',
+        capacity=capacity,
+        **kwargs
+    )
+
+
+class RSVPServiceTest(TestCase):
+    def setUp(self):
+        self.event = make_event(capacity=1)
+        self.user = User.objects.create(username='alice', email='alice@example.com')
+
+    def test_join_writes_participant_activity_and_notification(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            join_event(self.user, self.event)
+        activity_buffer.flush()
+
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registered, 1)
+        self.assertTrue(EventParticipant.objects.filter(user=self.user, event=self.event, status='going').exists())
+        self.assertTrue(UserActivity.objects.filter(user=self.user, event=self.event, activity_type='rsvp').exists())
+        self.assertTrue(Notification.objects.filter(user=self.user, notification_type='rsvp_confirmation').exists())
+
+    def test_join_refuses_over_capacity(self):
+        join_event(self.user, self.event)
+        other = User.objects.create(username='bob', email='bob@example.com')
+
+        with self.assertRaises(EventFull):
+            join_event(other, self.event)
+
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registered, 1)
+        self.assertFalse(EventParticipant.objects.filter(user=other).exists())
+
+    def test_double_join_does_not_change_counter(self):
+        self.event.capacity = 10
+        self.event.save()
+        join_event(self.user, self.event)
+
+        with self.assertRaises(AlreadyRegistered):
+            join_event(self.user, self.event)
+
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registered, 1)
+
+    def test_cancel_frees_the_seat(self):
+        join_event(self.user, self.event)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(cancel_rsvp(self.user, self.event))
+            self.assertFalse(cancel_rsvp(self.user, self.event))
+        activity_buffer.flush()
+
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registered, 0)
+        self.assertEqual(UserActivity.objects.filter(activity_type='cancel').count(), 1)
+
+
+class ActivityBufferTest(TestCase):
+    def setUp(self):
+        self.event = make_event(capacity=0)
+        self.user = User.objects.create(username='alice', email='alice@example.com')
+        spool_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(spool_dir.cleanup)
+        self.spool_path = os.path.join(spool_dir.name, 'activity.jsonl')
+
+    def buffer(self, **kwargs):
+        return ActivityBuffer(**{'max_size': 100, 'max_age': 60, 'spool_path': self.spool_path, **kwargs})
+
+    def logged(self):
+        return list(UserActivity.objects.order_by('id').values_list('activity_type', flat=True))
+
+    def test_flush_writes_rows_in_logged_order(self):
+        buffer = self.buffer()
+        for activity_type in ('save', 'rsvp', 'cancel'):
+            buffer.add(self.user.id, self.event.id, activity_type)
+        self.assertEqual(UserActivity.objects.count(), 0)
+
+        self.assertEqual(buffer.flush(), 3)
+        self.assertEqual(self.logged(), ['save', 'rsvp', 'cancel'])
+        self.assertEqual(buffer.flush(), 0)
+
+    def test_logged_time_is_kept(self):
+        buffer = self.buffer()
+        logged_at = timezone.now() - datetime.timedelta(minutes=5)
+        buffer.add(self.user.id, self.event.id, 'save', logged_at)
+        buffer.flush()
+
+        self.assertEqual(UserActivity.objects.get().created_at, logged_at)
+
+    def test_size_threshold_flushes(self):
+        buffer = self.buffer(max_size=3)
+        buffer.add(self.user.id, self.event.id, 'save')
+        buffer.add(self.user.id, self.event.id, 'rsvp')
+        self.assertEqual(UserActivity.objects.count(), 0)
+
+        buffer.add(self.user.id, self.event.id, 'cancel')
+        self.assertEqual(self.logged(), ['save', 'rsvp', 'cancel'])
+        self.assertEqual(len(buffer), 0)
+
+    def test_age_threshold_flushes(self):
+        buffer = self.buffer(max_age=5)
+        with mock.patch('events.activity.time.monotonic', side_effect=[100, 100, 104, 106]):
+            buffer.add(self.user.id, self.event.id, 'save')
+            buffer.add(self.user.id, self.event.id, 'rsvp')
+            self.assertEqual(UserActivity.objects.count(), 0)
+            buffer.add(self.user.id, self.event.id, 'cancel')
+
+        self.assertEqual(self.logged(), ['save', 'rsvp', 'cancel'])
+
+    def test_request_end_flushes(self):
+        activity_buffer.add(self.user.id, self.event.id, 'save')
+        request_finished.send(sender=self.__class__)
+
+        self.assertEqual(self.logged(), ['save'])
+
+    def test_failed_flush_keeps_rows_ahead_of_later_ones(self):
+        buffer = self.buffer()
+        buffer.add(self.user.id, self.event.id, 'save')
+        buffer.add(self.user.id, self.event.id, 'rsvp')
+        with mock.patch.object(UserActivity.objects, 'bulk_create', side_effect=OperationalError), \
+                self.assertLogs('events.activity', 'ERROR'):
+            self.assertEqual(buffer.flush(), 0)
+
+        buffer.add(self.user.id, self.event.id, 'cancel')
+        buffer.flush()
+        self.assertEqual(self.logged(), ['save', 'rsvp', 'cancel'])
+
+    def test_rows_spooled_at_exit_are_written_first(self):
+        exiting = self.buffer()
+        exiting.add(self.user.id, self.event.id, 'save')
+        exiting.add(self.user.id, self.event.id, 'rsvp')
+        with mock.patch.object(UserActivity.objects, 'bulk_create', side_effect=OperationalError), \
+                self.assertLogs('events.activity', 'WARNING'):
+            exiting.flush_at_exit()
+        self.assertTrue(os.path.exists(self.spool_path))
+        self.assertEqual(len(exiting), 0)
+
+        restarted = self.buffer()
+        restarted.add(self.user.id, self.event.id, 'cancel')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(restarted.flush(), 3)
+        self.assertEqual(self.logged(), ['save', 'rsvp', 'cancel'])
+        self.assertFalse(os.listdir(os.path.dirname(self.spool_path)))
+
+    def test_claimed_spool_is_kept_until_its_rows_are_written(self):
+        exiting = self.buffer()
+        exiting.add(self.user.id, self.event.id, 'save')
+        with mock.patch.object(UserActivity.objects, 'bulk_create', side_effect=OperationalError), \
+                self.assertLogs('events.activity', 'WARNING'):
+            exiting.flush_at_exit()
+
+        restarted = self.buffer()
+        restarted.add(self.user.id, self.event.id, 'rsvp')
+        with mock.patch.object(UserActivity.objects, 'bulk_create', side_effect=OperationalError), \
+                self.assertLogs('events.activity', 'ERROR'):
+            self.assertEqual(restarted.flush(), 0)
+        self.assertEqual(len(os.listdir(os.path.dirname(self.spool_path))), 1)
+        self.assertEqual(len(restarted), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(restarted.flush(), 2)
+        self.assertEqual(self.logged(), ['save', 'rsvp'])
+        self.assertFalse(os.listdir(os.path.dirname(self.spool_path)))
+
+    def test_spool_claimed_by_an_exited_process_is_taken_over(self):
+        exiting = self.buffer()
+        exiting.add(self.user.id, self.event.id, 'save')
+        with mock.patch.object(UserActivity.objects, 'bulk_create', side_effect=OperationalError), \
+                self.assertLogs('events.activity', 'WARNING'):
+            exiting.flush_at_exit()
+        os.replace(self.spool_path, f'{self.spool_path}.claimed-999999999-1')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.buffer().flush(), 1)
+        self.assertEqual(self.logged(), ['save'])
+        self.assertFalse(os.listdir(os.path.dirname(self.spool_path)))
+
+    def test_permanent_errors_drop_the_batch(self):
+        buffer = self.buffer()
+        buffer.add(self.user.id, self.event.id, 'save')
+        with mock.patch.object(UserActivity.objects, 'bulk_create', side_effect=DatabaseError), \
+                self.assertLogs('events.activity', 'ERROR'):
+            self.assertEqual(buffer.flush(), 0)
+        self.assertEqual(len(buffer), 0)
+
+
+class ActivityBufferIntegrityTest(TransactionTestCase):
+    # SQLite checks foreign keys at commit, so this needs real commits rather than a test transaction
+
+    def test_rows_of_deleted_events_are_dropped(self):
+        kept, deleted = make_event(capacity=0), make_event(capacity=1)
+        user = User.objects.create(username='alice', email='alice@example.com')
+        buffer = ActivityBuffer(max_size=100, max_age=60)
+        buffer.add(user.id, deleted.id, 'save')
+        deleted.delete()
+        buffer.add(user.id, kept.id, 'rsvp')
+
+        with self.assertLogs('events.activity', 'WARNING'):
+            self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(list(UserActivity.objects.values_list('event_id', 'activity_type')), [(kept.id, 'rsvp')])
+
+        buffer.add(user.id, kept.id, 'cancel')
+        self.assertEqual(buffer.flush(), 1)
+
+
+class RSVPConcurrencyTest(TransactionTestCase):
+    THREADS = 16
+    CAPACITY = 10
+
+    def test_concurrent_joins_never_oversell(self):
+        event = make_event(capacity=self.CAPACITY)
+        users = [User.objects.create(username=f'user-{i}', email=f'user-{i}@example.com') for i in range(self.THREADS)]
+        results = []
+        barrier = threading.Barrier(self.THREADS)
+
+        def attempt(user):
+            barrier.wait()
+            try:
+                while True:
+                    try:
+                        join_event(user, event)
+                        results.append('joined')
+                    except EventFull:
+                        results.append('full')
+                    except OperationalError:
+                        # SQLite's shared-cache test database locks whole tables; just try again
+                        continue
+                    break
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=attempt, args=(user,)) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        event.refresh_from_db()
+        self.assertEqual(results.count('joined'), self.CAPACITY)
+        self.assertEqual(results.count('full'), self.THREADS - self.CAPACITY)
+        self.assertEqual(event.registered, self.CAPACITY)
+        self.assertEqual(EventParticipant.objects.filter(event=event).count(), self.CAPACITY)
+        self.assertEqual(Notification.objects.filter(event=event).count(), self.CAPACITY)
+        activity_buffer.flush()
+        self.assertEqual(UserActivity.objects.filter(event=event, activity_type='rsvp').count(), self.CAPACITY)
+
+
+class EventViewsBenchmarkTest(ViewBenchmarkMixin, TestCase):
+    def setUp(self):
+        self.admin = User.objects.get(username='seed-user-0-0')
+
+    def test_events_page(self):
+        self.benchmark('events_page', reverse('events'), max_queries=4)  # the tag cloud is cached after this
+
+    def test_events_page_search(self):
+        self.benchmark('events_page_search', reverse('events') + '?q=python&is_virtual=0', max_queries=4)
+
+    def test_event_detail(self):
+        event = Event.objects.order_by('id').first()
+        self.benchmark('event_detail', reverse('event_detail', args=[event.id]), max_queries=7)
+
+    def test_categories_list(self):
+        self.benchmark('categories_list', reverse('categories'), max_queries=2)
+
+    def test_category_detail(self):
+        category = Category.objects.order_by('id').first()
+        self.benchmark('category_detail', reverse('category_detail', args=[category.id]), max_queries=3)
+
+    def test_admin_events(self):
+        self.client.force_login(self.admin)
+        self.benchmark('admin_events', reverse('admin-events'), max_queries=9)
+
+    def test_admin_categories(self):
+        self.client.force_login(self.admin)
+        self.benchmark('admin_categories', reverse('admin-categories'), max_queries=8)
+
+    def test_admin_users(self):
+        self.client.force_login(self.admin)
+        self.benchmark('admin_users', reverse('admin-users'), max_queries=12)
+
+
+class EventListingQueryPlanTest(QueryPlanMixin, TestCase):
+    """Explains the queries the listing views send, with their section caches empty."""
+
+    @classmethod
+    def setUpTestData(cls):
+        seed()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_events_page(self):
+        with self.assertQueriesUseIndexes('events page', allow=['events_category']):
+            self.client.get(reverse('events'))
+
+    def test_events_search(self):
+        with self.assertQueriesUseIndexes('events search', allow=['events_category']):
+            self.client.get(reverse('events'), {'q': 'python', 'is_virtual': '0'})
+
+    def test_tag_filter(self):
+        with self.assertQueriesUseIndexes('tag filter', allow=['events_category']):
+            self.client.get(reverse('events'), {'tags': 'python'})
+
+    def test_admin_events(self):
+        self.client.force_login(User.objects.get(username='seed-user-0-0'))
+        with self.assertQueriesUseIndexes('admin events', allow=['events_category']):  # the category filter
+            self.client.get(reverse('admin-events'))
+
+    def test_category_detail(self):
+        category = Category.objects.order_by('id').first()
+        with self.assertQueriesUseIndexes('category detail'):
+            self.client.get(reverse('category_detail', args=[category.id]))
+
+    def test_featured_events(self):
+        # The home page's other sections read small tables whole
+        with self.assertQueriesUseIndexes('home', allow=['events_category', 'core_testimonial', 'core_sitestats']):
+            self.client.get(reverse('home'))
+
+
+def import_row(n, **kwargs):
+    return {
+        'title': f'Imported {n}', 'slug': f'imported-{n}', 'description': 'Imported',
+        'date': '2030-02-01', 'time': '09:30', 'location': 'Dhaka', 'capacity': 50, 'price': '0',
+        'category': 'tech', 'tags': ['python'],
+        'speakers': [{'name': 'Speaker', 'role': 'Host', 'bio': 'Bio', 'order': 1}],
+        'schedules': [{'time': '09:30', 'title': 'Opening', 'day': 1, 'order': 1}],
+        **kwargs
+    }
+
+
+class EventImportTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create(username='importer', email='importer@example.com', is_superuser=True)
+        Category.objects.create(name='Tech', slug='tech')
+
+    def test_bad_rows_are_reported_and_the_rest_saved(self):
+        rows = [
+            import_row(1),
+            import_row(2, category='missing'),
+            import_row(3, date='not a date'),
+            import_row(4, slug='imported-1'),
+            import_row(5, speakers=[{'role': 'Host'}]),
+            import_row(6),
+        ]
+        with self.assertNumQueries(10):  # category, taken slugs, savepoint, 3 inserts, category counts, 2 for tags, release
+            report = import_events(rows, self.admin, batch_size=10)
+
+        self.assertEqual(report.created, 2)
+        self.assertEqual([row for row, _ in report.errors], [2, 3, 4, 5])
+        self.assertEqual(set(Event.objects.values_list('slug', flat=True)), {'imported-1', 'imported-6'})
+        self.assertEqual(Speaker.objects.count(), 2)
+        self.assertEqual(Schedule.objects.count(), 2)
+
+    def test_failed_batch_does_not_stop_the_next(self):
+        rows = [import_row(n) for n in range(4)]
+        real_bulk_create = Event.objects.bulk_create
+        calls = []
+
+        def flaky_bulk_create(objs, *args, **kwargs):
+            calls.append(len(objs))
+            if len(calls) == 1:
+                raise OperationalError("database is locked")
+            return real_bulk_create(objs, *args, **kwargs)
+
+        with mock.patch.object(Event.objects, 'bulk_create', flaky_bulk_create):
+            report = import_events(rows, self.admin, batch_size=2)
+
+        self.assertEqual(report.created, 2)
+        self.assertEqual([row for row, _ in report.errors], [1, 2])
+        self.assertEqual(Event.objects.count(), 2)
+
+    def test_csv_nested_cells(self):
+        f = io.StringIO(
+            'title,slug,description,date,time,location,capacity,price,category,tags,speakers,schedules\n'
+            'Imported,imported,Text,2030-02-01,09:30,Dhaka,50,0,tech,"python, django",'
+            '"[{""name"": ""Speaker"", ""role"": ""Host"", ""bio"": ""Bio"", ""order"": 1}]",\n'
+        )
+        report = import_events(read_rows(f, 'csv'), self.admin)
+
+        self.assertEqual(report.created, 1)
+        event = Event.objects.get(slug='imported')
+        self.assertEqual(event.tags, ['python', 'django'])
+        self.assertEqual(event.speakers.count(), 1)
+
+    def test_json_array_and_lines_are_read_across_chunks(self):
+        rows = [import_row(n, description='x' * n) for n in range(20)]
+        with mock.patch.object(importer, 'READ_SIZE', 7):
+            self.assertEqual(list(read_rows(io.StringIO(json.dumps(rows, indent=2)), 'json')), rows)
+            lines = '\n'.join(json.dumps(row) for row in rows) + '\n'
+            self.assertEqual(list(read_rows(io.StringIO(lines), 'json')), rows)
+            with self.assertRaises(ValueError):
+                list(read_rows(io.StringIO(json.dumps(rows)[:-1]), 'json'))
+
+    def test_admin_upload(self):
+        self.client.force_login(self.admin)
+        upload = SimpleUploadedFile('events.json', json.dumps([import_row(1), import_row(2, category='missing')]).encode())
+        response = self.client.post(reverse('admin-event-import'), {'file': upload})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['report'].created, 1)
+        self.assertContains(response, "no category with slug")
+
+
+class AttendeeExportTest(TestCase):
+    def setUp(self):
+        self.event = make_event(capacity=10)
+        self.organizer = self.event.organizer
+        other_event = Event.objects.create(
+            title='Other', slug='other', category=self.event.category, organizer=User.objects.create(username='bob'),
+            description='Other', date=self.event.date, time=self.event.time, location='Dhaka',
+        )
+        joined = timezone.make_aware(datetime.datetime(2030, 1, 10, 12))
+        for n, status in enumerate(['going', 'going', 'interested']):
+            user = User.objects.create(username=f'guest-{n}', email=f'guest-{n}@example.com', first_name='=cmd')
+            EventParticipant.objects.create(user=user, event=self.event, status=status)
+            EventParticipant.objects.create(user=user, event=other_event, status='going')
+        EventParticipant.objects.filter(user__username='guest-0').update(joined_at=joined)
+
+    def export(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+
+    def test_organizer_exports_filtered_attendees(self):
+        self.client.force_login(self.organizer)
+        url = reverse('event_attendees_export', args=[self.event.id])
+
+        lines = self.export(url)
+        self.assertEqual(lines[0].split(',')[:3], ['Event ID', 'Event', 'Username'])
+        self.assertEqual(len(lines), 4)
+        self.assertIn("'=cmd", lines[1])
+        self.assertEqual(len(self.export(url, status='going')), 3)
+        self.assertEqual(len(self.export(url, joined_from='2030-01-10', joined_to='2030-01-10')), 2)
+
+    def test_rows_are_fetched_in_one_query(self):
+        self.client.force_login(self.organizer)
+        response = self.client.get(reverse('event_attendees_export', args=[self.event.id]))
+        self.assertFalse(response.is_async)
+        with self.assertNumQueries(1):
+            b''.join(response.streaming_content)
+
+    async def test_asgi_streams_from_an_async_iterator(self):
+        # A sync iterator would be read into memory whole before an ASGI response is sent
+        await self.async_client.aforce_login(self.organizer)
+        response = await self.async_client.get(reverse('event_attendees_export', args=[self.event.id]))
+        self.assertTrue(response.is_async)
+        content = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(len(content.decode('utf-8-sig').splitlines()), 4)
+
+    def test_category_export_is_limited_to_own_events(self):
+        self.client.force_login(self.organizer)
+        lines = self.export(reverse('category_attendees_export', args=[self.event.category_id]))
+        self.assertEqual(len(lines), 4)
+
+        self.organizer.is_superuser = True
+        self.organizer.save()
+        self.assertEqual(len(self.export(reverse('category_attendees_export', args=[self.event.category_id]))), 7)
+
+    def test_other_users_are_refused(self):
+        self.client.force_login(User.objects.get(username='guest-0'))
+        self.assertEqual(self.client.get(reverse('event_attendees_export', args=[self.event.id])).status_code, 403)
+        self.assertEqual(
+            self.client.get(reverse('category_attendees_export', args=[self.event.category_id])).status_code, 403
+        )
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        self.event = make_event(capacity=10)
+
+    def revalidate(self, url, response, **headers):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'], **headers)
+
+    def test_listing_pages_answer_304_without_queries(self):
+        for url in [reverse('events'), reverse('categories'), reverse('category_detail', args=[self.event.category_id])]:
+            response = self.client.get(url)
+            self.assertEqual(response['Cache-Control'], 'public, max-age=60')
+            self.assertIn('Last-Modified', response)
+            with self.assertNumQueries(0):
+                self.assertEqual(self.revalidate(url, response).status_code, 304)
+            self.assertEqual(
+                self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304
+            )
+
+    def test_changes_give_a_new_etag(self):
+        url = reverse('events')
+        changes = [
+            lambda: Event.objects.filter(pk=self.event.pk).get().save(),
+            lambda: Category.objects.create(name='Empty', slug='empty'),
+            lambda: join_event(User.objects.create(username='alice'), self.event),
+            lambda: (
+                Event.objects.filter(pk=self.event.pk).update(registered=5),
+                call_command('reconcile_counters', stdout=io.StringIO()),
+            ),
+        ]
+        for change in changes:
+            response = self.client.get(url)
+            with self.captureOnCommitCallbacks(execute=True):
+                change()
+            self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_event_detail_is_private_and_follows_rsvps(self):
+        url = reverse('event_detail', args=[self.event.id])
+        user = User.objects.create(username='alice')
+        self.client.force_login(user)
+        self.client.get(url)  # sets the CSRF cookie the page's forms depend on
+        response = self.client.get(url)
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+        self.assertEqual(self.revalidate(url, response).status_code, 304)
+
+        join_event(user, self.event)
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_signed_in_users_do_not_get_anonymous_pages(self):
+        url = reverse('events')
+        response = self.client.get(url)
+        self.client.force_login(User.objects.create(username='alice'))
+
+        response = self.revalidate(url, response)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+        self.assertNotIn('Last-Modified', response)
+
+    def test_versions_expire_when_the_cache_is_per_process(self):
+        self.assertEqual(version_timeout(), LOCAL_VERSION_TIMEOUT)
+        self.assertEqual(detail_body_timeout(), LOCAL_VERSION_TIMEOUT)
+        with mock.patch('events.page_cache.cache_is_shared', return_value=True):
+            self.assertIsNone(version_timeout())
+            self.assertEqual(detail_body_timeout(), DETAIL_BODY_TIMEOUT)
+
+
+class VersionCommitTest(TransactionTestCase):
+    # Needs real commits: versions are only bumped once the writer's transaction is done
+
+    def setUp(self):
+        cache.clear()
+
+    def test_versions_move_when_the_rsvp_commits(self):
+        event = make_event(capacity=10)
+        url = reverse('event_detail', args=[event.id])
+        self.assertContains(self.client.get(url), '0 attending')
+        version = cache.get(event_version_key(event.id))
+
+        with transaction.atomic():
+            join_event(User.objects.create(username='alice'), event)
+            # A request now still renders the committed rows, under the version they belong to
+            self.assertEqual(cache.get(event_version_key(event.id)), version)
+
+        self.assertNotEqual(cache.get(event_version_key(event.id)), version)
+        response = self.client.get(url)
+        self.assertContains(response, '1 attending')
+        self.assertContains(response, '9 spots left')
+
+    def test_listing_etag_moves_when_the_rsvp_commits(self):
+        event = make_event(capacity=10)
+        url = reverse('events')
+        etag = self.client.get(url)['ETag']
+
+        with transaction.atomic():
+            join_event(User.objects.create(username='alice'), event)
+            # A listing rendered now shows the committed rows and must keep their ETag
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class WaitlistTest(TestCase):
+    def setUp(self):
+        self.event = make_event(capacity=1)
+        self.holder = User.objects.create(username='holder')
+        join_event(self.holder, self.event)
+
+    def queue(self, count):
+        users = [User.objects.create(username=f'waiting-{User.objects.count()}') for _ in range(count)]
+        for user in users:
+            join_waitlist(user, self.event)
+        return users
+
+    def test_only_full_events_have_a_waitlist(self):
+        with self.assertRaises(AlreadyRegistered):
+            join_waitlist(self.holder, self.event)
+
+        Event.objects.filter(id=self.event.id).update(capacity=2)
+        with self.assertRaises(SeatsAvailable):
+            join_waitlist(User.objects.create(username='early'), self.event)
+
+    def test_positions_follow_join_order(self):
+        first, second = self.queue(2)
+        self.assertEqual(join_waitlist(first, self.event).position, 1)  # joining again keeps the place
+        self.assertEqual(WaitlistEntry.objects.get(user=second).position, 2)
+
+        self.assertTrue(leave_waitlist(first, self.event))
+        self.assertFalse(leave_waitlist(first, self.event))
+        self.assertEqual(join_waitlist(first, self.event).position, 3)
+
+    def test_cancel_promotes_the_head_of_the_queue(self):
+        first, second = self.queue(2)
+        cancel_rsvp(self.holder, self.event)
+
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registered, 1)
+        self.assertTrue(EventParticipant.objects.filter(user=first, event=self.event, status='going').exists())
+        self.assertEqual(list(WaitlistEntry.objects.values_list('user', flat=True)), [second.id])
+        self.assertTrue(Notification.objects.filter(user=first, notification_type='waitlist_promoted').exists())
+
+    def test_promotion_cost_does_not_grow_with_the_queue(self):
+        def promotion_queries():
+            holder = EventParticipant.objects.get(event=self.event, status='going').user
+            with CaptureQueriesContext(connection) as queries:
+                cancel_rsvp(holder, self.event)
+            return len(queries)
+
+        self.queue(2)
+        short = promotion_queries()
+        WaitlistEntry.objects.all().delete()
+        self.queue(50)
+        self.assertEqual(promotion_queries(), short)
+
+    def test_waiting_users_with_another_rsvp_are_skipped(self):
+        first, second = self.queue(2)
+        EventParticipant.objects.create(user=first, event=self.event, status='interested')
+        cancel_rsvp(self.holder, self.event)
+
+        self.assertTrue(EventParticipant.objects.filter(user=second, status='going').exists())
+        self.assertFalse(WaitlistEntry.objects.exists())
+
+    def test_raised_capacity_goes_to_the_waitlist(self):
+        self.queue(3)
+        Event.objects.filter(id=self.event.id).update(capacity=3)
+
+        self.assertEqual(fill_from_waitlist(self.event), 2)
+        self.assertEqual(WaitlistEntry.objects.count(), 1)
+
+    def test_join_and_leave_views(self):
+        user = User.objects.create(username='visitor')
+        self.client.force_login(user)
+        self.client.post(reverse('waitlist_join', args=[self.event.id]))
+        self.assertContains(self.client.get(reverse('event_detail', args=[self.event.id])), "#1 on the waitlist")
+
+        self.client.post(reverse('waitlist_leave', args=[self.event.id]))
+        self.assertFalse(WaitlistEntry.objects.exists())
+
+
+class ReadApiTest(TestCase):
+    def setUp(self):
+        self.event = make_event(capacity=10)
+        for n in range(4):
+            Event.objects.create(
+                title=f'Later {n}', slug=f'later-{n}', category=self.event.category, organizer=self.event.organizer,
+                description='Later', date=datetime.date(2030, 2, n + 1), time=datetime.time(9), location='Dhaka',
+            )
+        Speaker.objects.create(event=self.event, name='Ada', role='Host', order=1)
+
+    def get(self, url, status=200, **headers):
+        response = self.client.get(url, **headers)
+        self.assertEqual(response.status_code, status)
+        return response.json()
+
+    def test_events_are_paged_with_cursors(self):
+        url = reverse('api_events') + '?limit=2&fields=id,title'
+        with self.assertNumQueries(1):  # the page; the validators come from the cache
+            page = self.get(url)
+        self.assertEqual(page['data'][0], {'id': self.event.id, 'title': 'Launch Party'})
+        self.assertIsNone(page['previous'])
+
+        titles = [row['title'] for row in page['data']]
+        while page['next']:
+            page = self.get(page['next'])
+            titles += [row['title'] for row in page['data']]
+        self.assertEqual(titles, ['Launch Party', 'Later 0', 'Later 1', 'Later 2', 'Later 3'])
+
+    def test_unknown_fields_and_filters_are_rejected(self):
+        self.assertIn('error', self.get(reverse('api_events') + '?fields=title,secret', status=400))
+        self.assertIn('date_from', self.get(reverse('api_events') + '?date_from=soon', status=400)['error'])
+
+    def test_event_detail_and_children(self):
+        data = self.get(reverse('api_event', args=[self.event.id]) + '?fields=title,category,date')['data']
+        self.assertEqual(data, {'title': 'Launch Party', 'category': self.event.category.slug, 'date': '2030-01-01'})
+        speakers = self.get(reverse('api_event_speakers', args=[self.event.id]) + '?fields=name')['data']
+        self.assertEqual(speakers, [{'name': 'Ada'}])
+        self.assertEqual(self.get(reverse('api_event_schedules', args=[self.event.id]))['data'], [])
+        self.assertEqual(self.get(reverse('api_event', args=[0]), status=404), {'error': 'Event not found'})
+
+    def test_categories_with_counts(self):
+        data = self.get(reverse('api_categories') + '?fields=slug,event_count')['data']
+        self.assertEqual(data, [{'slug': self.event.category.slug, 'event_count': 5}])
+
+    def test_responses_revalidate(self):
+        for url in [reverse('api_events'), reverse('api_event', args=[self.event.id])]:
+            response = self.client.get(url)
+            self.assertEqual(response['Cache-Control'], 'public, max-age=60')
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        response = self.client.get(reverse('api_event', args=[self.event.id]))
+        with self.captureOnCommitCallbacks(execute=True):
+            Speaker.objects.create(event=self.event, name='Grace', role='Host', order=2)
+        self.assertEqual(
+            self.client.get(reverse('api_event', args=[self.event.id]), HTTP_IF_NONE_MATCH=response['ETag']).status_code,
+            200,
+        )
+
+
+class CounterTest(TestCase):
+    def setUp(self):
+        self.event = make_event(capacity=10)
+        self.category = self.event.category
+        self.user = User.objects.create(username='counted')
+
+    def counters(self):
+        return Event.objects.values('registered', 'interested_count', 'attended_count', 'cancelled_count').get(
+            id=self.event.id
+        )
+
+    def test_status_changes_move_the_counters(self):
+        participant = EventParticipant.objects.create(user=self.user, event=self.event, status='interested')
+        participant.status = 'going'
+        participant.save()
+        participant = EventParticipant.objects.get(id=participant.id)
+        participant.status = 'attended'
+        participant.save()
+
+        self.assertEqual(
+            self.counters(), {'registered': 0, 'interested_count': 0, 'attended_count': 1, 'cancelled_count': 0}
+        )
+
+    def test_deleting_the_participant_or_user_uncounts_it(self):
+        join_event(self.user, self.event)
+        other = User.objects.create(username='other')
+        EventParticipant.objects.create(user=other, event=self.event, status='interested')
+        EventParticipant.objects.filter(user=self.user).delete()
+        other.delete()
+
+        self.assertEqual(
+            self.counters(), {'registered': 0, 'interested_count': 0, 'attended_count': 0, 'cancelled_count': 0}
+        )
+
+    def test_event_counts_follow_the_category(self):
+        other = Category.objects.create(name='Design', slug='design')
+        self.category.refresh_from_db()
+        self.assertEqual(self.category.event_count, 1)
+
+        self.event.category = other
+        self.event.save()
+        self.assertEqual(
+            dict(Category.objects.values_list('slug', 'event_count')), {self.category.slug: 0, 'design': 1}
+        )
+        self.event.delete()
+        other.refresh_from_db()
+        self.assertEqual(other.event_count, 0)
+
+    def test_saving_a_stale_instance_keeps_the_counters(self):
+        stale = Event.objects.get(id=self.event.id)
+        join_event(self.user, self.event)
+        stale.title = 'Renamed'
+        stale.save()
+
+        self.assertEqual(self.counters()['registered'], 1)
+        self.assertEqual(Event.objects.get(id=self.event.id).title, 'Renamed')
+
+    def test_reconcile_repairs_drift(self):
+        join_event(self.user, self.event)
+        Event.objects.filter(id=self.event.id).update(registered=7, cancelled_count=2)
+        Category.objects.filter(id=self.category.id).update(event_count=0)
+
+        self.assertEqual(reconcile(), {'events': 1, 'categories': 1})
+        self.assertEqual(reconcile(), {'events': 0, 'categories': 0})
+        self.assertEqual(self.counters()['registered'], 1)
+        self.assertEqual(Category.objects.get(id=self.category.id).event_count, 1)
+
+
+class EventTagTest(TestCase):
+    def setUp(self):
+        self.event = make_event(capacity=10, tags=['Python', ' django ', 'python'])
+
+    def tagged(self, *tags):
+        return list(filter_by_tags(Event.objects.order_by('id'), tags).values_list('slug', flat=True))
+
+    def test_tags_are_normalized_into_rows(self):
+        self.assertEqual(sorted(EventTag.objects.values_list('name', flat=True)), ['django', 'python'])
+
+        self.event.tags = ['rust']
+        self.event.save()
+        self.assertEqual(list(EventTag.objects.values_list('name', flat=True)), ['rust'])
+
+    def test_filtering_needs_every_tag(self):
+        other = Event.objects.create(
+            title='Meetup', slug='meetup', category=self.event.category, organizer=self.event.organizer,
+            description='Meetup', date=datetime.date(2030, 2, 1), time=datetime.time(18, 0), location='Dhaka',
+            tags=['python'],
+        )
+        self.assertEqual(self.tagged('PYTHON'), [self.event.slug, other.slug])
+        self.assertEqual(self.tagged('python', 'django'), [self.event.slug])
+        self.assertEqual(self.tagged('go'), [])
+
+        self.assertEqual(list(tag_cloud()), [{'name': 'python', 'count': 2}, {'name': 'django', 'count': 1}])
+
+    def test_events_page_and_api_filter_by_tag(self):
+        response = self.client.get(reverse('events') + '?tags=Django')
+        self.assertContains(response, self.event.title)
+        self.assertContains(response, '?tags=python')
+        self.assertNotContains(self.client.get(reverse('events') + '?tags=go'), self.event.title)
+
+        data = self.client.get(reverse('api_events') + '?tags=django,python&fields=slug').json()['data']
+        self.assertEqual(data, [{'slug': self.event.slug}])
+        self.assertEqual(self.client.get(reverse('api_tags')).json()['data'][0], {'name': 'django', 'count': 1})
+
+
+class EventSearchTest(TestCase):
+    def setUp(self):
+        self.python = make_event(capacity=10, tags=['python'])
+        Event.objects.filter(pk=self.python.pk).update(title='Python Night', description='Talks about Python')
+        self.mentions = Event.objects.create(
+            title='Meetup', slug='meetup', category=self.python.category, organizer=self.python.organizer,
+            description='Bring a laptop, we might write some python', date=datetime.date(2030, 1, 5),
+            time=datetime.time(18, 0), location='Dhaka', price=500, is_virtual=True,
+        )
+        self.other = Event.objects.create(
+            title='Art Walk', slug='art-walk', category=Category.objects.create(name='Art', slug='art'),
+            organizer=self.python.organizer, description='Galleries', date=datetime.date(2030, 3, 1),
+            time=datetime.time(10, 0), location='Chittagong', price=100,
+        )
+
+    def found(self, **params):
+        form = EventSearchForm(params)
+        self.assertTrue(form.is_valid(), form.errors)
+        return list(filter_events(form.cleaned_data).values_list('slug', flat=True))
+
+    def test_search_ranks_title_matches_first(self):
+        self.assertEqual(self.found(q='python'), [self.python.slug, self.mentions.slug])
+        self.assertEqual(self.found(q='pyth'), [self.python.slug, self.mentions.slug])  # prefix match
+        self.assertEqual(self.found(q='galleries chittagong'), [self.other.slug])
+        self.assertEqual(self.found(q='python galleries'), [])
+        self.assertEqual(self.found(q='"*'), [])
+
+    def test_filters(self):
+        self.assertEqual(self.found(category='art'), [self.other.slug])
+        self.assertEqual(self.found(date_from='2030-01-02', date_to='2030-02-01'), [self.mentions.slug])
+        self.assertEqual(self.found(min_price='100', max_price='200'), [self.other.slug])
+        self.assertEqual(self.found(is_virtual='1'), [self.mentions.slug])
+        self.assertEqual(self.found(is_virtual='0'), [self.python.slug, self.other.slug])
+        self.assertEqual(self.found(q='python', is_virtual='0'), [self.python.slug])
+        self.assertEqual(self.found(q='python', tags='python'), [self.python.slug])
+
+    def test_substring_fallback_on_other_backends(self):
+        with mock.patch('events.search.connection', mock.Mock(vendor='other')):
+            self.assertEqual(self.found(q='PYTHON'), [self.python.slug, self.mentions.slug])
+            response = self.client.get(reverse('events') + '?q=python')
+        self.assertContains(response, 'Python Night')
+        self.assertContains(response, 'Meetup')
+        self.assertNotContains(response, 'Art Walk')
+
+    def test_events_page_pages_through_results(self):
+        for n in range(13):
+            Event.objects.create(
+                title=f'Python {n}', slug=f'python-{n}', category=self.python.category,
+                organizer=self.python.organizer, description='Python', date=datetime.date(2030, 4, 1),
+                time=datetime.time(9, 0), location='Dhaka',
+            )
+        response = self.client.get(reverse('events') + '?q=python')
+        self.assertEqual(len(response.context['events']), 12)
+        self.assertTrue(response.context['page'].has_next)
+        response = self.client.get(reverse('events') + response.context['page'].next_url)
+        self.assertEqual([event.slug for event in response.context['events']][-1], self.mentions.slug)
+
+
+class EventUpdateFanoutTest(TestCase):
+    def setUp(self):
+        cache.clear()  # unread counters of earlier tests' users, whose ids get reused
+        self.event = make_event(capacity=0)
+        self.users = [User.objects.create(username=f'fan-{i}') for i in range(5)]
+        for user in self.users[:3]:
+            EventParticipant.objects.create(user=user, event=self.event, status='going')
+        for user in self.users[2:]:
+            SavedEvent.objects.create(user=user, event=self.event)  # users[2] both RSVPed and saved it
+        self.outsider = User.objects.create(username='outsider')
+
+    def queue(self):
+        before = snapshot(self.event)
+        self.event.location = 'Chittagong'
+        return queue_event_update(self.event, before)
+
+    def notified(self):
+        return list(
+            Notification.objects.filter(notification_type='event_update').order_by('user_id').values_list('user_id', flat=True)
+        )
+
+    def test_only_material_changes_are_queued(self):
+        self.assertIsNone(queue_event_update(self.event, snapshot(self.event)))
+        fanout = self.queue()
+        self.assertEqual(fanout.message, 'Location changed from Dhaka to Chittagong.')
+
+    def test_chunks_advance_the_cursor_until_done(self):
+        fanout = self.queue()
+        self.assertTrue(run_fanout_chunk(fanout.id, chunk_size=2))
+        fanout.refresh_from_db()
+        self.assertEqual((fanout.last_user_id, fanout.notified), (self.users[1].id, 2))
+
+        self.assertTrue(run_fanout_chunk(fanout.id, chunk_size=2))
+        self.assertTrue(run_fanout_chunk(fanout.id, chunk_size=2))
+        self.assertFalse(run_fanout_chunk(fanout.id, chunk_size=2))
+        fanout.refresh_from_db()
+        self.assertEqual((fanout.status, fanout.notified), ('done', 5))
+        self.assertIsNotNone(fanout.finished_at)
+
+        # Each participant or saver once, including the one who is both; nobody else
+        self.assertEqual(self.notified(), [user.id for user in self.users])
+        self.assertFalse(run_fanout_chunk(fanout.id, chunk_size=2))
+
+    def test_an_interrupted_fanout_resumes_after_its_cursor(self):
+        fanout = self.queue()
+        run_fanout_chunk(fanout.id, chunk_size=3)
+
+        self.assertEqual(run_pending_fanouts(chunk_size=3), 1)
+        self.assertEqual(self.notified(), [user.id for user in self.users])
+        self.assertEqual(EventUpdateFanout.objects.get().status, 'done')
+
+    def test_cached_unread_counts_are_adjusted(self):
+        user = self.users[0]
+        self.assertEqual(get_unread_count(user), 0)
+        self.queue()
+        run_pending_fanouts()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_unread_count(user), 1)
+
+
+class CalendarFeedTest(TestCase):
+    def setUp(self):
+        self.event = make_event(capacity=0)
+        Event.objects.filter(id=self.event.id).update(
+            description='Bring snacks; drinks, too\\more\nSecond line ' + 'é' * 60
+        )
+        self.user = User.objects.create(username='subscriber')
+        EventParticipant.objects.create(user=self.user, event=self.event, status='going')
+
+    def feed_url(self, token=None):
+        return reverse('rsvp_calendar', args=[token or make_feed_token(self.user)])
+
+    def read(self, response):
+        return b''.join(response.streaming_content).decode()
+
+    def test_rsvp_feed_lists_the_users_events(self):
+        body = self.read(self.client.get(self.feed_url()))
+        self.assertTrue(body.startswith('BEGIN:VCALENDAR\r\n'))
+        self.assertIn(f'UID:event-{self.event.id}@testserver\r\n', body)
+        self.assertTrue(body.endswith('END:VCALENDAR\r\n'))
+
+    def test_lines_are_escaped_and_folded(self):
+        body = self.read(self.client.get(self.feed_url()))
+        lines = body.split('\r\n')
+        self.assertTrue(all(len(line.encode()) <= 75 for line in lines))
+        description = ''.join(
+            line[1:] if line.startswith(' ') else line for line in lines
+        ).split('DESCRIPTION:')[1].split('LOCATION:')[0]
+        self.assertEqual(description, 'Bring snacks\\; drinks\\, too\\\\more\\nSecond line ' + 'é' * 60)
+
+    def test_tampered_old_and_revoked_tokens_are_refused(self):
+        token = make_feed_token(self.user)
+        self.assertEqual(make_feed_token(self.user), token)
+        self.assertEqual(self.client.get(self.feed_url(token[:-2] + 'xx')).status_code, 404)
+        legacy = signing.dumps(self.user.pk, salt='events.calendar.rsvp-feed', compress=True)
+        self.assertEqual(self.client.get(self.feed_url(legacy)).status_code, 404)
+
+        new_token = reset_feed_token(self.user)
+        self.assertEqual(self.client.get(self.feed_url(token)).status_code, 404)
+        self.assertEqual(self.client.get(self.feed_url(new_token)).status_code, 200)
+
+    def test_reset_view_revokes_the_link(self):
+        token = make_feed_token(self.user)
+        self.client.force_login(self.user)
+        self.client.post(reverse('calendar_feed_reset'))
+        self.assertEqual(self.client.get(self.feed_url(token)).status_code, 404)
+
+    def test_unchanged_feeds_answer_304(self):
+        for url in [self.feed_url(), reverse('category_calendar', args=[self.event.category_id])]:
+            response = self.client.get(url)
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+            self.assertEqual(
+                self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304
+            )
+
+        response = self.client.get(self.feed_url())
+        Event.objects.filter(id=self.event.id).update(title='Renamed', updated_at=timezone.now())
+        self.assertEqual(self.client.get(self.feed_url(), HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    async def test_asgi_streams_from_an_async_iterator(self):
+        response = await self.async_client.get(reverse('category_calendar', args=[self.event.category_id]))
+        self.assertTrue(response.is_async)
+        body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertIn(f'UID:event-{self.event.id}@testserver', body)
@@ -1,5 +1,5 @@
 from django.urls import path
-from events.views import events_page as events, event_detail, how_it_works, categories_list, contact, category_detail, AdminEventListView, AdminCategoryListView, AdminRolePermissionView, delete_category, delete_event
+from events.views import events_page as events, event_detail, how_it_works, categories_list, contact, category_detail, AdminEventListView, AdminEventImportView, AdminCategoryListView, AdminRolePermissionView, delete_category, delete_event, rsvp_calendar, category_calendar, event_attendees_export, category_attendees_export
 
 urlpatterns = [
     path('', events, name='events'),
@@ -8,7 +8,12 @@ urlpatterns = [
     path('categories/', categories_list, name='categories'),
     path('category/<int:category_id>/', category_detail, name='category_detail'),
     path('contact/', contact, name='contact'),
+    path('calendar/rsvps/<str:token>.ics', rsvp_calendar, name='rsvp_calendar'),
+    path('calendar/category/<int:category_id>.ics', category_calendar, name='category_calendar'),
+    path('details/<int:id>/attendees.csv', event_attendees_export, name='event_attendees_export'),
+    path('category/<int:category_id>/attendees.csv', category_attendees_export, name='category_attendees_export'),
     path('admin-dashboard/events/', AdminEventListView.as_view(), name='admin-events'),
+    path('admin-dashboard/events/import/', AdminEventImportView.as_view(), name='admin-event-import'),
     path('event-delete/<int:id>/', delete_event, name='event-delete'),
     path('admin-dashboard/categories/', AdminCategoryListView.as_view(), name='admin-categories'),
     path('category-delete/<int:id>/', delete_category, name='category-delete'),
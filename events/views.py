@@ -1,56 +1,245 @@
-from django.shortcuts import render, get_object_or_404, redirect
-from django.db.models import Count
-from events.models import Event, Category
+import asyncio
+import io
+
+from django.core.cache import cache
+from django.middleware.csrf import get_token
+from django.utils.safestring import mark_safe
+from django.http import Http404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.core.exceptions import PermissionDenied
+from django.views.decorators.http import require_GET
+from django.shortcuts import render, get_object_or_404, aget_object_or_404, redirect
+from events.models import Event, Category, EventParticipant, SavedEvent, Schedule, Speaker, WaitlistEntry
 from django.contrib import messages
 from events.models import Category
 from django.urls import reverse_lazy
-from django.views.generic import ListView
+from django.views.generic import ListView, View
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from events.forms import EventForm, CategoryForm
+from events.forms import EventForm, CategoryForm, EventImportUploadForm, AttendeeExportForm
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group, Permission
 from django.contrib.auth import get_user_model
 from django.contrib import messages
-from events.forms import AssignRoleForm, CreateGroupForm
+from events.forms import AssignRoleForm, CreateGroupForm, EventSearchForm
+from events.search import filter_events
+from events.tags import tag_cloud
+from events.importer import detect_format, import_events, read_rows
+from events.export import (
+    astream_attendees_csv, attendees_of_category, attendees_of_event, can_export, filter_attendees, is_event_admin,
+    stream_attendees_csv,
+)
+from events.fanout import snapshot, queue_event_update
+from events.rsvp import fill_from_waitlist
+from core.pagination import apaginate, arender_page, CursorPaginationMixin
+from core.cache import acached_section
+from core.conditional import conditional_page, finish, make_etag, not_modified, viewer_key
+from core.shortcuts import arender, arender_to_string, streaming_response
+from events.page_cache import ACTIONS_SLOT, adetail_body_key, catalog_validators, detail_body_timeout
+from events.calendar import (
+    astream_calendar, category_feed, category_feed_events, read_feed_token, rsvp_feed_events, rsvp_feed_validators,
+    stream_calendar,
+)
 
 User = get_user_model()
 
 
-def events_page(request):
-    events = Event.objects.select_related('category').all()
-    categories = Category.objects.all()
+async def _list(queryset):
+    return [obj async for obj in queryset]
 
-    context = {
-        "events": events,
-        "categories": categories
-    }
-    return render(request, "events.html", context)
+
+async def _category_counts():
+    return await _list(Category.objects.all())
 
 
-def event_detail(request, id):
-    related_events = Event.objects.filter(is_featured=True).annotate(
-        participant_count=Count('participants')
-    )[1:4]
-    event = get_object_or_404(Event, id=id)
-    schedules = event.schedules.all().order_by('day', 'time')
-    speakers = event.speakers.all()
+@conditional_page(catalog_validators)
+async def events_page(request):
+    form = EventSearchForm(request.GET)
+    form.is_valid()  # invalid filters are simply left out of cleaned_data
+    events = filter_events(form.cleaned_data)
+
+    if form.cleaned_data.get('q'):
+        ordering = ('-rank', 'date', 'id')
+    else:
+        ordering = ('date', 'id')
+    page, categories, tags = await asyncio.gather(
+        apaginate(request, events, ordering, per_page=12),
+        _category_counts(),
+        acached_section('tags', _tag_cloud),
+    )
 
     context = {
-        'event': event,
-        'schedules': schedules,
-        'speakers': speakers,
-        'related_events': related_events
+        "events": page.object_list,
+        "page": page,
+        "categories": categories,
+        "total_events": sum(cat.event_count for cat in categories),
+        "tags": tags,
+        "form": form,
     }
-    return render(request, 'events/event_details.html', context)
+    return await arender_page(request, "events.html", "events/events_grid_items.html", context)
+
+
+async def _tag_cloud():
+    return await _list(tag_cloud())
+
+
+async def _related_events():
+    return await _list(Event.objects.filter(is_featured=True)[1:4])
+
+
+async def _waitlist_place(user, event_id):
+    """The user's place in the event's waitlist (1 is next), or None."""
+    position = await WaitlistEntry.objects.filter(user=user, event_id=event_id).values_list('position', flat=True).afirst()
+    if position is None:
+        return None
+    return await WaitlistEntry.objects.filter(event_id=event_id, position__lt=position).acount() + 1
+
+
+async def event_detail(request, id):
+    # The body is shared by every visitor and cached per event version (see events.page_cache);
+    # only the RSVP/save buttons are rendered per user
+    body_key = await adetail_body_key(id)
+    user = await request.auser()
+    is_going = is_saved = is_organizer = is_full = False
+    waitlist_place = None
+    if user.is_authenticated:
+        is_going, is_saved, seats, waitlist_place = await asyncio.gather(
+            EventParticipant.objects.filter(user=user, event_id=id).aexists(),
+            SavedEvent.objects.filter(user=user, event_id=id).aexists(),
+            Event.objects.filter(id=id).values('organizer_id', 'capacity', 'registered').afirst(),
+            _waitlist_place(user, id),
+        )
+        if seats:
+            is_organizer = seats['organizer_id'] == user.id
+            is_full = 0 < seats['capacity'] <= seats['registered']
+
+    # The body's versions change with anything shown on it, so they validate the page as well
+    etag = make_etag(
+        body_key, is_going, is_saved, is_organizer, is_full, waitlist_place,
+        viewer_key(request, user, shared=False),
+    )
+    response = not_modified(request, etag)
+    if response is not None:
+        return finish(response, etag)
+
+    body = await cache.aget(body_key)
+    if body is None:
+        event, schedules, speakers, related_events = await asyncio.gather(
+            aget_object_or_404(Event.objects.select_related('category', 'organizer'), id=id),
+            _list(Schedule.objects.filter(event_id=id).order_by('day', 'time')),
+            _list(Speaker.objects.filter(event_id=id)),
+            acached_section('related_events', _related_events),
+        )
+        body = await arender_to_string('events/event_detail_body.html', {
+            'event': event,
+            'schedules': schedules,
+            'speakers': speakers,
+            'related_events': related_events,
+            'actions': mark_safe(ACTIONS_SLOT),
+        })
+        await cache.aset(body_key, body, detail_body_timeout())
+
+    actions = await arender_to_string('events/event_detail_actions.html', {
+        'event_id': id,
+        'is_going': is_going,
+        'is_saved': is_saved,
+        'is_organizer': is_organizer,
+        'is_full': is_full,
+        'waitlist_place': waitlist_place,
+        'csrf_token': get_token(request),
+    })
+
+    context = {'body': mark_safe(body.replace(ACTIONS_SLOT, actions))}
+    response = await arender(request, 'events/event_details.html', context)
+    return finish(response, etag)
+
+
+FEED_MAX_AGE = 60 * 5
+
+
+def _calendar_response(request, name, filename, events, validators, private):
+    """Stream an ICS feed, or answer 304 from the validators without touching the events."""
+    etag, last_modified = validators
+    etag = quote_etag(etag)
+    last_modified = last_modified and int(last_modified.timestamp())
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = streaming_response(
+            request, stream_calendar(name, events, request), astream_calendar(name, events, request),
+            content_type='text/calendar; charset=utf-8',
+        )
+        response['Content-Disposition'] = f'inline; filename="{filename}"'
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, **{'private' if private else 'public': True}, max_age=FEED_MAX_AGE)
+    return response
+
+
+@require_GET
+def rsvp_calendar(request, token):
+    user_id = read_feed_token(token)
+    if user_id is None:
+        raise Http404("Unknown calendar feed")
+    return _calendar_response(
+        request, 'My RSVPs', 'rsvps.ics', rsvp_feed_events(user_id), rsvp_feed_validators(user_id), private=True
+    )
+
+
+@require_GET
+def category_calendar(request, category_id):
+    category, validators = category_feed(category_id)
+    if category is None:
+        raise Http404("No such category")
+    return _calendar_response(
+        request, category.name, f'{category.slug}.ics', category_feed_events(category_id), validators,
+        private=False,
+    )
+
+
+
+def _attendees_response(request, participants, filename):
+    form = AttendeeExportForm(request.GET)
+    form.is_valid()  # invalid filters are simply left out of cleaned_data
+    participants = filter_attendees(participants, form.cleaned_data)
+    response = streaming_response(
+        request, stream_attendees_csv(participants), astream_attendees_csv(participants),
+        content_type='text/csv; charset=utf-8',
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    patch_cache_control(response, private=True, no_store=True)
+    return response
+
 
+@login_required
+@require_GET
+def event_attendees_export(request, id):
+    event = get_object_or_404(Event.objects.only('id', 'slug', 'organizer_id'), id=id)
+    if not can_export(request.user, event):
+        raise PermissionDenied
+    return _attendees_response(request, attendees_of_event(event.id), f'{event.slug}-attendees.csv')
+
+
+@login_required
+@require_GET
+def category_attendees_export(request, category_id):
+    category = get_object_or_404(Category, id=category_id)
+    # Organizers get the attendees of their own events in the category
+    organizer = None if is_event_admin(request.user) else request.user
+    if organizer and not category.events.filter(organizer=organizer).exists():
+        raise PermissionDenied
+    return _attendees_response(
+        request, attendees_of_category(category.id, organizer), f'{category.slug}-attendees.csv'
+    )
 
 def how_it_works(request):
     return render(request, 'how_it_works.html')
 
-def categories_list(request):
-    categories = Category.objects.annotate(event_count=Count('events'))
-    return render(request, 'category.html', {'categories': categories})
+@conditional_page(catalog_validators)
+async def categories_list(request):
+    categories = await _category_counts()
+    return await arender(request, 'category.html', {'categories': categories})
 
 def contact(request):
     if request.method == "POST":
@@ -64,16 +253,19 @@ def contact(request):
         
     return render(request, 'contact.html')
 
-def category_detail(request, category_id):
-    category = get_object_or_404(Category, id=category_id)
-    
-    events = Event.objects.filter(category=category).order_by('-date')
-    
+@conditional_page(catalog_validators)
+async def category_detail(request, category_id):
+    category, page = await asyncio.gather(
+        aget_object_or_404(Category, id=category_id),
+        apaginate(request, Event.objects.filter(category_id=category_id), ('-date', '-id'), per_page=12),
+    )
+
     context = {
         'category': category,
-        'events': events,
+        'events': page.object_list,
+        'page': page,
     }
-    return render(request, 'category_detail.html', context)
+    return await arender_page(request, 'category_detail.html', 'category_detail_items.html', context)
 
 
 
@@ -83,10 +275,15 @@ class AdminRequiredMixin(UserPassesTestMixin):
         return self.request.user.is_superuser or self.request.user.groups.filter(name='Admin').exists()
 
 # --- EVENT VIEWS ---
-class AdminEventListView(LoginRequiredMixin, AdminRequiredMixin, ListView):
+class AdminEventListView(LoginRequiredMixin, AdminRequiredMixin, CursorPaginationMixin, ListView):
     model = Event
     template_name = 'admin/admin_event.html'
+    partial_template_name = 'admin/admin_event_rows.html'
     context_object_name = 'events'
+    cursor_ordering = ('-date', '-id')
+
+    def get_queryset(self):
+        return Event.objects.select_related('category')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -105,8 +302,11 @@ class AdminEventListView(LoginRequiredMixin, AdminRequiredMixin, ListView):
 
     def post(self, request, *args, **kwargs):
         event_id = request.POST.get('event_id')
+        before = None
         if event_id: # Update logic
             instance = Event.objects.get(id=event_id)
+            before = snapshot(instance)
+            old_capacity = instance.capacity
             form = EventForm(request.POST, request.FILES, instance=instance)
         else: # Create logic
             form = EventForm(request.POST, request.FILES)
@@ -116,17 +316,47 @@ class AdminEventListView(LoginRequiredMixin, AdminRequiredMixin, ListView):
             if not event_id:
                 event.organizer = request.user
             event.save()
+            if before:
+                # Attendees are notified by the fanout_event_updates worker
+                queue_event_update(event, before)
+                if event.capacity == 0 or event.capacity > old_capacity:
+                    # Raised capacity goes to the waitlist first
+                    fill_from_waitlist(event)
             return redirect('admin-events')
         
         return self.get(request, *args, **kwargs)
 
 
 
+class AdminEventImportView(LoginRequiredMixin, AdminRequiredMixin, View):
+    template_name = 'admin/admin_event_import.html'
+
+    def get(self, request):
+        return render(request, self.template_name, {'form': EventImportUploadForm()})
+
+    def post(self, request):
+        form = EventImportUploadForm(request.POST, request.FILES)
+        context = {'form': form}
+        if form.is_valid():
+            upload = form.cleaned_data['file']
+            # Parsed straight off the uploaded file, a chunk at a time
+            f = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+            try:
+                report = import_events(read_rows(f, detect_format(upload.name)), request.user)
+            except (ValueError, UnicodeDecodeError) as e:
+                form.add_error('file', f"Could not read the file: {e}")
+            else:
+                context['report'] = report
+        return render(request, self.template_name, context)
+
+
 # --- CATEGORY VIEWS ---
-class AdminCategoryListView(LoginRequiredMixin, AdminRequiredMixin, ListView):
+class AdminCategoryListView(LoginRequiredMixin, AdminRequiredMixin, CursorPaginationMixin, ListView):
     model = Category
     template_name = 'admin/admin_category.html'
+    partial_template_name = 'admin/admin_category_rows.html'
     context_object_name = 'categories'
+    cursor_ordering = ('name', 'id')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -174,10 +404,15 @@ def delete_category(request, id):
 
 
 
-class AdminRolePermissionView(LoginRequiredMixin, AdminRequiredMixin, ListView):
+class AdminRolePermissionView(LoginRequiredMixin, AdminRequiredMixin, CursorPaginationMixin, ListView):
     model = User
     template_name = 'admin/admin_user.html'
+    partial_template_name = 'admin/admin_user_rows.html'
     context_object_name = 'users'
+    cursor_ordering = ('-date_joined', '-id')
+
+    def get_queryset(self):
+        return User.objects.prefetch_related('groups')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
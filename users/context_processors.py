@@ -0,0 +1,7 @@
+from users.notifications import get_unread_count
+
+
+def notifications(request):
+    if not request.user.is_authenticated:
+        return {}
+    return {'unread_count': get_unread_count(request.user)}
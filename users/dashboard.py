@@ -0,0 +1,47 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from events.models import EventParticipant, SavedEvent
+
+
+DASHBOARD_STATS_TIMEOUT = 60 * 5
+
+
+def _cache_key(user_id):
+    return f'dashboard:stats:{user_id}'
+
+
+def compute_dashboard_stats(user):
+    """The counters the dashboard home shows, with one conditional aggregate query per table."""
+    today = timezone.now().date()
+    week_ago = timezone.now() - timedelta(days=7)
+
+    participation = EventParticipant.objects.filter(user=user).aggregate(
+        attended_count=Count('id', filter=Q(event__date__lt=today, status='attended')),
+        upcoming_count=Count('id', filter=Q(event__date__gte=today, status='going')),
+        new_this_week=Count('id', filter=Q(joined_at__gte=week_ago)),
+    )
+    saved = SavedEvent.objects.filter(user=user).aggregate(
+        saved_count=Count('id'),
+        new_saved=Count('id', filter=Q(created_at__gte=week_ago)),
+    )
+    return {**participation, **saved}
+
+
+def get_dashboard_stats(user):
+    """Cached ``compute_dashboard_stats``; users.signals drops it when the user's rows change."""
+    key = _cache_key(user.pk)
+    stats = cache.get(key)
+    if stats is None or stats['day'] != timezone.now().date():
+        stats = compute_dashboard_stats(user)
+        stats['day'] = timezone.now().date()
+        cache.set(key, stats, DASHBOARD_STATS_TIMEOUT)
+    return stats
+
+
+def invalidate_dashboard_stats(user_id):
+    cache.delete(_cache_key(user_id))
+
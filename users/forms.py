@@ -4,6 +4,8 @@ from django.contrib.auth.models import Group, Permission
 from django import forms
 from users.models import CustomUser
 from django.contrib.auth import get_user_model
+from django.template import loader
+from core.mail import queue_mail
 
 User = get_user_model()
 
@@ -146,6 +148,15 @@ class CustomPasswordResetForm(PasswordResetForm):
         })
     )
 
+    def send_mail(self, subject_template_name, email_template_name, context, from_email, to_email, html_email_template_name=None):
+        # Same rendering as PasswordResetForm, but queued for the outbox worker
+        subject = ''.join(loader.render_to_string(subject_template_name, context).splitlines())
+        body = loader.render_to_string(email_template_name, context)
+        html_body = None
+        if html_email_template_name is not None:
+            html_body = loader.render_to_string(html_email_template_name, context)
+        queue_mail(subject, body, from_email, [to_email], html_message=html_body)
+
 class CustomPasswordConfirmForm(SetPasswordForm):
     new_password1 = forms.CharField(
         label="New Password",
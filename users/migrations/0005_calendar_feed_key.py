@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_date_joined_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='calendar_feed_key',
+            field=models.CharField(blank=True, editable=False, max_length=32),
+        ),
+    ]
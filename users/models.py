@@ -5,11 +5,20 @@ from django.contrib.auth.models import AbstractUser
 class CustomUser(AbstractUser):
     profile_image = models.ImageField(upload_to='profile_images', blank=True, default='profile_images/default.jpg')
     cover_image = models.ImageField(upload_to='cover_images', blank=True, default='cover_images/default.jpg')
+    profile_image_variants = models.JSONField(default=dict, blank=True, editable=False)  # filled by core.images
+    cover_image_variants = models.JSONField(default=dict, blank=True, editable=False)  # filled by core.images
     phone = models.CharField(max_length=15, blank=True)
     bio = models.TextField(blank=True)
     address = models.CharField(max_length=255, blank=True)
     followers = models.IntegerField(blank=True, null=True)
     events = models.IntegerField(blank=True, null=True)
+    calendar_feed_key = models.CharField(max_length=32, blank=True, editable=False)  # see events.calendar
+
+    class Meta(AbstractUser.Meta):
+        # The admin user table pages through (date_joined, id); see core.pagination
+        indexes = [
+            models.Index(fields=['date_joined', 'id'], name='user_date_joined_idx'),
+        ]
 
     def __str__(self):
         return f'{self.username} Profile'
\ No newline at end of file
@@ -0,0 +1,54 @@
+from django.core.cache import cache
+
+from events.models import Notification
+
+
+# Counters are recounted this often, so one that drifted (e.g. a per-process cache that missed another
+# process's changes) is put right by the read path
+UNREAD_COUNT_TIMEOUT = 60 * 5
+
+def _unread_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def get_unread_count(user):
+    """Unread notification count for ``user``, counted from the table when the counter is missing or expired."""
+    key = _unread_key(user.pk)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(user=user, is_read=False).count()
+        # add() so a concurrent incr/decr that beat us here isn't overwritten
+        if not cache.add(key, count, UNREAD_COUNT_TIMEOUT):
+            count = cache.get(key, count)
+    return max(count, 0)
+
+
+def adjust_unread_count(user_id, delta):
+    try:
+        cache.incr(_unread_key(user_id), delta)
+    except ValueError:
+        # Not cached yet; get_unread_count will count it fresh
+        pass
+
+
+def reset_unread_count(user_id):
+    cache.delete(_unread_key(user_id))
+
+
+def mark_notifications_read(user, ids=None):
+    """Mark the user's unread notifications (optionally only ``ids``) as read and update the counter."""
+    if ids is not None and not ids:
+        return 0
+    unread = Notification.objects.filter(user=user, is_read=False)
+    if ids is not None:
+        unread = unread.filter(id__in=ids)
+    updated = unread.update(is_read=True)
+    if updated:
+        adjust_unread_count(user.pk, -updated)
+    return updated
+
+
+def notifications_bulk_created(user_ids):
+    """Keep counters right after ``bulk_create``, which sends no post_save signals."""
+    for user_id in user_ids:
+        adjust_unread_count(user_id, 1)
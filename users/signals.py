@@ -1,10 +1,13 @@
 from django.contrib.auth.models import Group
 from django.dispatch import receiver
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.contrib.auth.tokens import default_token_generator
 from django.conf import settings
-from django.core.mail import send_mail
+from core.mail import queue_mail
 from django.contrib.auth import get_user_model
+from events.models import EventParticipant, SavedEvent, Notification
+from users.dashboard import invalidate_dashboard_stats
+from users.notifications import adjust_unread_count, reset_unread_count
 
 User = get_user_model()
 
@@ -18,10 +21,8 @@ def send_activation_email(sender, instance, created, **kwargs):
         message = f"Hi {instance.username}, \n\nPlease Activate your account by clicking here the link below,\n\n{activation_url}\n\nThank You."
         recipient_list = [instance.email]
 
-        try:
-            send_mail(subject, message, settings.EMAIL_HOST_USER, recipient_list)
-        except Exception as e:
-            print(f"Failed to send email to {instance.email}: {str(e)}")
+        # Delivered by the send_queued_mail worker, signup doesn't wait on SMTP
+        queue_mail(subject, message, settings.EMAIL_HOST_USER, recipient_list)
 
 @receiver(post_save, sender=User)
 def assign_role(sender, instance, created, **kwargs):
@@ -30,3 +31,28 @@ def assign_role(sender, instance, created, **kwargs):
 
         instance.groups.add(user)
         instance.save()
+
+
+def clear_dashboard_stats(sender, instance, **kwargs):
+    invalidate_dashboard_stats(instance.user_id)
+
+
+for model in (EventParticipant, SavedEvent):
+    post_save.connect(clear_dashboard_stats, sender=model)
+    post_delete.connect(clear_dashboard_stats, sender=model)
+
+
+@receiver(post_save, sender=Notification)
+def count_new_notification(sender, instance, created, **kwargs):
+    if created:
+        if not instance.is_read:
+            adjust_unread_count(instance.user_id, 1)
+    else:
+        # Can't tell what changed on a plain save, recount next time
+        reset_unread_count(instance.user_id)
+
+
+@receiver(post_delete, sender=Notification)
+def uncount_deleted_notification(sender, instance, **kwargs):
+    if not instance.is_read:
+        adjust_unread_count(instance.user_id, -1)
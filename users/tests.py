@@ -1,3 +1,174 @@
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+
+from core.benchmark import ViewBenchmarkMixin
+from core.explain import QueryPlanMixin
+from core.seed import seed
+from events.models import Notification
+from users.dashboard import compute_dashboard_stats
+from users.notifications import UNREAD_COUNT_TIMEOUT, get_unread_count, mark_notifications_read
+
+User = get_user_model()
+
+
+class DashboardBenchmarkTest(ViewBenchmarkMixin, TestCase):
+    def setUp(self):
+        self.user = User.objects.get(username='seed-user-0-5')
+        self.admin = User.objects.get(username='seed-user-0-0')
+
+    def test_dashboard(self):
+        self.client.force_login(self.user)
+        self.benchmark('dashboard', reverse('dashboard'), max_queries=11)
+
+    def test_dashboard_rsvps(self):
+        self.client.force_login(self.user)
+        self.benchmark('dashboard_rsvps', reverse('dashboard_rsvps'), max_queries=9)  # 8 once the calendar key exists
+
+    def test_dashboard_saved(self):
+        self.client.force_login(self.user)
+        self.benchmark('dashboard_saved', reverse('dashboard_saved'), max_queries=7)
+
+    def test_dashboard_notifications(self):
+        self.client.force_login(self.user)
+        self.benchmark('dashboard_notifications', reverse('dashboard_notifications'), max_queries=8)
+
+    def test_admin_dashboard(self):
+        self.client.force_login(self.admin)
+        self.benchmark('admin_dashboard', reverse('dashboard'), max_queries=12)
+
+
+class DashboardQueryPlanTest(QueryPlanMixin, TestCase):
+    """Explains the queries the dashboard views send, with their caches empty."""
+
+    @classmethod
+    def setUpTestData(cls):
+        seed()
+        cls.user = User.objects.get(username='seed-user-0-5')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_dashboard(self):
+        with self.assertQueriesUseIndexes('dashboard'):
+            self.client.get(reverse('dashboard'))
+
+    def test_dashboard_stats(self):
+        with self.assertQueriesUseIndexes('dashboard stats') as captured:
+            compute_dashboard_stats(self.user)
+        self.assertEqual(len(captured), 2)  # one aggregate per table
+
+    def test_rsvp_lists(self):
+        with self.assertQueriesUseIndexes('RSVPs'):
+            self.client.get(reverse('dashboard_rsvps'))
+
+    def test_saved_events(self):
+        with self.assertQueriesUseIndexes('saved events'):
+            self.client.get(reverse('dashboard_saved'))
+
+    def test_notifications(self):
+        with self.assertQueriesUseIndexes('notifications'):
+            self.client.get(reverse('dashboard_notifications'))
+        with self.assertQueriesUseIndexes('new notifications'):
+            self.client.get(reverse('dashboard_notifications_new'), {'since': 1000})
+
+    def test_admin_user_table(self):
+        self.client.force_login(User.objects.get(username='seed-user-0-0'))
+        with self.assertQueriesUseIndexes('admin user table', allow=['auth_group']):  # the role choices
+            self.client.get(reverse('admin-users'))
+
+
+class DashboardQueryCountTest(TestCase):
+    """Cold loads; session, user, group checks and the header's notifications are counted too."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='member')
+        self.client.force_login(self.user)
+
+    def test_dashboard(self):
+        with self.assertNumQueries(11):  # incl. 2 for the counters
+            response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['saved_count'], 0)
+        with self.assertNumQueries(8):  # the counters and the unread count are cached
+            self.client.get(reverse('dashboard'))
+
+    def test_rsvps(self):
+        with self.assertNumQueries(9):  # incl. creating the calendar feed key
+            self.client.get(reverse('dashboard_rsvps'))
+        with self.assertNumQueries(7):  # the unread count is cached too
+            self.client.get(reverse('dashboard_rsvps'))
+
+    def test_saved(self):
+        with self.assertNumQueries(7):
+            self.client.get(reverse('dashboard_saved'))
+
+    def test_notifications(self):
+        Notification.objects.create(user=self.user, notification_type='event_reminder', title='Hello', message='Hi')
+        with self.assertNumQueries(8):  # incl. marking it read
+            self.client.get(reverse('dashboard_notifications'))
+
+
+class UnreadCountTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='reader')
+
+    def notify(self, count):
+        for i in range(count):
+            Notification.objects.create(user=self.user, notification_type='event_reminder', title=f'Hello {i}', message='Hi')
+
+    def test_counter_follows_new_and_read_notifications(self):
+        self.notify(2)
+        self.assertEqual(get_unread_count(self.user), 2)
+        self.notify(1)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_unread_count(self.user), 3)
+
+        mark_notifications_read(self.user)
+        self.assertEqual(get_unread_count(self.user), 0)
+
+    def test_drifted_counter_is_recounted_once_it_expires(self):
+        self.notify(2)
+        self.assertEqual(get_unread_count(self.user), 2)
+        # Another process marked them read; this process's counter never heard about it
+        Notification.objects.filter(user=self.user).update(is_read=True)
+        self.assertEqual(get_unread_count(self.user), 2)
+
+        later = time.time() + UNREAD_COUNT_TIMEOUT + 1
+        with mock.patch('django.core.cache.backends.locmem.time.time', return_value=later):
+            self.assertEqual(get_unread_count(self.user), 0)
+
+
+class NotificationPollTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='reader')
+        self.client.force_login(self.user)
+
+    def poll(self, since):
+        response = self.client.get(reverse('dashboard_notifications_new'), {'since': since})
+        titles = [n.title for n in response.context['notifications']] if response.context else []
+        return titles, int(response['X-Last-Id']), response['X-More']
+
+    def test_a_backlog_is_sent_oldest_page_first(self):
+        first = Notification.objects.create(user=self.user, notification_type='event_reminder', title='Seen', message='Hi')
+        for i in range(25):
+            Notification.objects.create(user=self.user, notification_type='event_reminder', title=f'New {i}', message='Hi')
+
+        titles, last_id, more = self.poll(first.id)
+        self.assertEqual(titles, [f'New {i}' for i in reversed(range(20))])  # newest on top, for prepending
+        self.assertEqual(more, '1')
+
+        titles, last_id, more = self.poll(last_id)
+        self.assertEqual(titles, [f'New {i}' for i in reversed(range(20, 25))])
+        self.assertEqual(more, '0')
+        self.assertEqual(get_unread_count(self.user), 1)
 
-# Create your tests here.
+        self.assertEqual(self.poll(last_id), ([], last_id, '0'))
+        self.assertEqual(self.client.get(reverse('dashboard_notifications_new'), {'since': 'x'}).status_code, 400)
@@ -1,5 +1,5 @@
 from django.urls import path
-from users.views import sign_up, activate_user, ProfileView,  CustomLoginView, CustomPasswordResetView, CustomPasswordResetConfirmView, dashboard, save_event, rsvp_event, dashboard_settings, dashboard_saved, dashboard_rsvps, dashboard_notifications
+from users.views import sign_up, activate_user, ProfileView,  CustomLoginView, CustomPasswordResetView, CustomPasswordResetConfirmView, dashboard, save_event, rsvp_event, waitlist_join, waitlist_leave, dashboard_settings, dashboard_saved, dashboard_rsvps, dashboard_notifications, dashboard_notifications_new, calendar_feed_reset
 from django.contrib.auth.views import LogoutView
 
 urlpatterns = [
@@ -14,12 +14,16 @@ urlpatterns = [
 
     # Event Actions
     path('events/<int:id>/rsvp/', rsvp_event, name='rsvp_event'),
+    path('events/<int:id>/waitlist/join/', waitlist_join, name='waitlist_join'),
+    path('events/<int:id>/waitlist/leave/', waitlist_leave, name='waitlist_leave'),
     path('events/<int:id>/save/', save_event, name='save_event'),
     
     # Dashboard Views
     path('dashboard/', dashboard, name='dashboard'),
     path('dashboard/rsvps/', dashboard_rsvps, name='dashboard_rsvps'),
+    path('dashboard/rsvps/calendar/reset/', calendar_feed_reset, name='calendar_feed_reset'),
     path('dashboard/saved/', dashboard_saved, name='dashboard_saved'),
     path('dashboard/notifications/', dashboard_notifications, name='dashboard_notifications'),
+    path('dashboard/notifications/new/', dashboard_notifications_new, name='dashboard_notifications_new'),
     path('dashboard/settings/', dashboard_settings, name='dashboard_settings'),
 ]
\ No newline at end of file
@@ -1,21 +1,28 @@
 from django.shortcuts import render, redirect, get_object_or_404, HttpResponse
+from django.http import HttpResponseBadRequest
+from django.views.decorators.http import require_POST
 from django.contrib.auth.models import Group
 from django.contrib.auth import get_user_model
 from django.contrib import messages
 from django.contrib.auth.tokens import default_token_generator
 from django.contrib.auth.decorators import login_required
-from django.db.models import Prefetch, Count
+from django.db.models import Prefetch
 from users.forms import CustomRegistrationForm, LoginForm, CustomPasswordChangeForm, CustomPasswordResetForm, CustomPasswordConfirmForm, EditProfileForm
 from django.utils import timezone
 from django.utils.decorators import method_decorator
 from django.core.mail import send_mail
 from django.conf import settings
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
 from django.contrib.auth.views import LoginView, PasswordResetView, PasswordResetConfirmView
 from django.views.generic import TemplateView
-from datetime import timedelta
 from events.models import Event, Category, EventParticipant, SavedEvent, Notification, UserActivity
 from django.contrib.auth import update_session_auth_hash
+from core.pagination import paginate, render_page
+from users.dashboard import get_dashboard_stats
+from users.notifications import mark_notifications_read
+from events.rsvp import join_event, cancel_rsvp, join_waitlist, leave_waitlist, EventFull, AlreadyRegistered, SeatsAvailable
+from events.activity import log_activity
+from events.calendar import make_feed_token, reset_feed_token
 
 
 User = get_user_model()
@@ -97,9 +104,10 @@ def dashboard(request):
     if user.is_superuser or user.groups.filter(name__iexact='Admin').exists():
         users = User.objects.prefetch_related(
             Prefetch('groups', queryset=Group.objects.all(), to_attr='all_groups')
-        ).all()
+        )
+        page = paginate(request, users, ('-date_joined', '-id'), per_page=20)
 
-        for u in users:
+        for u in page:
             u.group_name = u.all_groups[0].name if u.all_groups else "No Group Assign"
 
         # Admin extra stats
@@ -107,12 +115,13 @@ def dashboard(request):
         total_participants = EventParticipant.objects.count()
 
         context = {
-            "users": users,
-            "total_users": users.count(),
+            "users": page.object_list,
+            "page": page,
+            "total_users": User.objects.count(),
             "total_events": total_events,
             "total_participants": total_participants,
         }
-        return render(request, 'admin/admin_dashboard.html', context)
+        return render_page(request, 'admin/admin_dashboard.html', 'admin/admin_dashboard_rows.html', context)
 
     # 2. REGULAR USER
     else:
@@ -122,22 +131,10 @@ def dashboard(request):
             event__date__gte=timezone.now().date(),
             status='going'
         ).select_related('event').order_by('event__date')[:3]
-        
-        saved_count = SavedEvent.objects.filter(user=user).count()
-        attended_count = EventParticipant.objects.filter(
-            user=user, event__date__lt=timezone.now().date(), status='attended'
-        ).count()
-        upcoming_count = EventParticipant.objects.filter(
-            user=user, event__date__gte=timezone.now().date(), status='going'
-        ).count()
-        
-        week_ago = timezone.now() - timedelta(days=7)
-        new_this_week = EventParticipant.objects.filter(user=user, joined_at__gte=week_ago).count()
-        new_saved = SavedEvent.objects.filter(user=user, created_at__gte=week_ago).count()
-        
+
+        stats = get_dashboard_stats(user)
         recent_activities = UserActivity.objects.filter(user=user).select_related('event')[:5]
-        unread_count = Notification.objects.filter(user=user, is_read=False).count()
-        
+
         formatted_activities = []
         for activity in recent_activities:
             formatted_activities.append({
@@ -148,13 +145,12 @@ def dashboard(request):
         
         context = {
             'upcoming_rsvps': upcoming_rsvps,
-            'saved_count': saved_count,
-            'attended_count': attended_count,
-            'upcoming_count': upcoming_count,
-            'new_this_week': new_this_week,
-            'new_saved': new_saved,
+            'saved_count': stats['saved_count'],
+            'attended_count': stats['attended_count'],
+            'upcoming_count': stats['upcoming_count'],
+            'new_this_week': stats['new_this_week'],
+            'new_saved': stats['new_saved'],
             'recent_activities': formatted_activities,
-            'unread_count': unread_count,
         }
         return render(request, 'dashboard.html', context)
 
@@ -175,15 +171,10 @@ def dashboard_rsvps(request):
         event__date__lt=timezone.now().date()
     ).select_related('event').order_by('-event__date')
 
-    unread_count = Notification.objects.filter(
-        user=request.user,
-        is_read=False
-    ).count()
-    
     context = {
         'upcoming_rsvps': upcoming_rsvps,
         'past_rsvps': past_rsvps,
-        'unread_count': unread_count,
+        'calendar_url': request.build_absolute_uri(reverse('rsvp_calendar', args=[make_feed_token(user)])),
     }
     
     return render(request, 'rsvp.html', context)
@@ -197,38 +188,60 @@ def dashboard_saved(request):
     saved_events = SavedEvent.objects.filter(
         user=user
     ).select_related('event').order_by('-created_at')
-    unread_count = Notification.objects.filter(
-        user=request.user,
-        is_read=False
-    ).count()
-    
+
     context = {
         'saved_events': saved_events,
-        'unread_count': unread_count,
     }
     
     return render(request, 'rsvp_save.html', context)
 
 
+NOTIFICATIONS_PER_PAGE = 20
+
+
 @login_required
 def dashboard_notifications(request):
     user = request.user
-    
-    notifications = Notification.objects.filter(user=user).order_by('-created_at')
 
-    # mark all as read
-    notifications.filter(is_read=False).update(is_read=True)
-    unread_count = Notification.objects.filter(
-        user=request.user,
-        is_read=False
-    ).count()
+    notifications = Notification.objects.filter(user=user)
+    page = paginate(request, notifications, ('-created_at', '-id'), per_page=NOTIFICATIONS_PER_PAGE)
+
+    # Only what is on screen counts as read; the rows keep is_read=False for this render
+    mark_notifications_read(user, [n.id for n in page if not n.is_read])
 
     context = {
-        'notifications': notifications,
-        'unread_count': unread_count,
+        'notifications': page.object_list,
+        'page': page,
+        'last_id': max((n.id for n in page), default=0),
     }
     
-    return render(request, 'notification.html', context)
+    return render_page(request, 'notification.html', 'notification_rows.html', context)
+
+
+@login_required
+def dashboard_notifications_new(request):
+    """Rows for notifications newer than ``?since=<id>``, for the open inbox to prepend.
+
+    Rows are taken oldest first so nothing is skipped when many arrive between
+    polls; the id of the newest row sent travels back in ``X-Last-Id`` and
+    ``X-More: 1`` tells the client to poll again straight away.
+    """
+    try:
+        since = int(request.GET.get('since', ''))
+    except ValueError:
+        return HttpResponseBadRequest("since must be a notification id")
+
+    notifications = list(
+        Notification.objects.filter(user=request.user, id__gt=since).order_by('id')[:NOTIFICATIONS_PER_PAGE + 1]
+    )
+    more = len(notifications) > NOTIFICATIONS_PER_PAGE
+    notifications = notifications[:NOTIFICATIONS_PER_PAGE]
+    mark_notifications_read(request.user, [n.id for n in notifications if not n.is_read])
+
+    response = render(request, 'notification_rows.html', {'notifications': notifications[::-1]})
+    response['X-Last-Id'] = notifications[-1].id if notifications else since
+    response['X-More'] = '1' if more else '0'
+    return response
 
 
 @login_required
@@ -275,15 +288,9 @@ def dashboard_settings(request):
                 messages.success(request, 'Password changed successfully!')
                 return redirect('dashboard_settings')
 
-    unread_count = Notification.objects.filter(
-        user=request.user,
-        is_read=False
-    ).count()
-
     return render(request, 'accounts/settings.html', {
         'form': form,
         'password_form': password_form,
-        'unread_count': unread_count
     })
 
 
@@ -294,56 +301,55 @@ def rsvp_event(request, id):
     """Handle RSVP for an event"""
     event = get_object_or_404(Event, id=id)
     user = request.user
-    
-    # Check if user already RSVP'd
-    existing_rsvp = EventParticipant.objects.filter(user=user, event=event).first()
-    
-    if existing_rsvp:
-        # Cancel RSVP
-        existing_rsvp.delete()
-
-        # decrease count
-        if event.registered and event.registered > 0:
-            event.registered -= 1
-            event.save()
+
+    # Clicking RSVP again cancels it, otherwise try to claim a seat
+    if cancel_rsvp(user, event):
         messages.success(request, f'You have cancelled your RSVP for {event.title}')
-        
-        # Log activity
-        UserActivity.objects.create(
-            user=user,
-            event=event,
-            activity_type='cancel'
-        )
     else:
-        # Create new RSVP
-        EventParticipant.objects.create(
-            user=user,
-            event=event,
-            status='going'
-        )
-        
-        # Update registered count
-        event.registered = event.registered + 1 if event.registered else 1
-        event.save()
-        
-        messages.success(request, f'You have successfully RSVP\'d for {event.title}')
-        
-        # Log activity
-        UserActivity.objects.create(
-            user=user,
-            event=event,
-            activity_type='rsvp'
-        )
-        
-        # Create notification
-        Notification.objects.create(
-            user=user,
-            event=event,
-            notification_type='rsvp_confirmation',
-            title='RSVP Confirmed',
-            message=f'Your RSVP for {event.title} has been confirmed.'
-        )
-    
+        try:
+            join_event(user, event)
+            messages.success(request, f'You have successfully RSVP\'d for {event.title}')
+        except EventFull:
+            messages.error(request, f'Sorry, {event.title} is fully booked. Join the waitlist to get the next free seat.')
+        except AlreadyRegistered:
+            messages.info(request, f'You have already RSVP\'d for {event.title}')
+
+    return redirect('event_detail', id=event.id)
+
+
+@login_required
+@require_POST
+def calendar_feed_reset(request):
+    """Replace the user's RSVP calendar link, so copies of the old one stop working"""
+    reset_feed_token(request.user)
+    messages.success(request, 'Your calendar link has been reset. Subscribe again with the new one.')
+    return redirect('dashboard_rsvps')
+
+
+@login_required
+@require_POST
+def waitlist_join(request, id):
+    """Queue the user for a seat at a full event"""
+    event = get_object_or_404(Event, id=id)
+    try:
+        join_waitlist(request.user, event)
+        messages.success(request, f'You are on the waitlist for {event.title}. We\'ll let you know when a seat opens up.')
+    except SeatsAvailable:
+        messages.info(request, f'{event.title} has free seats, RSVP instead')
+    except AlreadyRegistered:
+        messages.info(request, f'You have already RSVP\'d for {event.title}')
+
+    return redirect('event_detail', id=event.id)
+
+
+@login_required
+@require_POST
+def waitlist_leave(request, id):
+    """Take the user off an event's waitlist"""
+    event = get_object_or_404(Event, id=id)
+    if leave_waitlist(request.user, event):
+        messages.success(request, f'You have left the waitlist for {event.title}')
+
     return redirect('event_detail', id=event.id)
 
 
@@ -358,12 +364,7 @@ def save_event(request, id):
     if created:
         messages.success(request, f'{event.title} has been saved to your list')
         
-        # Log activity
-        UserActivity.objects.create(
-            user=user,
-            event=event,
-            activity_type='save'
-        )
+        log_activity(user, event, 'save')
     else:
         saved.delete()
         messages.info(request, f'{event.title} has been removed from your saved list')